@@ -0,0 +1,260 @@
+"""Frame-time benchmark for the update and draw hot paths
+
+Runs the real game module headlessly (SDL dummy video and audio drivers)
+with a scripted player on the stock level and on generated stress levels
+with 10x, 100x and 1000x its entities. For every frame it times
+Player.update, the virus and fruit steps, draw_game() and the whole
+frame, then prints p50/p95/p99 per section and writes them as JSON so
+runs from different commits can be compared:
+
+    python benchmarks/bench_game.py
+    python benchmarks/bench_game.py --frames 300 --scales 1 10 --numpy
+    python benchmarks/bench_game.py --out results/$(git rev-parse --short HEAD).json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame  # noqa: E402
+import pgzero  # noqa: E402
+import pgzero.loaders  # noqa: E402
+import pgzero.runner  # noqa: E402
+from pgzero.constants import keys  # noqa: E402
+from pgzero.game import PGZeroGame  # noqa: E402
+from pgzero.keyboard import keyboard  # noqa: E402
+
+from engine.constants import TICK_RATE  # noqa: E402
+from engine.entities import Player  # noqa: E402
+from engine.level import LEVELS_DIR, LevelFile, write_level  # noqa: E402
+from engine.world import World  # noqa: E402
+
+DEFAULT_SCALES = (1, 10, 100, 1000)
+DEFAULT_FRAMES = 600
+PERCENTILES = (50, 95, 99)
+
+# Section name: (owner, attribute names whose calls are timed)
+SECTIONS = {
+    'player_update': (Player, ('update',)),
+    'viruses': (World, ('step_viruses', 'step_virus_swarm')),
+    'fruits': (World, ('step_fruits', 'step_fruit_swarm')),
+}
+
+
+class Section:
+    """Accumulates the time spent in timed calls during one frame"""
+
+    def __init__(self):
+        self.current = 0.0
+        self.samples = []
+
+    def wrap(self, func):
+        """Wrap func so its run time is added to the current frame"""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.current += time.perf_counter() - start
+        return timed
+
+    def end_frame(self):
+        """Store the frame's total and start the next one"""
+        self.samples.append(self.current)
+        self.current = 0.0
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(samples):
+    """Percentiles, mean and max of per-frame seconds, in milliseconds"""
+    values = sorted(samples)
+    summary = {f'p{pct}': percentile(values, pct) * 1000 for pct in PERCENTILES}
+    summary['mean'] = sum(values) / len(values) * 1000 if values else 0.0
+    summary['max'] = values[-1] * 1000 if values else 0.0
+    return summary
+
+
+def stress_source(scale, seed=0):
+    """The stock level with scale times its entities, scattered over the same area"""
+    with open(os.path.join(LEVELS_DIR, 'level1.json')) as f:
+        source = json.load(f)
+    if scale == 1:
+        return source
+
+    rng = random.Random(seed)
+    width, height = source['width'], source['height']
+    platforms, viruses, fruits = [], [], []
+    for _ in range(scale):
+        for _x, _y, w, h, *color in source['platforms']:
+            platforms.append([rng.randrange(0, width - w), rng.randrange(40, height - 100), w, h, *color])
+        # Copies patrol even where the original chases
+        for x, y, left, right, *_chase in source['viruses']:
+            shift = rng.randrange(-left, width - right)
+            viruses.append([x + shift, rng.randrange(0, height - 150), left + shift, right + shift])
+        for _x, _y in source['fruits']:
+            fruits.append([rng.randrange(0, width - 32), rng.randrange(0, height - 100)])
+    source.update(platforms=platforms, viruses=viruses, fruits=fruits,
+                  name=f"{source['name']} x{scale}")
+    return source
+
+
+def load_game():
+    """Import game_pgzero the way pgzrun does, with a (dummy) window"""
+    path = os.path.join(ROOT, 'game_pgzero.py')
+    os.chdir(ROOT)
+    pgzero.loaders.set_root(ROOT)
+    pygame.init()
+    mod = types.ModuleType('game_pgzero')
+    mod.__file__ = path
+    pgzero.runner.prepare_mod(mod)
+    mod.__dict__.update(__file__=path, __name__='game_pgzero')
+    with open(path) as f:
+        exec(compile(f.read(), path, 'exec'), mod.__dict__)
+    PGZeroGame(mod).reinit_screen()
+    mod.sound_enabled = False
+    mod.preloader.wait()
+    mod.update(0)
+    return mod
+
+
+def press_scripted_keys(frame):
+    """Run back and forth across the level, jumping regularly"""
+    for key in (keys.LEFT, keys.RIGHT, keys.SPACE):
+        keyboard._release(key)
+    keyboard._press(keys.RIGHT if (frame // 90) % 2 == 0 else keys.LEFT)
+    if frame % 45 == 0:
+        keyboard._press(keys.SPACE)
+
+
+def run_scenario(game, level, frames):
+    """Play frames frames of one level; returns per-section summaries"""
+    # init_game() draws the world seed from the global RNG
+    random.seed(0)
+    game.init_game(level)
+    game.game_state = game.STATE_PLAYING
+    world = game.world
+    # Keep the level unfinished for the whole run
+    world.total_fruits = sys.maxsize
+
+    sections = {name: Section() for name in SECTIONS}
+    sections['draw_game'] = Section()
+    sections['frame'] = Section()
+    originals = []
+    for name, (owner, attrs) in SECTIONS.items():
+        for attr in attrs:
+            original = getattr(owner, attr)
+            originals.append((owner, attr, original))
+            setattr(owner, attr, sections[name].wrap(original))
+    draw_game = game.draw_game
+    game.draw_game = sections['draw_game'].wrap(draw_game)
+
+    dt = 1 / TICK_RATE
+    frame_section = sections['frame']
+    try:
+        for frame in range(frames):
+            # Keep the player alive
+            if world.player.hp <= 1:
+                world.player.hp = world.player.max_hp
+            press_scripted_keys(frame)
+            start = time.perf_counter()
+            game.update(dt)
+            game.draw()
+            pygame.display.flip()
+            frame_section.current = time.perf_counter() - start
+            for section in sections.values():
+                section.end_frame()
+    finally:
+        for owner, attr, original in originals:
+            setattr(owner, attr, original)
+        game.draw_game = draw_game
+
+    return {
+        'entities': {
+            'platforms': len(world.platforms),
+            'viruses': len(world.viruses),
+            'fruits': len(world.fruits),
+        },
+        'frames': frames,
+        'sections': {name: summarize(section.samples) for name, section in sections.items()},
+    }
+
+
+def git_revision():
+    """Short hash of the checked out commit, if this is a git checkout"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES, help="frames per scenario")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help="entity multipliers; 1 is the stock level")
+    parser.add_argument('--numpy', action='store_true', help="use the NumPy entity backend")
+    parser.add_argument('--pixel', action='store_true', help="use pixel-accurate collision")
+    parser.add_argument('--out', default='benchmark.json', help="where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    game = load_game()
+    game.USE_NUMPY = args.numpy
+    game.PIXEL_COLLISION = args.pixel
+    results = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'numpy': args.numpy,
+        'pixel_collision': args.pixel,
+        'scenarios': {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            if scale == 1:
+                name, level = 'stock', None
+            else:
+                name = f'stress_x{scale}'
+                path = os.path.join(tmp, name + '.level')
+                write_level(path, stress_source(scale))
+                level = LevelFile(path)
+            result = run_scenario(game, level, args.frames)
+            if level is not None:
+                level.close()
+            results['scenarios'][name] = result
+
+            counts = result['entities']
+            print(f"{name}: {counts['platforms']} platforms, {counts['viruses']} viruses, "
+                  f"{counts['fruits']} fruits, {args.frames} frames")
+            for section, summary in result['sections'].items():
+                print(f"  {section:14} " + "  ".join(
+                    f"{key} {summary[key]:7.3f}ms" for key in ('p50', 'p95', 'p99')))
+
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
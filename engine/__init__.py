@@ -0,0 +1 @@
+"""Game engine modules for NanoVirus Outbreak"""
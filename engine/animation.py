@@ -0,0 +1,133 @@
+"""Shared animation clips and the small per-entity state that plays them"""
+
+from engine.atlas import atlas_index
+
+LOOP = "loop"
+ONCE = "once"
+
+# name: (sprite names, ticks per frame, mode)
+CLIP_DEFS = {
+    'player_idle': ([f'player/idle/idle_{i}' for i in range(1, 12)], 4, LOOP),
+    'player_run': ([f'player/run/run_{i}' for i in range(1, 13)], 5, LOOP),
+    'player_jump': ([f'player/wall_jump/wall_jump{i}_left' for i in range(5, 0, -1)], 3, LOOP),
+    'player_fall': (['player/fall/player_fall'], 4, LOOP),
+    'player_hit': ([f'player/hit/hit_{i}' for i in range(1, 6)], 6, ONCE),
+    'virus_idle': ([f'virus/corona_idle{i}' for i in range(1, 5)], 8, LOOP),
+    'virus_hit': ([f'virus/corona_hit{i}' for i in range(1, 5)], 8, LOOP),
+    'fruit_spin': ([f'fruits/banana/banana_{i}' for i in range(1, 5)], 6, LOOP),
+}
+
+
+class Clip:
+    """One animation: atlas frame ids, how long each frame shows and the play mode"""
+
+    __slots__ = ('id', 'name', 'frames', 'mirrored', 'durations', 'loop')
+
+    def __init__(self, clip_id, name, frames, mirrored, durations, mode):
+        self.id = clip_id
+        self.name = name
+        self.frames = tuple(frames)
+        self.mirrored = tuple(mirrored)
+        self.durations = tuple(durations)
+        self.loop = mode == LOOP
+
+
+_clips = None
+_clip_list = []
+
+
+def _build_clips():
+    global _clips
+    index = atlas_index()
+    _clips = {}
+    for name, (sprites, ticks, mode) in CLIP_DEFS.items():
+        frames = index.ids(sprites)
+        mirrored = [index.mirror(frame) for frame in frames]
+        if isinstance(ticks, int):
+            ticks = [ticks] * len(frames)
+        clip_obj = Clip(len(_clip_list), name, frames, mirrored, ticks, mode)
+        _clips[name] = clip_obj
+        _clip_list.append(clip_obj)
+
+
+def clip(name):
+    """Get a registered clip by name"""
+    if _clips is None:
+        _build_clips()
+    return _clips[name]
+
+
+def clip_by_id(clip_id):
+    """Get a registered clip by its numeric id"""
+    if _clips is None:
+        _build_clips()
+    return _clip_list[clip_id]
+
+
+class Animator:
+    """Playback position inside a shared clip.
+
+    Only the clip reference, frame index, timer and facing live here; the
+    frame lists themselves are shared. frame holds the atlas frame id to
+    draw and is only reassigned when the visible frame actually changes.
+    """
+
+    __slots__ = ('clip', 'index', 'timer', 'mirrored', 'finished', 'frame')
+
+    def __init__(self, start_clip, mirrored=False):
+        self.clip = start_clip
+        self.index = 0
+        self.timer = 0
+        self.mirrored = mirrored
+        self.finished = False
+        self.frame = self._current_frame()
+
+    def _current_frame(self):
+        frames = self.clip.mirrored if self.mirrored else self.clip.frames
+        return frames[self.index]
+
+    def play(self, new_clip, restart=False):
+        """Switch to a clip; keeps playing if it is already the current one"""
+        if new_clip is self.clip and not restart:
+            return
+        self.clip = new_clip
+        self.index = 0
+        self.timer = 0
+        self.finished = False
+        self.frame = self._current_frame()
+
+    def restore(self, clip_obj, index, timer, mirrored, finished):
+        """Jump to a saved playback position"""
+        self.clip = clip_obj
+        self.index = index
+        self.timer = timer
+        self.mirrored = mirrored
+        self.finished = finished
+        self.frame = self._current_frame()
+
+    def set_mirrored(self, mirrored):
+        """Face left (mirrored) or right"""
+        if mirrored != self.mirrored:
+            self.mirrored = mirrored
+            self.frame = self._current_frame()
+
+    def advance(self):
+        """Advance one tick; returns True when the frame changed"""
+        if self.finished:
+            return False
+        self.timer += 1
+        clip_obj = self.clip
+        if self.timer < clip_obj.durations[self.index]:
+            return False
+        self.timer = 0
+        if self.index + 1 < len(clip_obj.frames):
+            self.index += 1
+        elif clip_obj.loop:
+            if self.index == 0:
+                return False
+            self.index = 0
+        else:
+            self.finished = True
+            return False
+        self.frame = self._current_frame()
+        return True
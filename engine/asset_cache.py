@@ -0,0 +1,123 @@
+"""On-disk cache of decoded images and sounds, keyed by their source bytes
+
+Decoding the PNG atlas, the JPEG background and the OGG effects is most
+of a cold start. DecodedCache keeps what they decode to: images as raw
+32-bit BGRA pixels (the layout of the usual display format, so turning
+them back into display surfaces is a plain copy) and sounds as raw
+samples in the mixer's format. Entries are read back through mmap.
+
+An entry's file name holds a hash of the source file's bytes and of the
+format it was decoded to. Editing an asset, or running with another
+mixer setup, just misses and writes a fresh entry; the stale one for the
+same asset is deleted then. Any problem reading or writing the cache
+falls back to decoding the original file.
+"""
+
+import hashlib
+import io
+import mmap
+import os
+import re
+import struct
+
+import pygame
+
+from engine.sprites import IMAGES_DIR
+
+CACHE_DIR = os.path.join(os.path.dirname(IMAGES_DIR), '.cache', 'assets')
+PIXEL_FORMAT = 'BGRA'
+
+# magic, width, height
+_IMAGE_HEADER = struct.Struct('<4sII')
+_IMAGE_MAGIC = b'NVI1'
+_SOUND_MAGIC = b'NVS1'
+
+
+def content_key(data, *tags):
+    """Short hex digest of data plus the formats it is decoded to"""
+    digest = hashlib.blake2b(data, digest_size=12)
+    for tag in tags:
+        digest.update(repr(tag).encode())
+    return digest.hexdigest()
+
+
+def _map(path):
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class DecodedCache:
+    """Loads images and sounds from the cache, decoding and storing misses"""
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, source, key, ext):
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', os.path.relpath(source, os.path.dirname(IMAGES_DIR)))
+        return os.path.join(self.directory, f"{slug}-{key}.{ext}"), slug
+
+    def _store(self, path, slug, chunks):
+        # Written under a temporary name and renamed, so a crash never
+        # leaves a truncated entry behind
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            for name in os.listdir(self.directory):
+                if name.startswith(slug + '-'):
+                    os.remove(os.path.join(self.directory, name))
+            temp = f"{path}.{os.getpid()}.tmp"
+            with open(temp, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(temp, path)
+        except OSError:
+            pass
+
+    def image(self, source):
+        """Surface for an image file, converted to the display format when
+        there is a display"""
+        with open(source, 'rb') as f:
+            data = f.read()
+        path, slug = self._entry(source, content_key(data, PIXEL_FORMAT), 'pixels')
+        try:
+            buffer = _map(path)
+            magic, width, height = _IMAGE_HEADER.unpack_from(buffer)
+            if magic != _IMAGE_MAGIC or len(buffer) != _IMAGE_HEADER.size + width * height * 4:
+                raise ValueError(f"Bad cache entry {path}")
+            surface = pygame.image.frombuffer(memoryview(buffer)[_IMAGE_HEADER.size:], (width, height), PIXEL_FORMAT)
+            self.hits += 1
+        except (OSError, ValueError, struct.error):
+            surface = pygame.image.load(io.BytesIO(data), os.path.basename(source))
+            self._store(path, slug, (_IMAGE_HEADER.pack(_IMAGE_MAGIC, *surface.get_size()),
+                                     pygame.image.tobytes(surface, PIXEL_FORMAT)))
+            self.misses += 1
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        return surface
+
+    def sound(self, source):
+        """pygame Sound for an audio file, as samples in the mixer's format"""
+        mixer_format = pygame.mixer.get_init()
+        if mixer_format is None:
+            raise pygame.error("mixer not initialized")
+        with open(source, 'rb') as f:
+            data = f.read()
+        path, slug = self._entry(source, content_key(data, mixer_format), 'samples')
+        try:
+            buffer = _map(path)
+            if buffer[:4] != _SOUND_MAGIC:
+                raise ValueError(f"Bad cache entry {path}")
+            sound = pygame.mixer.Sound(buffer=memoryview(buffer)[4:])
+            self.hits += 1
+        except (OSError, ValueError):
+            sound = pygame.mixer.Sound(file=io.BytesIO(data))
+            self._store(path, slug, (_SOUND_MAGIC, sound.get_raw()))
+            self.misses += 1
+        return sound
+
+    def clear(self):
+        """Delete every cache entry"""
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                os.remove(os.path.join(self.directory, name))
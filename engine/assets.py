@@ -0,0 +1,176 @@
+"""Asset manifest and a preloader that decodes everything on a worker thread
+
+The manifest lists every file the game uses once play starts: the sprite
+atlas, other images, sound effects, fonts and packed levels. The
+AssetPreloader works through it on a background thread while the menu is
+showing, so no image, sound or level is decoded or read from disk in the
+middle of a level. Music is the exception: pygame's mixer streams it
+from its file, so the preloader only checks that the track exists.
+"""
+
+import os
+import threading
+
+import pygame
+
+from engine.animation import clip, CLIP_DEFS
+from engine.atlas import SpriteAtlas, atlas_index
+from engine.level import LEVELS_DIR, LevelFile
+from engine.sprites import IMAGES_DIR
+
+ROOT_DIR = os.path.dirname(IMAGES_DIR)
+SOUNDS_DIR = os.path.join(ROOT_DIR, 'sounds')
+MUSIC_DIR = os.path.join(ROOT_DIR, 'music')
+
+IMAGE_EXTENSIONS = ('.png', '.gif', '.jpg', '.jpeg', '.bmp')
+SOUND_EXTENSIONS = ('.wav', '.ogg')
+MUSIC_EXTENSIONS = ('.ogg', '.mp3', '.oga')
+
+# Images drawn outside the atlas, by Pygame Zero name
+EXTRA_IMAGES = ('other/fundinho',)
+# Sizes of the default font the menus and HUD use
+FONT_SIZES = (16, 20, 22, 24, 25, 28, 30, 60)
+LEVELS = ('level1',)
+
+
+def find_file(directory, name, extensions):
+    """Path of directory/name with the first extension that exists"""
+    for ext in extensions:
+        path = os.path.join(directory, name + ext)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No file for {name!r} in {directory}")
+
+
+def list_names(directory, extensions):
+    """Names (without extension) of the matching files in a folder"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.splitext(filename)[0] for filename in os.listdir(directory)
+                  if os.path.splitext(filename)[1].lower() in extensions)
+
+
+def build_manifest(font_scale=1, masks=False):
+    """Every asset to preload, as (kind, name) pairs; fonts are loaded at
+    FONT_SIZES times font_scale, and with masks the atlas frames'
+    collision masks are built too"""
+    manifest = [('atlas', 'sprites')]
+    if masks:
+        manifest.append(('masks', 'sprites'))
+    manifest += [('image', name) for name in EXTRA_IMAGES]
+    manifest += [('sound', name) for name in list_names(SOUNDS_DIR, SOUND_EXTENSIONS)]
+    manifest += [('music', name) for name in list_names(MUSIC_DIR, MUSIC_EXTENSIONS)]
+    manifest += [('font', max(1, round(size * font_scale))) for size in FONT_SIZES]
+    manifest += [('level', name) for name in LEVELS]
+    return manifest
+
+
+class Assets:
+    """Loaded assets by kind and name, decoded through an optional
+    DecodedCache (engine/asset_cache.py)"""
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self.atlas = None
+        self.images = {}
+        self.sounds = {}
+        self.music = {}
+        self.fonts = {}
+        self.levels = {}
+
+    def load(self, kind, name):
+        """Decode one manifest entry"""
+        getattr(self, '_load_' + kind)(name)
+
+    def _load_atlas(self, _name):
+        # Also builds the animation clips, which only need the index
+        atlas_index()
+        for clip_name in CLIP_DEFS:
+            clip(clip_name)
+        self.atlas = SpriteAtlas.load(cache=self.cache)
+
+    def _load_masks(self, _name):
+        self.atlas.masks()
+
+    def _load_image(self, name):
+        path = find_file(IMAGES_DIR, name, IMAGE_EXTENSIONS)
+        if self.cache is not None:
+            self.images[name] = self.cache.image(path)
+            return
+        surface = pygame.image.load(path)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        self.images[name] = surface
+
+    def _load_sound(self, name):
+        if pygame.mixer.get_init() is None:
+            raise pygame.error("mixer not initialized")
+        path = find_file(SOUNDS_DIR, name, SOUND_EXTENSIONS)
+        if self.cache is not None:
+            self.sounds[name] = self.cache.sound(path)
+        else:
+            self.sounds[name] = pygame.mixer.Sound(path)
+
+    def _load_music(self, name):
+        self.music[name] = find_file(MUSIC_DIR, name, MUSIC_EXTENSIONS)
+
+    def _load_font(self, size):
+        if not pygame.font.get_init():
+            pygame.font.init()
+        self.fonts[size] = pygame.font.Font(None, size)
+
+    def _load_level(self, name):
+        path = os.path.join(LEVELS_DIR, name + '.level')
+        with open(path, 'rb') as f:
+            self.levels[name] = LevelFile(path, data=f.read())
+
+
+class AssetPreloader:
+    """Loads a manifest on a daemon thread and reports progress.
+
+    Entries that fail (a missing file, no audio device, a malformed level)
+    are skipped and listed in failed, and loading carries on with the
+    rest; the game runs without them, except for the sprite atlas.
+    """
+
+    def __init__(self, manifest=None, cache=None):
+        self.manifest = list(manifest if manifest is not None else build_manifest())
+        self.assets = Assets(cache)
+        self.loaded = 0
+        self.failed = []
+        self._thread = None
+
+    @property
+    def total(self):
+        """Number of manifest entries"""
+        return len(self.manifest)
+
+    @property
+    def progress(self):
+        """Fraction of the manifest processed, from 0.0 to 1.0"""
+        return self.loaded / self.total if self.manifest else 1.0
+
+    @property
+    def done(self):
+        """True once every entry has been processed"""
+        return self.loaded >= self.total
+
+    def start(self):
+        """Begin loading in the background"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='asset-preloader', daemon=True)
+            self._thread.start()
+
+    def wait(self):
+        """Block until loading has finished"""
+        self.start()
+        self._thread.join()
+        return self.assets
+
+    def _run(self):
+        for kind, name in self.manifest:
+            try:
+                self.assets.load(kind, name)
+            except Exception as e:
+                self.failed.append((kind, name, f"{type(e).__name__}: {e}"))
+            self.loaded += 1
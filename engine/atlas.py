@@ -0,0 +1,190 @@
+"""Sprite atlas: every animation frame packed into one image plus a rect index
+
+Build the atlas after adding or changing sprites:
+
+    python -m engine.atlas
+
+Frames are addressed by integer ids. Ids below AtlasIndex.count are the
+packed frames; adding AtlasIndex.count gives the same frame mirrored
+horizontally. The mirrored surfaces are created once when the atlas loads,
+so a name ending in "_left" is served by flipping its right-facing twin
+instead of shipping and loading a second file.
+"""
+
+import json
+import os
+
+import pygame
+
+from engine.sprites import IMAGES_DIR, image_path, image_size
+
+ATLAS_IMAGE = os.path.join(IMAGES_DIR, 'atlas', 'sprites.png')
+ATLAS_INDEX = os.path.join(IMAGES_DIR, 'atlas', 'sprites.json')
+
+# Sprite names (relative to images/) that get packed
+ATLAS_SOURCES = ('player/', 'virus/corona_', 'fruits/', 'plataforms/')
+ATLAS_WIDTH = 256
+PADDING = 1
+MIRROR_SUFFIX = '_left'
+
+
+def find_sources():
+    """List the sprite names to pack; "_left" copies are mirrored at load time"""
+    names = []
+    for folder, _dirs, files in os.walk(IMAGES_DIR):
+        for filename in files:
+            if not filename.endswith('.png'):
+                continue
+            path = os.path.join(folder, filename)
+            name = os.path.relpath(path, IMAGES_DIR)[:-4].replace(os.sep, '/')
+            if name.startswith(ATLAS_SOURCES) and not name.endswith(MIRROR_SUFFIX):
+                names.append(name)
+    return sorted(names)
+
+
+def pack(names):
+    """Shelf-pack sprites by height; returns ((width, height), [[name, x, y, w, h]])"""
+    sizes = {name: image_size(name) for name in names}
+    order = sorted(names, key=lambda name: (-sizes[name][1], name))
+    placed = {}
+    x = y = shelf_height = 0
+    for name in order:
+        w, h = sizes[name]
+        if x + w > ATLAS_WIDTH:
+            x = 0
+            y += shelf_height + PADDING
+            shelf_height = 0
+        placed[name] = [name, x, y, w, h]
+        x += w + PADDING
+        shelf_height = max(shelf_height, h)
+    return (ATLAS_WIDTH, y + shelf_height), [placed[name] for name in names]
+
+
+class AtlasIndex:
+    """Frame names, ids and rects; needs no display or pygame surfaces"""
+
+    def __init__(self, size, frames):
+        self.size = tuple(size)
+        self.names = [frame[0] for frame in frames]
+        self.rects = [tuple(frame[1:]) for frame in frames]
+        self.count = len(frames)
+        self._ids = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def load(cls, path=ATLAS_INDEX):
+        """Read a built index, or lay one out from the source sprites"""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            size, frames = pack(find_sources())
+            return cls(size, frames)
+        return cls(data['size'], data['frames'])
+
+    def id(self, name):
+        """Get the frame id for a sprite name; "_left" names map to mirrored frames"""
+        frame_id = self._ids.get(name)
+        if frame_id is not None:
+            return frame_id
+        if name.endswith(MIRROR_SUFFIX):
+            base = self._ids.get(name[:-len(MIRROR_SUFFIX)])
+            if base is not None:
+                return base + self.count
+        raise KeyError(f"No frame named {name!r} in the sprite atlas")
+
+    def ids(self, names):
+        """Get frame ids for several sprite names"""
+        return [self.id(name) for name in names]
+
+    def mirror(self, frame_id):
+        """Get the horizontally mirrored twin of a frame"""
+        if frame_id < self.count:
+            return frame_id + self.count
+        return frame_id - self.count
+
+    def frame_size(self, frame_id):
+        """Get (width, height) of a frame"""
+        _x, _y, w, h = self.rects[frame_id % self.count]
+        return (w, h)
+
+
+_index = None
+
+
+def atlas_index():
+    """Get the shared AtlasIndex, loading it on first use"""
+    global _index
+    if _index is None:
+        _index = AtlasIndex.load()
+    return _index
+
+
+class SpriteAtlas:
+    """Frame surfaces cut from the atlas image, indexed by frame id"""
+
+    def __init__(self, index, surface):
+        self.index = index
+        self.surface = surface
+        frames = [surface.subsurface(rect) for rect in index.rects]
+        mirrored = [pygame.transform.flip(frame, True, False) for frame in frames]
+        self.frames = frames + mirrored
+        self._masks = None
+
+    def masks(self):
+        """Collision mask of every frame (mirrored ones too) by frame id,
+        built on first use"""
+        if self._masks is None:
+            self._masks = [pygame.mask.from_surface(frame) for frame in self.frames]
+        return self._masks
+
+    @classmethod
+    def load(cls, index=None, cache=None):
+        """Load the atlas image, composing it from the sources if it was never
+        built; cache is an optional DecodedCache to read the image through"""
+        index = index or atlas_index()
+        if os.path.exists(ATLAS_IMAGE) and cache is not None:
+            return cls(index, cache.image(ATLAS_IMAGE))
+        if os.path.exists(ATLAS_IMAGE):
+            surface = pygame.image.load(ATLAS_IMAGE)
+        else:
+            surface = compose(index)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        return cls(index, surface)
+
+
+_masks = None
+
+
+def frame_masks():
+    """Collision masks by frame id, from an atlas loaded once per process;
+    needs no display. For headless worlds; the game passes the masks of
+    its preloaded atlas instead."""
+    global _masks
+    if _masks is None:
+        _masks = SpriteAtlas.load().masks()
+    return _masks
+
+
+def compose(index):
+    """Blit every source sprite into a new atlas surface"""
+    surface = pygame.Surface(index.size, pygame.SRCALPHA)
+    for name, (x, y, _w, _h) in zip(index.names, index.rects):
+        surface.blit(pygame.image.load(image_path(name)), (x, y))
+    return surface
+
+
+def build():
+    """Pack the source sprites and write the atlas image and index"""
+    size, frames = pack(find_sources())
+    index = AtlasIndex(size, frames)
+    os.makedirs(os.path.dirname(ATLAS_IMAGE), exist_ok=True)
+    pygame.image.save(compose(index), ATLAS_IMAGE)
+    with open(ATLAS_INDEX, 'w') as f:
+        json.dump({'size': size, 'frames': frames}, f, separators=(',', ':'))
+    return index
+
+
+if __name__ == '__main__':
+    built = build()
+    print(f"Packed {built.count} frames into {built.size[0]}x{built.size[1]} atlas")
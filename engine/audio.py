@@ -0,0 +1,151 @@
+"""Sound effects on a fixed pool of mixer channels, plus the background music
+
+Effects requested during a frame are queued and dispatched together by
+update(): identical requests in the same frame collapse into one play,
+and a sound that just played is held back for its cooldown. When every
+pooled channel is busy, a new sound takes over the channel with the
+lowest priority sound, or is dropped if nothing playing ranks below it.
+All calls do nothing when the mixer is not available.
+"""
+
+import pygame
+
+from engine.assets import MUSIC_DIR, MUSIC_EXTENSIONS, find_file
+
+DEFAULT_CHANNELS = 8
+
+# name: (priority, cooldown in seconds, max channels at once)
+SOUND_RULES = {
+    'hit': (2, 0.25, 1),
+    'jump': (1, 0.08, 1),
+    'collect': (0, 0.05, 2),
+}
+DEFAULT_RULE = (0, 0.05, 1)
+
+
+class AudioManager:
+    """Owns the effect channels and the music track"""
+
+    def __init__(self, sounds, channel_count=DEFAULT_CHANNELS):
+        # name -> pygame Sound; may still be filling in while assets load
+        self.sounds = sounds
+        self.channel_count = channel_count
+        self.enabled = True
+        self.channels = None
+        self.playing = []
+        self.pending = {}
+        self.cooldowns = {}
+        self.music_name = None
+        self.coalesced = 0
+        self.dropped = 0
+
+    @staticmethod
+    def available():
+        """True if pygame's mixer is initialized"""
+        return pygame.mixer.get_init() is not None
+
+    def _open_channels(self):
+        # Reserved channels are never picked by Sound.play() elsewhere
+        if pygame.mixer.get_num_channels() < self.channel_count:
+            pygame.mixer.set_num_channels(self.channel_count)
+        pygame.mixer.set_reserved(self.channel_count)
+        self.channels = [pygame.mixer.Channel(i) for i in range(self.channel_count)]
+        self.playing = [None] * self.channel_count
+
+    def play(self, name):
+        """Queue a sound effect for the next update()"""
+        if not self.enabled:
+            return
+        if name in self.pending:
+            self.coalesced += 1
+            self.pending[name] += 1
+        else:
+            self.pending[name] = 1
+
+    def update(self, dt):
+        """Dispatch queued effects; call once per frame"""
+        cooldowns = self.cooldowns
+        for name in list(cooldowns):
+            cooldowns[name] -= dt
+            if cooldowns[name] <= 0:
+                del cooldowns[name]
+
+        if not self.pending:
+            return
+        pending = sorted(self.pending, key=lambda n: SOUND_RULES.get(n, DEFAULT_RULE)[0], reverse=True)
+        self.pending.clear()
+        if not self.available():
+            return
+        if self.channels is None:
+            self._open_channels()
+        for name in pending:
+            if name in cooldowns:
+                self.dropped += 1
+                continue
+            sound = self.sounds.get(name)
+            # Channel.play() corrupts the mixer on empty sounds, which is
+            # what a file the mixer failed to decode ends up as
+            if sound is None or not sound.get_length():
+                continue
+            if self._start(name, sound):
+                cooldowns[name] = SOUND_RULES.get(name, DEFAULT_RULE)[1]
+
+    def _start(self, name, sound):
+        priority, _cooldown, max_voices = SOUND_RULES.get(name, DEFAULT_RULE)
+        free = None
+        victim = None
+        voices = 0
+        for i, channel in enumerate(self.channels):
+            current = self.playing[i] if channel.get_busy() else None
+            if current is None:
+                if free is None:
+                    free = i
+                continue
+            if current == name:
+                voices += 1
+            current_priority = SOUND_RULES.get(current, DEFAULT_RULE)[0]
+            if current_priority < priority and (
+                    victim is None or current_priority < SOUND_RULES.get(self.playing[victim], DEFAULT_RULE)[0]):
+                victim = i
+
+        if voices >= max_voices:
+            self.dropped += 1
+            return False
+        slot = free if free is not None else victim
+        if slot is None:
+            self.dropped += 1
+            return False
+        self.channels[slot].play(sound)
+        self.playing[slot] = name
+        return True
+
+    def play_music(self, name):
+        """Loop a track from the music folder; replaces the current one"""
+        if not self.available():
+            self.music_name = name
+            return
+        if name == self.music_name and pygame.mixer.music.get_busy():
+            return
+        self.music_name = name
+        if not self.enabled:
+            return
+        try:
+            pygame.mixer.music.load(find_file(MUSIC_DIR, name, MUSIC_EXTENSIONS))
+            pygame.mixer.music.play(-1)
+        except (pygame.error, OSError):
+            pass
+
+    def set_enabled(self, enabled):
+        """Mute or unmute everything; the music picks up again when unmuted"""
+        self.enabled = enabled
+        if not self.available():
+            return
+        if enabled:
+            if self.music_name is not None and not pygame.mixer.music.get_busy():
+                self.play_music(self.music_name)
+        else:
+            self.pending.clear()
+            pygame.mixer.music.stop()
+            if self.channels is not None:
+                for channel in self.channels:
+                    channel.stop()
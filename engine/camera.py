@@ -0,0 +1,37 @@
+"""Camera that follows the player through levels larger than the screen"""
+
+from pygame import Rect
+
+
+class Camera:
+    """A view rectangle in world coordinates, clamped to the level bounds"""
+
+    def __init__(self, view_width, view_height, world_width, world_height):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.x = 0
+        self.y = 0
+        self.view = Rect(0, 0, view_width, view_height)
+
+    @property
+    def scrolls(self):
+        """True if the level is bigger than the view in either direction"""
+        return self.world_width > self.view_width or self.world_height > self.view_height
+
+    def follow(self, target_x, target_y):
+        """Center the view on a world point, without showing past the level edges"""
+        x = target_x - self.view_width / 2
+        y = target_y - self.view_height / 2
+        self.x = int(max(0, min(x, self.world_width - self.view_width)))
+        self.y = int(max(0, min(y, self.world_height - self.view_height)))
+        self.view.topleft = (self.x, self.y)
+
+    def to_screen(self, x, y):
+        """Convert a world point to screen coordinates"""
+        return (x - self.x, y - self.y)
+
+    def culling_rect(self, margin):
+        """The view grown by margin on every side, for visibility tests"""
+        return self.view.inflate(2 * margin, 2 * margin)
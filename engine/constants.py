@@ -0,0 +1,35 @@
+"""Game constants shared by the simulation and the Pygame Zero front end"""
+
+# Screen
+WIDTH = 800
+HEIGHT = 480
+
+# Physics
+GRAVITY = 0.5
+JUMP_STRENGTH = -12
+PLAYER_SPEED = 4
+GROUND_HEIGHT = 80
+
+# Simulation timing. The physics values above are per tick and were tuned
+# for 60 ticks per second, so TICK_RATE also sets the game speed.
+TICK_RATE = 60
+MAX_TICKS_PER_FRAME = 5
+
+# Step viruses and fruits with the NumPy array backend (engine/swarm.py)
+# when NumPy is installed. Worth it for levels with thousands of entities.
+USE_NUMPY = False
+
+# Hurt the player and collect fruits only where sprite pixels overlap,
+# not just their rects (engine/collision.py masks_overlap)
+PIXEL_COLLISION = False
+
+# Entities farther than this from the screen are off-screen: they are not
+# drawn and only get a cheap update every FAR_UPDATE_INTERVAL ticks
+CULL_MARGIN = 64
+FAR_UPDATE_INTERVAL = 8
+
+# Game States
+STATE_MENU = "menu"
+STATE_PLAYING = "playing"
+STATE_GAME_OVER = "game_over"
+STATE_VICTORY = "victory"
@@ -0,0 +1,341 @@
+"""Headless game entities: they track atlas frames and positions but never draw"""
+
+import math
+import random
+
+from pygame import Rect
+
+from engine.constants import JUMP_STRENGTH, PLAYER_SPEED
+from engine.animation import Animator, clip
+from engine.atlas import atlas_index
+from engine.collision import fall_and_move
+from engine.navigation import FLOOR, link_velocity
+
+
+class Player:
+    """Player character - micro robot with sprite animation"""
+
+    __slots__ = ('x', 'y', 'width', 'height', 'vel_x', 'vel_y', 'on_ground',
+                 'hp', 'max_hp', 'hit_timer', 'state', 'facing_right',
+                 'anim', 'rect', 'prev_pos', 'platform')
+
+    # Animation clip played in each state
+    STATE_CLIPS = {
+        "idle": 'player_idle',
+        "walk": 'player_run',
+        "jump": 'player_jump',
+        "fall": 'player_fall',
+        "hit": 'player_hit',
+    }
+
+    def __init__(self, x, y):
+        self.anim = Animator(clip('player_idle'))
+        self.x = x
+        self.y = y
+        self.width, self.height = atlas_index().frame_size(self.anim.frame)
+        self.vel_x = 0
+        self.vel_y = 0
+        self.on_ground = False
+        # Platform stood on, or None in the air and on the floor
+        self.platform = None
+        self.hp = 3
+        self.max_hp = 3
+        self.hit_timer = 0
+        self.state = "idle"
+        self.facing_right = True
+        self.rect = Rect(self.x, self.y, self.width, self.height)
+        self.prev_pos = self.pos
+
+    @property
+    def frame(self):
+        """Atlas frame id to draw"""
+        return self.anim.frame
+
+    @property
+    def pos(self):
+        """Sprite center in world coordinates"""
+        return (self.x + self.width // 2, self.y + self.height // 2)
+
+    def update(self, platforms, world_width, ground_y):
+        """Update player physics and animation
+
+        platforms is a SpatialHash of Platform objects; the player is kept
+        between x = 0 and world_width and stands on the floor at ground_y.
+        """
+        self.move_and_collide(platforms, world_width, ground_y)
+
+        # Update hit timer
+        if self.hit_timer > 0:
+            self.hit_timer -= 1
+
+        # Update state based on velocity
+        if self.state != "hit":
+            if not self.on_ground:
+                if self.vel_y < -1:
+                    self.state = "jump"
+                elif self.vel_y > 1:
+                    self.state = "fall"
+            else:
+                if abs(self.vel_x) > 0.1:
+                    self.state = "walk"
+                else:
+                    self.state = "idle"
+
+        # Update animation
+        anim = self.anim
+        anim.play(clip(self.STATE_CLIPS[self.state]))
+        anim.set_mirrored(not self.facing_right)
+        anim.advance()
+        if self.state == "hit" and anim.finished:
+            self.state = "idle"
+            anim.play(clip('player_idle'))
+
+    def move_and_collide(self, platforms, world_width, ground_y):
+        """Fall and move by the velocity, stopping flush against solid
+        platforms and the ground (see fall_and_move)"""
+        box = (self.x, self.y, self.width, self.height)
+        self.x, self.y, self.vel_y, self.platform, on_floor = fall_and_move(
+            box, self.vel_x, self.vel_y, platforms, world_width, ground_y)
+        self.on_ground = on_floor or self.platform is not None
+
+    def move_left(self):
+        """Move player left"""
+        self.vel_x = -PLAYER_SPEED
+        self.facing_right = False
+
+    def move_right(self):
+        """Move player right"""
+        self.vel_x = PLAYER_SPEED
+        self.facing_right = True
+
+    def stop(self):
+        """Stop horizontal movement"""
+        self.vel_x = 0
+
+    def jump(self):
+        """Make player jump; returns True if the jump started"""
+        if self.on_ground:
+            self.vel_y = JUMP_STRENGTH
+            self.on_ground = False
+            self.state = "jump"
+            self.anim.play(clip('player_jump'), restart=True)
+            return True
+        return False
+
+    def take_damage(self):
+        """Player takes damage; returns True if the hit landed"""
+        if self.hit_timer == 0:
+            self.hp -= 1
+            self.hit_timer = 60
+            self.state = "hit"
+            self.anim.play(clip('player_hit'), restart=True)
+            return True
+        return False
+
+    def get_rect(self):
+        """Get player collision rectangle (reused between calls)"""
+        self.rect.update(self.x, self.y, self.width, self.height)
+        return self.rect
+
+
+class Virus:
+    """Enemy virus with animated movement"""
+
+    __slots__ = ('x', 'y', 'width', 'height', 'left_bound', 'right_bound',
+                 'speed', 'direction', 'anim', 'hit_timer', 'hit', 'rect',
+                 'prev_pos', 'chase', 'vel_y', 'node', 'link', 'link_ticks')
+
+    def __init__(self, x, y, left_bound, right_bound, chase=False):
+        self.x = x
+        self.y = y
+        self.anim = Animator(clip('virus_idle'))
+        self.width, self.height = atlas_index().frame_size(self.anim.frame)
+        self.left_bound = left_bound
+        self.right_bound = right_bound
+        self.speed = 1.5
+        self.direction = 1
+        self.hit_timer = 0
+        self.hit = False
+        self.rect = Rect(self.x, self.y, self.width, self.height)
+        self.prev_pos = self.pos
+        # Chasers follow the navigation graph instead of patrolling
+        self.chase = chase
+        self.vel_y = 0
+        self.node = None
+        self.link = None
+        self.link_ticks = 0
+
+    @property
+    def frame(self):
+        """Atlas frame id to draw"""
+        return self.anim.frame
+
+    @property
+    def pos(self):
+        """Sprite center in world coordinates"""
+        return (self.x + self.width // 2, self.y + self.height // 2)
+
+    def update(self):
+        """Atualiza o movimento e animação do vírus"""
+        self.x += self.speed * self.direction
+
+        if self.x <= self.left_bound or self.x >= self.right_bound:
+            self.direction *= -1
+
+        self.animate()
+
+    def animate(self):
+        """Advance the spin and hit animations"""
+        # Inverte o sprite baseado na direção
+        self.anim.set_mirrored(self.direction < 0)
+
+        # Mostra a animação de hit por 10 frames, depois volta ao idle
+        if self.anim.advance() and self.hit:
+            self.hit_timer += 1
+            if self.hit_timer > 10:
+                self.hit = False
+                self.hit_timer = 0
+                self.anim.play(clip('virus_idle'))
+
+    def update_chase(self, platforms, routes, target_x, world_width, floor_y):
+        """Move one tick toward target_x along routes from NavGraph.routes_to()
+
+        Walks to the takeoff point of the next link, then jumps or walks off
+        the edge and steers toward the landing point at PLAYER_SPEED. With
+        no link to follow (already on the player's node, or no way there)
+        it walks toward target_x. Falls and lands like the player.
+        """
+        center = self.x + self.width / 2
+        standing = self.node is not None
+        vel_x = 0
+        if self.link is None and standing:
+            link = routes.get(self.node)
+            goal = target_x if link is None else link.takeoff
+            if link is not None and abs(goal - center) <= self.speed:
+                # At the takeoff point: commit to the link
+                self.x += goal - center
+                self.link = link
+                self.link_ticks = 0
+                if link.jump:
+                    self.vel_y = JUMP_STRENGTH
+            elif abs(goal - center) > self.speed:
+                vel_x = self.speed if goal > center else -self.speed
+        if self.link is not None:
+            vel_x = link_velocity(self.link, self.link_ticks, self.x, self.y, self.width, self.height,
+                                  self.node is self.link.source, self.speed)
+            self.link_ticks += 1
+        if vel_x:
+            self.direction = 1 if vel_x > 0 else -1
+
+        box = (self.x, self.y, self.width, self.height)
+        self.x, self.y, self.vel_y, node, on_floor = fall_and_move(
+            box, vel_x, self.vel_y, platforms, world_width, floor_y)
+        if on_floor:
+            node = FLOOR
+
+        # A link ends on landing anywhere but the ledge it started from
+        if node is not None and self.link is not None and (not standing or node is not self.link.source):
+            self.link = None
+        self.node = node
+        self.animate()
+
+    def update_far(self, ticks):
+        """Cheap catch-up for an off-screen virus: patrol only, no animation"""
+        self.x += self.speed * self.direction * ticks
+        if self.x <= self.left_bound:
+            self.x = self.left_bound
+            self.direction = 1
+        elif self.x >= self.right_bound:
+            self.x = self.right_bound
+            self.direction = -1
+
+    def take_hit(self):
+        """Show the hit animation"""
+        self.hit = True
+        self.hit_timer = 0
+        self.anim.play(clip('virus_hit'))
+
+    def get_rect(self):
+        """Get virus collision rectangle (reused between calls)"""
+        self.rect.update(self.x, self.y, self.width, self.height)
+        return self.rect
+
+
+class Fruit:
+    """Collectible fruit with floating and rotating animation"""
+
+    __slots__ = ('x', 'y', 'width', 'height', 'fruit_type', 'fruit_id',
+                 'collected', 'anim', 'float_offset', 'float_phase', 'rect',
+                 'prev_pos')
+
+    float_speed = 0.1
+    float_distance = 3
+
+    def __init__(self, x, y, fruit_type='banana', fruit_id=None, rng=random):
+        self.x = x
+        self.y = y
+        self.fruit_type = fruit_type
+        self.fruit_id = fruit_id
+        self.collected = False
+
+        self.anim = Animator(clip('fruit_spin'))
+        self.width, self.height = atlas_index().frame_size(self.anim.frame)
+
+        self.float_offset = 0
+        self.float_phase = rng.uniform(0, 6.28)
+        self.rect = Rect(0, 0, 0, 0)
+        self.prev_pos = self.pos
+
+    @property
+    def frame(self):
+        """Atlas frame id to draw"""
+        return self.anim.frame
+
+    @property
+    def pos(self):
+        """Sprite center in world coordinates"""
+        return (self.x + self.width // 2, self.y + self.float_offset)
+
+    def update(self):
+        """Update fruit animation"""
+        if self.collected:
+            return
+
+        self.float_phase += self.float_speed
+        self.float_offset = math.sin(self.float_phase) * self.float_distance
+        self.anim.advance()
+
+    def update_far(self, ticks):
+        """Cheap catch-up for an off-screen fruit: keep the bob phase moving"""
+        self.float_phase += self.float_speed * ticks
+
+    def get_rect(self):
+        """Get fruit collision rectangle (reused between calls)"""
+        hitbox_padding = 4
+        self.rect.update(
+            self.x + hitbox_padding,
+            self.y + hitbox_padding + self.float_offset,
+            self.width - 2 * hitbox_padding,
+            self.height - 2 * hitbox_padding
+        )
+        return self.rect
+
+
+class Platform:
+    """Platform for player to stand on"""
+
+    __slots__ = ('x', 'y', 'width', 'height', 'color', 'rect', 'frame')
+
+    def __init__(self, x, y, width, height, color="brown"):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.color = color
+        self.rect = Rect(x, y, width, height)
+        self.frame = atlas_index().id('plataforms/plataform_on')
+
+    @property
+    def pos(self):
+        """Sprite center in world coordinates"""
+        return (self.x + self.width // 2, self.y + self.height // 2)
@@ -0,0 +1,321 @@
+"""Gym-style environment around World, and a batch of them across processes
+
+NanoVirusEnv runs one headless level for bots: reset() starts it with a
+seed, step(action) advances one tick and returns (observation, reward,
+done, info). The reward is the fruits collected minus the hp lost during
+the tick, and an episode ends on victory, game over or after max_ticks.
+
+BatchEnv steps many environments at once. They are split across worker
+processes, and each worker writes its observations, rewards and done
+flags straight into shared memory, so a step only sends one short
+message per worker down a pipe. A finished environment is reset with
+its next seed right away, and its final result is reported in the infos
+of that step. Check throughput with:
+
+    python -m engine.env --envs 64 --workers 4 --steps 2000
+"""
+
+import heapq
+import multiprocessing
+import os
+import random
+import sys
+import time
+from array import array
+
+from engine.constants import WIDTH, HEIGHT, STATE_PLAYING, STATE_VICTORY
+from engine.level import LevelFile, level_path
+from engine.swarm import HAS_NUMPY
+from engine.world import World, InputState
+
+if HAS_NUMPY:
+    import numpy as np
+
+NOOP = 0
+LEFT = 1
+RIGHT = 2
+JUMP = 3
+ACTIONS = (
+    InputState(False, False, False),
+    InputState(True, False, False),
+    InputState(False, True, False),
+    InputState(False, False, True),
+)
+
+# Viruses and fruits in an observation, nearest first
+NEAREST = 4
+# Player: x, y, vel_x, vel_y, hp, on_ground; then (present, dx, dy) per entity
+PLAYER_FEATURES = 6
+OBS_SIZE = PLAYER_FEATURES + 3 * NEAREST * 2
+DEFAULT_MAX_TICKS = 60 * 60
+
+
+class NanoVirusEnv:
+    """One level, stepped one tick per action"""
+
+    def __init__(self, level=None, use_numpy=False, max_ticks=DEFAULT_MAX_TICKS):
+        # level is the path of a packed level; the stock level by default
+        self.level = LevelFile(level or level_path('level1'))
+        self.world = World(use_numpy=use_numpy)
+        self.max_ticks = max_ticks
+        self.observation = array('f', [0.0]) * OBS_SIZE
+
+    def reset(self, seed=0):
+        """Restart the level with a seed; returns the first observation"""
+        self.world.seed = seed
+        self.world.load_level(self.level)
+        return self.observe()
+
+    def step(self, action):
+        """Advance one tick with an action from ACTIONS by index"""
+        world = self.world
+        score, hp = world.score, world.player.hp
+        world.step(ACTIONS[action])
+        reward = (world.score - score) - (hp - world.player.hp)
+        done = world.state != STATE_PLAYING or world.tick >= self.max_ticks
+        return self.observe(), reward, done, self.info()
+
+    def info(self):
+        """Score, hp, tick and state of the current episode"""
+        world = self.world
+        return {'score': world.score, 'hp': world.player.hp,
+                'tick': world.tick, 'state': world.state}
+
+    def observe(self, out=None):
+        """Write the observation (OBS_SIZE floats) into out and return it
+
+        Positions are in screen sizes, relative to the player for viruses
+        and fruits; missing entities are all zeros.
+        """
+        if out is None:
+            out = self.observation
+        world = self.world
+        world.sync_entities()
+        player = world.player
+        px, py = player.pos
+        out[0] = player.x / world.width
+        out[1] = player.y / world.height
+        out[2] = player.vel_x
+        out[3] = player.vel_y
+        out[4] = player.hp
+        out[5] = player.on_ground
+
+        i = PLAYER_FEATURES
+        fruits = [fruit for fruit in world.fruits if not fruit.collected]
+        for entities in (world.viruses, fruits):
+            nearest = heapq.nsmallest(NEAREST, entities, key=lambda e: (e.pos[0] - px) ** 2 + (e.pos[1] - py) ** 2)
+            for entity in nearest:
+                ex, ey = entity.pos
+                out[i] = 1.0
+                out[i + 1] = (ex - px) / WIDTH
+                out[i + 2] = (ey - py) / HEIGHT
+                i += 3
+            for _ in range(NEAREST - len(nearest)):
+                out[i] = out[i + 1] = out[i + 2] = 0.0
+                i += 3
+        return out
+
+
+def _run_envs(envs, first, seeds, stride, buffers):
+    # Step envs[k], which is environment first + k of the batch; returns
+    # (index, info) for the ones that finished, after resetting them
+    actions, rewards, dones = buffers.actions, buffers.rewards, buffers.dones
+    observations = buffers.rows
+    finished = []
+    for k, env in enumerate(envs):
+        index = first + k
+        _obs, reward, done, info = env.step(actions[index])
+        rewards[index] = reward
+        dones[index] = done
+        if done:
+            finished.append((index, info))
+            seeds[k] += stride
+            env.reset(seeds[k])
+        env.observe(observations[index])
+    return finished
+
+
+def _reset_envs(envs, first, seeds, buffers):
+    for k, env in enumerate(envs):
+        env.reset(seeds[k])
+        env.observe(buffers.rows[first + k])
+
+
+class _Buffers:
+    """Shared arrays the environments read actions from and write results to
+
+    Built on multiprocessing.RawArray, so the workers inherit them without
+    copies or locks; each worker only touches its own environments' slots.
+    """
+
+    def __init__(self, num_envs, context):
+        self.num_envs = num_envs
+        self.observations = context.RawArray('f', num_envs * OBS_SIZE)
+        self.rewards = context.RawArray('d', num_envs)
+        self.dones = context.RawArray('B', num_envs)
+        self.actions = context.RawArray('B', num_envs)
+        self._rows = None
+
+    def __getstate__(self):
+        # Row views cannot be pickled; a worker makes its own
+        state = self.__dict__.copy()
+        state['_rows'] = None
+        return state
+
+    @property
+    def rows(self):
+        """One float memoryview per environment into the observations"""
+        if self._rows is None:
+            flat = memoryview(self.observations).cast('B').cast('f')
+            self._rows = [flat[i * OBS_SIZE:(i + 1) * OBS_SIZE] for i in range(self.num_envs)]
+        return self._rows
+
+
+def _worker(conn, buffers, first, count, seeds, level, use_numpy, max_ticks):
+    envs = [NanoVirusEnv(level, use_numpy, max_ticks) for _ in range(count)]
+    seeds = list(seeds)
+    try:
+        while True:
+            command = conn.recv()
+            if command == 'step':
+                conn.send(_run_envs(envs, first, seeds, buffers.num_envs, buffers))
+            elif command == 'reset':
+                _reset_envs(envs, first, seeds, buffers)
+                conn.send(None)
+            else:
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+
+
+class BatchEnv:
+    """num_envs NanoVirusEnvs stepped together on a pool of processes
+
+    Environment i starts with seed seed + i and moves on by num_envs seeds
+    per episode, so a batch run is reproducible. With workers=0 every
+    environment runs in this process. observations is a NumPy array of
+    shape (num_envs, OBS_SIZE) when NumPy is installed, otherwise a list
+    of one float memoryview per environment; both are views of the shared
+    arrays and change on every step().
+    """
+
+    def __init__(self, num_envs, workers=None, level=None, use_numpy=False,
+                 max_ticks=DEFAULT_MAX_TICKS, seed=0):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, num_envs)
+        self.num_envs = num_envs
+        context = multiprocessing.get_context()
+        self._buffers = _Buffers(num_envs, context)
+        self._local = None
+        self._workers = []
+
+        seeds = [seed + i for i in range(num_envs)]
+        if workers == 0:
+            envs = [NanoVirusEnv(level, use_numpy, max_ticks) for _ in range(num_envs)]
+            self._local = (envs, seeds)
+        else:
+            # Contiguous slices, so each worker writes its own part of the buffers
+            for w in range(workers):
+                first = num_envs * w // workers
+                count = num_envs * (w + 1) // workers - first
+                parent, child = context.Pipe()
+                process = context.Process(
+                    target=_worker, name=f'nanovirus-env-{w}', daemon=True,
+                    args=(child, self._buffers, first, count,
+                          seeds[first:first + count], level, use_numpy, max_ticks))
+                process.start()
+                child.close()
+                self._workers.append((process, parent))
+
+        buffers = self._buffers
+        if HAS_NUMPY:
+            self.observations = np.frombuffer(buffers.observations, dtype=np.float32).reshape(num_envs, OBS_SIZE)
+            self.rewards = np.frombuffer(buffers.rewards, dtype=np.float64)
+            self.dones = np.frombuffer(buffers.dones, dtype=np.bool_)
+        else:
+            self.observations = buffers.rows
+            self.rewards = buffers.rewards
+            self.dones = buffers.dones
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def reset(self):
+        """Restart every environment; returns the observations"""
+        if self._local is not None:
+            envs, seeds = self._local
+            _reset_envs(envs, 0, seeds, self._buffers)
+        else:
+            for _process, conn in self._workers:
+                conn.send('reset')
+            for _process, conn in self._workers:
+                conn.recv()
+        return self.observations
+
+    def step(self, actions):
+        """Step every environment with one action index each
+
+        Returns (observations, rewards, dones, infos); infos maps the
+        index of each environment that finished to its final info.
+        """
+        memoryview(self._buffers.actions).cast('B')[:] = array('B', actions)
+        if self._local is not None:
+            envs, seeds = self._local
+            finished = _run_envs(envs, 0, seeds, self.num_envs, self._buffers)
+        else:
+            for _process, conn in self._workers:
+                conn.send('step')
+            finished = []
+            for _process, conn in self._workers:
+                finished += conn.recv()
+        return self.observations, self.rewards, self.dones, dict(finished)
+
+    def close(self):
+        """Stop the workers"""
+        for _process, conn in self._workers:
+            try:
+                conn.send('close')
+            except (BrokenPipeError, OSError):
+                pass
+        for process, conn in self._workers:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
+        self._workers = []
+
+
+def main(argv):
+    """Run random bots through the level and report steps per second"""
+    import argparse
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--envs', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=None, help="default: one per core")
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--level', default=None, help="packed level file")
+    parser.add_argument('--numpy', action='store_true', help="use the NumPy entity backend")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    episodes = 0
+    victories = 0
+    with BatchEnv(args.envs, args.workers, args.level, args.numpy) as batch:
+        batch.reset()
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            actions = [rng.randrange(len(ACTIONS)) for _ in range(args.envs)]
+            _obs, _rewards, _dones, infos = batch.step(actions)
+            episodes += len(infos)
+            victories += sum(info['state'] == STATE_VICTORY for info in infos.values())
+        elapsed = time.perf_counter() - start
+    total = args.envs * args.steps
+    print(f"{total} steps in {elapsed:.2f}s: {total / elapsed:.0f} steps/s, "
+          f"{episodes} episodes, {victories} victories")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,176 @@
+"""Level files: a designer-friendly JSON source and a chunked packed format
+
+Designers write levels/<name>.json:
+
+    {
+        "name": "Level 1",
+        "width": 800, "height": 480,
+        "spawn": [x, y],
+        "platforms": [[x, y, width, height, color], ...],
+        "viruses": [[x, y, left_bound, right_bound], ...],
+        "fruits": [[x, y], ...]
+    }
+
+A virus entry may end with true to make it chase the player across
+platforms (see engine.navigation) instead of patrolling its bounds.
+Pack the level with:
+
+    python -m engine.level levels/<name>.json
+
+The packed .level file starts with one JSON header line. The header holds
+the level metadata (including how many viruses chase) and, for every
+chunk, the byte offset and length of its record in the body. Each chunk
+record is one JSON line with the entities whose anchor point falls in
+that chunk_size square. A reader only parses the header up front and
+seeks to chunks on demand, so opening a level costs the same no matter
+how big it is.
+"""
+
+import io
+import json
+import os
+import sys
+
+LEVELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'levels')
+
+FORMAT_VERSION = 1
+DEFAULT_CHUNK_SIZE = 512
+
+
+def chunk_key(cx, cy):
+    """Header key of chunk (cx, cy)"""
+    return f"{cx},{cy}"
+
+
+def chunk_of(x, y, chunk_size):
+    """Chunk coordinates containing the point (x, y)"""
+    return (int(x // chunk_size), int(y // chunk_size))
+
+
+def pack_level(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Split a source level dict into (header, {(cx, cy): chunk record})"""
+    chunks = {}
+
+    def chunk_for(x, y):
+        key = chunk_of(x, y, chunk_size)
+        if key not in chunks:
+            chunks[key] = {"platforms": [], "viruses": [], "fruits": []}
+        return chunks[key]
+
+    for x, y, width, height, *color in source.get("platforms", []):
+        chunk_for(x + width / 2, y + height / 2)["platforms"].append([x, y, width, height, *color])
+    for x, y, left_bound, right_bound, *chase in source.get("viruses", []):
+        chunk_for((left_bound + right_bound) / 2, y)["viruses"].append([x, y, left_bound, right_bound, *chase])
+    # Fruits get a level-wide id so collected ones stay gone across reloads
+    for fruit_id, (x, y) in enumerate(source.get("fruits", [])):
+        chunk_for(x, y)["fruits"].append([fruit_id, x, y])
+
+    header = {
+        "format": FORMAT_VERSION,
+        "name": source.get("name", ""),
+        "width": source["width"],
+        "height": source["height"],
+        "spawn": source["spawn"],
+        "chunk_size": chunk_size,
+        "total_fruits": len(source.get("fruits", [])),
+        "chasers": sum(1 for virus in source.get("viruses", []) if virus[4:5] == [True]),
+    }
+    return header, chunks
+
+
+def write_level(path, source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Pack a source level dict into a .level file"""
+    header, chunks = pack_level(source, chunk_size)
+    body = []
+    index = {}
+    offset = 0
+    for (cx, cy) in sorted(chunks):
+        record = (json.dumps(chunks[(cx, cy)], separators=(',', ':')) + "\n").encode()
+        index[chunk_key(cx, cy)] = [offset, len(record)]
+        body.append(record)
+        offset += len(record)
+    header["chunks"] = index
+    with open(path, 'wb') as f:
+        f.write((json.dumps(header, separators=(',', ':')) + "\n").encode())
+        f.writelines(body)
+
+
+class LevelFile:
+    """Random access to the chunks of a packed .level file
+
+    Pass the file's bytes as data to serve chunks from memory instead of
+    reading path again.
+    """
+
+    def __init__(self, path, data=None):
+        self.path = path
+        self._data = data
+        if data is None:
+            with open(path, 'rb') as f:
+                header_line = f.readline()
+                self.body_offset = f.tell()
+        else:
+            header_line = data[:data.index(b"\n") + 1]
+            self.body_offset = len(header_line)
+        header = json.loads(header_line)
+        if header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported level format {header.get('format')!r}")
+        self.name = header["name"]
+        self.width = header["width"]
+        self.height = header["height"]
+        self.spawn = tuple(header["spawn"])
+        self.chunk_size = header["chunk_size"]
+        self.total_fruits = header["total_fruits"]
+        # None in files packed before the count was stored
+        self.chasers = header.get("chasers")
+        self.index = {}
+        for key, span in header["chunks"].items():
+            cx, cy = key.split(",")
+            self.index[(int(cx), int(cy))] = tuple(span)
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close the underlying file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def chunks_around(self, center, radius):
+        """Keys of the non-empty chunks within radius chunks of center"""
+        cx0, cy0 = center
+        index = self.index
+        return [(cx, cy)
+                for cx in range(cx0 - radius, cx0 + radius + 1)
+                for cy in range(cy0 - radius, cy0 + radius + 1)
+                if (cx, cy) in index]
+
+    def read_chunk(self, key):
+        """Parse one chunk record; returns None for empty chunks"""
+        span = self.index.get(key)
+        if span is None:
+            return None
+        if self._file is None:
+            self._file = open(self.path, 'rb') if self._data is None else io.BytesIO(self._data)
+        offset, length = span
+        self._file.seek(self.body_offset + offset)
+        return json.loads(self._file.read(length))
+
+
+def level_path(name):
+    """Path of a packed level in the levels folder"""
+    return os.path.join(LEVELS_DIR, name + '.level')
+
+
+if __name__ == '__main__':
+    for source_path in sys.argv[1:]:
+        with open(source_path) as f:
+            level_source = json.load(f)
+        target = os.path.splitext(source_path)[0] + '.level'
+        write_level(target, level_source)
+        print(f"Packed {source_path} -> {target}")
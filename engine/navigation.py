@@ -0,0 +1,282 @@
+"""Platform navigation graph for enemies that chase the player
+
+Nodes are the surfaces something can stand on: every platform plus the
+floor (FLOOR). A link from one node to another means a walker of the
+given size can get there under the game's physics (GRAVITY,
+JUMP_STRENGTH, moving PLAYER_SPEED in the air), either by walking off an
+edge or by jumping. Links are found once, when the graph is built: pairs
+within ballistic reach are confirmed by simulating the move against the
+platforms, steering with link_velocity() exactly like a chaser does.
+
+routes_to(goal) runs one Dijkstra search backwards from the goal and
+returns the next link to take from every node. The result is cached per
+goal, so any number of chasers share one search per platform the player
+stands on. The graph also answers reachability for level design:
+
+    python -m engine.navigation levels/level1.json
+"""
+
+import heapq
+import json
+import sys
+from collections import namedtuple
+
+from pygame import Rect
+
+from engine.collision import fall_and_move
+from engine.constants import GRAVITY, JUMP_STRENGTH, PLAYER_SPEED
+from engine.spatial import SpatialHash
+
+FLOOR = 'floor'
+# Longest move tried when checking a link
+MAX_LINK_TICKS = 240
+
+# source/target are nodes; takeoff and landing are the walker's center x.
+# A jump holds still for hold ticks before steering toward the landing.
+Link = namedtuple('Link', 'source target takeoff landing jump hold cost')
+# Hold times tried for each jump, shortest first
+JUMP_HOLDS = (0, 4, 8, 12, 16, 20, 24)
+
+
+def air_time(rise, launch_speed):
+    """Last tick at which a walker launched upward at launch_speed is still
+    at least rise pixels above its start, or None if it never gets there
+
+    Follows Player.update(): gravity is added before each move.
+    """
+    vel = launch_speed
+    height = 0.0
+    last = 0 if rise <= 0 else None
+    tick = 0
+    while True:
+        vel += GRAVITY
+        height -= vel
+        tick += 1
+        if height >= rise:
+            last = tick
+        elif vel > 0:
+            return last
+
+
+def link_velocity(link, ticks, x, y, width, height, on_source, walk_speed, air_speed=PLAYER_SPEED):
+    """Horizontal speed of a walker at (x, y), ticks after taking link
+
+    While still on the source of a walk-off link it keeps walking away
+    from the ledge. Otherwise, after the link's hold, it steers toward
+    the landing point, staying beside the target until it is above it so
+    a jump does not end against the target's underside.
+    """
+    if on_source and not link.jump:
+        return walk_speed if link.takeoff > link.source.rect.centerx else -walk_speed
+    if ticks < link.hold:
+        return 0
+    offset = link.landing - (x + width / 2)
+    vel_x = max(-air_speed, min(air_speed, offset))
+    target = link.target
+    if target is not FLOOR and y + height > target.rect.top:
+        if vel_x > 0:
+            vel_x = min(vel_x, max(0, target.rect.left - (x + width)))
+        else:
+            vel_x = max(vel_x, min(0, target.rect.right - x))
+    return vel_x
+
+
+class NavGraph:
+    """Nodes and jump/fall links between the platforms of a level
+
+    Walkers are width x height boxes standing with y = surface top -
+    height; on the floor y = floor_y, like Player and the chasers.
+    """
+
+    def __init__(self, platforms, world_width, floor_y, width, height, walk_speed, speed=PLAYER_SPEED):
+        self.world_width = world_width
+        self.floor_y = floor_y
+        self.width = width
+        self.height = height
+        self.walk_speed = walk_speed
+        self.speed = speed
+        self.nodes = [FLOOR] + list(platforms)
+        self.links = {node: [] for node in self.nodes}
+        self._air_times = {}
+        self._routes = {}
+        self._grid = SpatialHash()
+        for platform in platforms:
+            self._grid.insert(platform, platform.rect)
+        top = min([platform.rect.top for platform in platforms] + [floor_y])
+        for source in self.nodes:
+            # Only platforms within the farthest a jump from source can
+            # carry a walker sideways are worth trying
+            s0, s1 = self.center_range(source)
+            reach = (self._air_time(self.stand_y(source) - floor_y, JUMP_STRENGTH) or 0) * speed + width + 1
+            band = Rect(s0 - reach, top, s1 - s0 + 2 * reach, floor_y + height - top + 1)
+            for target in [FLOOR] + self._grid.query(band):
+                if target is not source:
+                    link = self._link(source, target)
+                    if link is not None:
+                        self.links[source].append(link)
+        # Where each link sits in its source's list, a stable id for it
+        self.link_ids = {link: i for links in self.links.values() for i, link in enumerate(links)}
+
+    def stand_y(self, node):
+        """Walker y when standing on node"""
+        if node is FLOOR:
+            return self.floor_y
+        return node.rect.top - self.height
+
+    def center_range(self, node):
+        """Walker center x values at which it stands fully on node"""
+        half = self.width / 2
+        if node is FLOOR:
+            return half, self.world_width - half
+        left, right = node.rect.left + half, node.rect.right - half
+        if left > right:
+            left = right = node.rect.centerx
+        return left, right
+
+    def _air_time(self, rise, launch_speed):
+        key = (int(rise), launch_speed)
+        ticks = self._air_times.get(key, -1)
+        if ticks == -1:
+            ticks = self._air_times[key] = air_time(key[0], launch_speed)
+        return ticks
+
+    def _link(self, source, target):
+        # Can a walker on source get onto target? Take off from the point of
+        # source closest to target, rule out gaps beyond ballistic reach,
+        # then simulate walking off or jumping with each hold time.
+        rise = self.stand_y(source) - self.stand_y(target)
+        s0, s1 = self.center_range(source)
+        t0, t1 = self.center_range(target)
+        half = self.width / 2
+
+        if rise > 0 and target is not FLOOR:
+            # Going up: take off beside the target, not under it
+            rect = target.rect
+            takeoffs = sorted((x for x in (min(s1, rect.left - half - 1), max(s0, rect.right + half + 1))
+                               if s0 <= x <= s1),
+                              key=lambda x: min(abs(x - t0), abs(x - t1)))
+        elif t1 > s1:
+            # Going down: step off the nearest edge of source toward target
+            takeoffs = [s1 + half]
+        elif t0 < s0:
+            takeoffs = [s0 - half]
+        else:
+            takeoffs = []
+
+        for takeoff in takeoffs:
+            landing = min(max(takeoff, t0), t1)
+            gap = abs(landing - takeoff)
+            tries = []
+            if rise <= 0:
+                ticks = self._air_time(rise, 0.0)
+                if ticks is not None and ticks * self.speed >= gap:
+                    tries.append((False, 0))
+            ticks = self._air_time(rise, JUMP_STRENGTH)
+            if ticks is not None and ticks * self.speed >= gap:
+                tries += [(True, hold) for hold in JUMP_HOLDS]
+            for jump, hold in tries:
+                link = Link(source, target, takeoff, landing, jump, hold, gap + abs(rise))
+                if self._follow(link):
+                    return link
+        return None
+
+    def _follow(self, link):
+        # Does a walker taking link land on its target? Stops as soon as it
+        # lands elsewhere or falls past the target's surface
+        width, height = self.width, self.height
+        x = link.takeoff - width / 2
+        y = self.stand_y(link.source)
+        target = link.target
+        lowest = self.stand_y(target)
+        vel_y = JUMP_STRENGTH if link.jump else 0
+        on_source = True
+        for ticks in range(MAX_LINK_TICKS):
+            vel_x = link_velocity(link, ticks, x, y, width, height, on_source, self.walk_speed, self.speed)
+            x, y, vel_y, node, on_floor = fall_and_move(
+                (x, y, width, height), vel_x, vel_y, self._grid, self.world_width, self.floor_y)
+            if on_floor:
+                node = FLOOR
+            if node is not None and not (node is link.source and on_source and not link.jump):
+                return node is target
+            if vel_y > 0 and y > lowest:
+                return False
+            on_source = node is link.source
+        return False
+
+    def node_below(self, x, y):
+        """Node a walker at (x, y) would fall onto"""
+        center = x + self.width / 2
+        best = FLOOR
+        for node in self.nodes[1:]:
+            rect = node.rect
+            if (rect.left < center < rect.right and rect.top >= y + self.height and
+                    (best is FLOOR or rect.top < best.rect.top)):
+                best = node
+        return best
+
+    def routes_to(self, goal):
+        """{node: first Link of the cheapest path to goal}, cached per goal"""
+        routes = self._routes.get(goal)
+        if routes is not None:
+            return routes
+
+        incoming = {node: [] for node in self.nodes}
+        for links in self.links.values():
+            for link in links:
+                incoming[link.target].append(link)
+
+        routes = {}
+        costs = {goal: 0}
+        order = {node: i for i, node in enumerate(self.nodes)}
+        queue = [(0, order[goal], goal)]
+        while queue:
+            cost, _order, node = heapq.heappop(queue)
+            if cost > costs[node]:
+                continue
+            for link in incoming[node]:
+                new_cost = cost + link.cost
+                if new_cost < costs.get(link.source, float('inf')):
+                    costs[link.source] = new_cost
+                    routes[link.source] = link
+                    heapq.heappush(queue, (new_cost, order[link.source], link.source))
+        self._routes[goal] = routes
+        return routes
+
+    def reachable_from(self, start):
+        """Set of nodes a walker on start can get to"""
+        seen = {start}
+        stack = [start]
+        while stack:
+            for link in self.links[stack.pop()]:
+                if link.target not in seen:
+                    seen.add(link.target)
+                    stack.append(link.target)
+        return seen
+
+
+def check_level(source):
+    """Print the platforms the player cannot reach from the spawn point"""
+    from engine.constants import GROUND_HEIGHT
+    from engine.entities import Platform, Player
+
+    platforms = [Platform(*values) for values in source.get("platforms", [])]
+    player = Player(*source["spawn"])
+    graph = NavGraph(platforms, source["width"], source["height"] - GROUND_HEIGHT,
+                     player.width, player.height, PLAYER_SPEED)
+    start = graph.node_below(player.x, player.y)
+    reachable = graph.reachable_from(start)
+    links = sum(len(links) for links in graph.links.values())
+    print(f"{len(platforms)} platforms, {links} links")
+    for i, platform in enumerate(platforms):
+        if platform not in reachable:
+            print(f"  platform {i} at {tuple(platform.rect)} is unreachable from the spawn point")
+    return len(graph.nodes) - len(reachable)
+
+
+if __name__ == '__main__':
+    unreachable = 0
+    for source_path in sys.argv[1:]:
+        with open(source_path) as f:
+            print(source_path)
+            unreachable += check_level(json.load(f))
+    sys.exit(1 if unreachable else 0)
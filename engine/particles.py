@@ -0,0 +1,124 @@
+"""Fixed-budget particle effects stored in preallocated arrays
+
+Every particle is one slot in a set of parallel array('d') columns; live
+particles are packed at the front and a dead one is replaced by the last
+live one, so emitting, stepping and killing particles never allocates
+objects. Once max_particles are alive, new ones are simply not emitted,
+which bounds both the step and the draw cost.
+
+Drawing queues pre-rendered dots, one per effect kind and fade level, on
+the frame's RenderList, which blits them with everything else.
+"""
+
+import math
+import random
+from array import array
+
+import pygame
+
+MAX_PARTICLES = 512
+FADE_LEVELS = 4
+
+# kind: (color, dot size, gravity per tick, velocity kept per tick)
+BURST = 0
+SPARK = 1
+DUST = 2
+KINDS = (
+    ((255, 230, 90), 4, 0.05, 0.94),
+    ((255, 90, 60), 3, 0.25, 0.97),
+    ((200, 190, 170), 5, -0.02, 0.90),
+)
+
+
+def _dot_surfaces(color, size):
+    surfaces = []
+    for level in range(FADE_LEVELS):
+        alpha = 255 * (level + 1) // FADE_LEVELS
+        dot = pygame.Surface((size, size), pygame.SRCALPHA)
+        dot.fill((*color, alpha))
+        surfaces.append(dot)
+    return surfaces
+
+
+class ParticlePool:
+    """All live particles of every kind, stepped and drawn as one batch"""
+
+    def __init__(self, max_particles=MAX_PARTICLES, seed=None):
+        self.max_particles = max_particles
+        self.count = 0
+        self.dropped = 0
+        self.x = array('d', [0.0]) * max_particles
+        self.y = array('d', [0.0]) * max_particles
+        self.vx = array('d', [0.0]) * max_particles
+        self.vy = array('d', [0.0]) * max_particles
+        self.life = array('H', [0]) * max_particles
+        self.max_life = array('H', [1]) * max_particles
+        self.kind = array('B', [0]) * max_particles
+        # Visual only, so it does not share the world's RNG
+        self.rng = random.Random(seed)
+        self._dots = None
+        self._scaled_dots = None
+        self._dot_scale = None
+
+    def __len__(self):
+        return self.count
+
+    def emit(self, kind, x, y, count, speed, life, spread=math.tau, angle=-math.pi / 2):
+        """Spawn up to count particles around angle, within the budget"""
+        free = self.max_particles - self.count
+        if count > free:
+            self.dropped += count - free
+            count = free
+        uniform = self.rng.uniform
+        for i in range(self.count, self.count + count):
+            direction = angle + uniform(-spread / 2, spread / 2)
+            velocity = speed * uniform(0.4, 1.0)
+            self.x[i] = x
+            self.y[i] = y
+            self.vx[i] = math.cos(direction) * velocity
+            self.vy[i] = math.sin(direction) * velocity
+            self.life[i] = self.max_life[i] = max(1, int(life * uniform(0.6, 1.0)))
+            self.kind[i] = kind
+        self.count += count
+
+    def step(self):
+        """Advance every particle one tick and drop the expired ones"""
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        life, max_life, kind = self.life, self.max_life, self.kind
+        i = 0
+        count = self.count
+        while i < count:
+            remaining = life[i] - 1
+            if remaining <= 0:
+                count -= 1
+                x[i], y[i], vx[i], vy[i] = x[count], y[count], vx[count], vy[count]
+                life[i], max_life[i], kind[i] = life[count], max_life[count], kind[count]
+                continue
+            life[i] = remaining
+            _color, _size, gravity, drag = KINDS[kind[i]]
+            vx[i] *= drag
+            vy[i] = vy[i] * drag + gravity
+            x[i] += vx[i]
+            y[i] += vy[i]
+            i += 1
+        self.count = count
+
+    def clear(self):
+        """Remove every particle"""
+        self.count = 0
+
+    def render(self, render_list, offset_x=0, offset_y=0, z=0, scale=1):
+        """Queue every live particle on a RenderList, with positions and dot
+        sizes multiplied by scale"""
+        if self._dots is None:
+            self._dots = [_dot_surfaces(color, size) for color, size, _g, _d in KINDS]
+        if self._scaled_dots is None or self._dot_scale != scale:
+            self._dot_scale = scale
+            self._scaled_dots = [[pygame.transform.scale(dot, (max(1, round(dot.get_width() * scale)),) * 2)
+                                  for dot in dots] for dots in self._dots]
+        dots = self._scaled_dots
+        add = render_list.add
+        x, y, life, max_life, kind = self.x, self.y, self.life, self.max_life, self.kind
+        for i in range(self.count):
+            add(dots[kind[i]][(life[i] * FADE_LEVELS - 1) // max_life[i]],
+                ((x[i] - offset_x) * scale, (y[i] - offset_y) * scale), z)
@@ -0,0 +1,184 @@
+"""In-game frame profiler: timing scopes in a ring buffer, exported as traces
+
+Functions are registered with instrument() but stay untouched until the
+profiler is enabled; enable() swaps in timing wrappers and disable() puts
+the originals back, so a disabled profiler costs nothing on hot paths.
+Code that cannot be wrapped (pgzero's update() is looked up once when the
+game starts) times itself with begin() / end(), which return right away
+when profiling is off.
+
+Every call is stored as (scope, start, duration) in a fixed-size ring
+buffer, with frame times in a second, smaller one. The buffer can be
+written as a Chrome trace (load it in chrome://tracing or Perfetto) or
+as CSV.
+"""
+
+import csv
+import json
+import time
+from array import array
+from collections import deque
+
+DEFAULT_CAPACITY = 16384
+DEFAULT_FRAME_CAPACITY = 240
+FRAME_SCOPE = "frame"
+
+
+class Profiler:
+    """Records timing scopes while enabled"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, frame_capacity=DEFAULT_FRAME_CAPACITY):
+        self.enabled = False
+        self.capacity = capacity
+        self.scope_names = []
+        self._scope_ids = {}
+        self._scopes = array('H', [0]) * capacity
+        self._starts = array('d', [0.0]) * capacity
+        self._durations = array('d', [0.0]) * capacity
+        self._next = 0
+        self._count = 0
+        self.frame_times = deque(maxlen=frame_capacity)
+        self._frame_start = None
+        # (owner, attribute, scope id, original)
+        self._targets = []
+
+    def scope_id(self, name):
+        """Get the numeric id of a scope name, registering it on first use"""
+        scope = self._scope_ids.get(name)
+        if scope is None:
+            scope = self._scope_ids[name] = len(self.scope_names)
+            self.scope_names.append(name)
+        return scope
+
+    def instrument(self, owner, attr, scope=None):
+        """Time calls to owner.attr while enabled
+
+        owner is a class, a module or a namespace dict such as globals().
+        """
+        original = owner[attr] if isinstance(owner, dict) else getattr(owner, attr)
+        self._targets.append((owner, attr, self.scope_id(scope or attr), original))
+        if self.enabled:
+            self._set(owner, attr, self._wrap(original, self._targets[-1][2]))
+
+    @staticmethod
+    def _set(owner, attr, value):
+        if isinstance(owner, dict):
+            owner[attr] = value
+        else:
+            setattr(owner, attr, value)
+
+    def _wrap(self, func, scope):
+        record = self.record
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(scope, start, clock())
+        return timed
+
+    def enable(self):
+        """Start recording and install the timing wrappers"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self._frame_start = None
+        for owner, attr, scope, original in self._targets:
+            self._set(owner, attr, self._wrap(original, scope))
+
+    def disable(self):
+        """Stop recording and restore the original functions"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        for owner, attr, _scope, original in self._targets:
+            self._set(owner, attr, original)
+
+    def toggle(self):
+        """Enable if disabled and vice versa; returns the new state"""
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    def begin(self):
+        """Start a manual scope; returns a token for end(), None when disabled"""
+        if self.enabled:
+            return time.perf_counter()
+        return None
+
+    def end(self, name, start):
+        """Finish a manual scope started with begin()"""
+        if start is not None:
+            self.record(self.scope_id(name), start, time.perf_counter())
+
+    def start_frame(self):
+        """Mark the start of a frame; the previous frame becomes a sample"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self.frame_times.append(now - self._frame_start)
+            self.record(self.scope_id(FRAME_SCOPE), self._frame_start, now)
+        self._frame_start = now
+
+    def record(self, scope, start, end):
+        """Store one sample, overwriting the oldest once the buffer is full"""
+        i = self._next
+        self._scopes[i] = scope
+        self._starts[i] = start
+        self._durations[i] = end - start
+        self._next = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def clear(self):
+        """Forget every sample"""
+        self._next = 0
+        self._count = 0
+        self.frame_times.clear()
+
+    def samples(self):
+        """Buffered samples as (scope name, start, duration), in the order they ended"""
+        first = (self._next - self._count) % self.capacity
+        names = self.scope_names
+        result = []
+        for k in range(self._count):
+            i = (first + k) % self.capacity
+            result.append((names[self._scopes[i]], self._starts[i], self._durations[i]))
+        return result
+
+    def scope_averages(self):
+        """Per scope (name, average ms per call, calls per frame), slowest first"""
+        totals = {}
+        for name, _start, duration in self.samples():
+            total, calls = totals.get(name, (0.0, 0))
+            totals[name] = (total + duration, calls + 1)
+        frames = max(1, totals.get(FRAME_SCOPE, (0.0, 0))[1])
+        rows = [(name, total / calls * 1000, calls / frames)
+                for name, (total, calls) in totals.items() if name != FRAME_SCOPE]
+        rows.sort(key=lambda row: row[1] * row[2], reverse=True)
+        return rows
+
+    def write_chrome_trace(self, path):
+        """Write the buffer in Chrome's trace event format"""
+        samples = self.samples()
+        origin = min((start for _name, start, _duration in samples), default=0.0)
+        events = [{"name": name, "ph": "X", "pid": 1, "tid": 1,
+                   "ts": round((start - origin) * 1e6, 3), "dur": round(duration * 1e6, 3)}
+                  for name, start, duration in samples]
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def write_csv(self, path):
+        """Write the buffer as CSV rows of scope, start_ms, duration_ms"""
+        samples = self.samples()
+        origin = min((start for _name, start, _duration in samples), default=0.0)
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["scope", "start_ms", "duration_ms"])
+            for name, start, duration in samples:
+                writer.writerow([name, f"{(start - origin) * 1000:.4f}", f"{duration * 1000:.4f}"])
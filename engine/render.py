@@ -0,0 +1,97 @@
+"""Z-ordered render list with dirty-rectangle redraw and presentation
+
+Each frame the game add()s what it wants on screen (surface, position,
+z) and calls draw() once. Items are sorted by z and blitted with a single
+Surface.blits() call. The list remembers the previous frame's items, so
+when the background has not changed it only touches the rectangles
+where something appeared, moved, changed or disappeared: those are
+restored from the background and the items overlapping them are
+re-blitted, clipped to them. present() then pushes just those rectangles
+to the window with pygame.display.update() instead of a full flip.
+"""
+
+from collections import Counter
+from operator import itemgetter
+
+import pygame
+from pygame import Rect
+
+_flip = pygame.display.flip
+_z_order = itemgetter(0, 1)
+
+
+def merge_rects(rects):
+    """Union overlapping rects until none overlap"""
+    merged = []
+    for rect in rects:
+        rect = Rect(rect)
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class RenderList:
+    """Draw commands for one frame, drawn in z order"""
+
+    def __init__(self, size):
+        self.screen_rect = Rect((0, 0), size)
+        self.items = []
+        self.previous = Counter()
+        self.full = True
+        # Rects changed by the last draw(), or None if the whole screen was
+        self.dirty = None
+
+    def add(self, surface, pos, z=0, key=None):
+        """Queue surface with its top-left at pos; key tells apart different
+        contents of a surface that is redrawn in place, like the HUD.
+        Items with equal z are drawn in the order added, but a change of
+        that order alone does not mark them dirty."""
+        items = self.items
+        items.append((z, len(items), surface, Rect(pos, surface.get_size()), key))
+
+    def invalidate(self):
+        """Make this frame present, and the next one redraw, the whole screen"""
+        self.full = True
+        self.dirty = None
+
+    def draw(self, target, background=None):
+        """Blit the queued items onto target and clear the list
+
+        Without a background the caller has already redrawn the whole
+        target, so every item is blitted. With one, only the changed
+        rects are restored from it and redrawn.
+        """
+        items = self.items
+        items.sort(key=_z_order)
+        # Counted, since the same sprite twice in one place blends twice
+        current = Counter((surface, tuple(rect), key) for _z, _order, surface, rect, key in items)
+
+        if background is None or self.full:
+            target.blits([(surface, rect) for _z, _order, surface, rect, _key in items], doreturn=False)
+            self.dirty = None
+        else:
+            screen_rect = self.screen_rect
+            moved = (self.previous - current) + (current - self.previous)
+            changed = [screen_rect.clip(rect) for _surface, rect, _key in moved]
+            dirty = merge_rects(rect for rect in changed if rect)
+            blits = [(background, rect.topleft, rect) for rect in dirty]
+            for _z, _order, surface, rect, _key in items:
+                for i in rect.collidelistall(dirty):
+                    clip = rect.clip(dirty[i])
+                    blits.append((surface, clip.topleft, clip.move(-rect.x, -rect.y)))
+            target.blits(blits, doreturn=False)
+            self.dirty = dirty
+
+        self.full = False
+        self.previous = current
+        items.clear()
+
+    def present(self):
+        """Show the last draw() in the window: the dirty rects or all of it"""
+        if self.dirty is None:
+            _flip()
+        elif self.dirty:
+            pygame.display.update(self.dirty)
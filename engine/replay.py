@@ -0,0 +1,157 @@
+"""Recording per-tick input to a compact binary log and replaying it
+
+A recording holds the world seed, the buttons held on every simulation
+tick and a World.state_hash() every hash_interval ticks and at the end.
+Replaying feeds the same inputs to a World built with the same seed and
+compares hashes, so a bug or frame-time spike caught once can be rerun
+exactly:
+
+    python -m engine.replay run.nvr
+
+File layout (little endian):
+
+    header  "NVRP", version u16, seed u64, hash_interval u16,
+            flags u8 (1: NumPy backend, 2: pixel collision),
+            run count u32, hash count u32
+    runs    (button bits u8, tick count u16) per run of identical input
+    hashes  (tick u32, state hash u64) per checkpoint
+"""
+
+import struct
+import sys
+
+from engine.constants import STATE_PLAYING
+from engine.world import World, InputState
+
+MAGIC = b'NVRP'
+FORMAT_VERSION = 1
+DEFAULT_HASH_INTERVAL = 60
+
+_HEADER = struct.Struct('<4sHQHBII')
+_FLAG_NUMPY = 1
+_FLAG_PIXEL = 2
+_RUN = struct.Struct('<BH')
+_HASH = struct.Struct('<IQ')
+_MAX_RUN = 0xFFFF
+
+
+class ReplayMismatch(Exception):
+    """The replayed state no longer matches the recording"""
+
+
+class Recording:
+    """Seed, backend and collision mode, per-tick input bits and state hash
+    checkpoints of one run"""
+
+    def __init__(self, seed, hash_interval=DEFAULT_HASH_INTERVAL, use_numpy=False, pixel_collision=False):
+        self.seed = seed
+        self.hash_interval = hash_interval
+        self.use_numpy = use_numpy
+        self.pixel_collision = pixel_collision
+        self.inputs = bytearray()
+        self.hashes = {}
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def save(self, path):
+        """Write the recording, run-length encoding the inputs"""
+        runs = []
+        for bits in self.inputs:
+            if runs and runs[-1][0] == bits and runs[-1][1] < _MAX_RUN:
+                runs[-1][1] += 1
+            else:
+                runs.append([bits, 1])
+        with open(path, 'wb') as f:
+            flags = (_FLAG_NUMPY if self.use_numpy else 0) | (_FLAG_PIXEL if self.pixel_collision else 0)
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, self.seed, self.hash_interval,
+                                 flags, len(runs), len(self.hashes)))
+            f.write(b''.join(_RUN.pack(bits, count) for bits, count in runs))
+            f.write(b''.join(_HASH.pack(tick, value) for tick, value in sorted(self.hashes.items())))
+
+    @classmethod
+    def load(cls, path):
+        """Read a recording written by save()"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, seed, hash_interval, flags, run_count, hash_count = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path}: not a version {FORMAT_VERSION} replay file")
+        recording = cls(seed, hash_interval, bool(flags & _FLAG_NUMPY), bool(flags & _FLAG_PIXEL))
+        offset = _HEADER.size
+        for bits, count in _RUN.iter_unpack(data[offset:offset + run_count * _RUN.size]):
+            recording.inputs.extend(bytes([bits]) * count)
+        offset += run_count * _RUN.size
+        for tick, value in _HASH.iter_unpack(data[offset:offset + hash_count * _HASH.size]):
+            recording.hashes[tick] = value
+        return recording
+
+
+class Recorder:
+    """Captures the input of every tick a World actually runs"""
+
+    def __init__(self, world, hash_interval=DEFAULT_HASH_INTERVAL):
+        self.recording = Recording(world.seed, hash_interval, world.use_numpy, world.pixel_collision)
+
+    def record(self, world, inputs):
+        """Call after world.step(inputs)"""
+        recording = self.recording
+        if world.tick == len(recording.inputs):
+            return  # the world did not advance, e.g. after game over
+        recording.inputs.append(inputs.to_bits())
+        if world.tick % recording.hash_interval == 0 or world.state != STATE_PLAYING:
+            recording.hashes[world.tick] = world.state_hash()
+
+    def save(self, path):
+        """Write what was recorded so far"""
+        self.recording.save(path)
+
+
+class Replayer:
+    """Feeds a recording back tick by tick and checks the state hashes"""
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.position = 0
+        self.checked = 0
+
+    @property
+    def finished(self):
+        """True once every recorded tick has been handed out"""
+        return self.position >= len(self.recording.inputs)
+
+    def next_input(self):
+        """Buttons for the next tick"""
+        bits = self.recording.inputs[self.position]
+        self.position += 1
+        return InputState.from_bits(bits)
+
+    def check(self, world):
+        """Compare the world with the recording; raises ReplayMismatch"""
+        expected = self.recording.hashes.get(world.tick)
+        if expected is None:
+            return
+        actual = world.state_hash()
+        if actual != expected:
+            raise ReplayMismatch(f"State differs at tick {world.tick}: "
+                                 f"{actual:016x} != {expected:016x}")
+        self.checked += 1
+
+
+def replay(recording):
+    """Run a recording headlessly; returns the world and the checkpoint count"""
+    world = World(use_numpy=recording.use_numpy, seed=recording.seed,
+                  pixel_collision=recording.pixel_collision)
+    world.load_default_level()
+    replayer = Replayer(recording)
+    while not replayer.finished:
+        world.step(replayer.next_input())
+        replayer.check(world)
+    return world, replayer.checked
+
+
+if __name__ == '__main__':
+    for replay_path in sys.argv[1:]:
+        final, checked = replay(Recording.load(replay_path))
+        print(f"{replay_path}: {final.tick} ticks, {checked} checkpoints match, "
+              f"score {final.score}, state {final.state}")
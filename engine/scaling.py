@@ -0,0 +1,89 @@
+"""Draw the logical WIDTH x HEIGHT screen at a bigger window size
+
+The game keeps working in logical coordinates; a ScaledView converts
+positions and rects to window pixels and hands out surfaces scaled to
+match. Every surface is scaled once and cached, so a frame only blits
+pre-scaled sprites and never resizes the back buffer.
+
+Whole-number scales take the fast path: nearest-neighbour
+pygame.transform.scale, which keeps pixel art crisp, and positions that
+are exact multiples. smooth=True (or a fractional scale with it) uses
+pygame.transform.smoothscale instead.
+"""
+
+import math
+
+import pygame
+from pygame import Rect
+
+from engine.constants import WIDTH, HEIGHT
+
+
+def fit_scale(window_size, smooth=False, size=(WIDTH, HEIGHT)):
+    """Largest scale at which size fits in window_size; whole numbers
+    only unless smooth, and never below 1"""
+    scale = min(window_size[0] / size[0], window_size[1] / size[1])
+    if not smooth:
+        scale = math.floor(scale)
+    return max(1, scale)
+
+
+class ScaledView:
+    """Logical-to-window conversion and a cache of scaled surfaces"""
+
+    def __init__(self, scale=1, smooth=False, size=(WIDTH, HEIGHT)):
+        if scale <= 0:
+            raise ValueError(f"Scale must be positive, not {scale}")
+        self.integer = scale == int(scale)
+        self.scale = int(scale) if self.integer else scale
+        self.smooth = smooth
+        self.size = size
+        self.window_size = (self.length(size[0]), self.length(size[1]))
+        self._surfaces = {}
+
+    def length(self, value):
+        """A logical length in window pixels"""
+        if self.integer:
+            return int(value * self.scale)
+        return round(value * self.scale)
+
+    def point(self, pos):
+        """A logical point in window pixels"""
+        return self.length(pos[0]), self.length(pos[1])
+
+    def rect(self, rect):
+        """A logical rect in window pixels; its edges land where the
+        scaled edges of neighbouring rects do"""
+        rect = Rect(rect)
+        left, top = self.point(rect.topleft)
+        right, bottom = self.point(rect.bottomright)
+        return Rect(left, top, right - left, bottom - top)
+
+    def to_logical(self, pos):
+        """A window pixel (like a mouse position) in logical coordinates"""
+        return int(pos[0] / self.scale), int(pos[1] / self.scale)
+
+    def scale_surface(self, surface):
+        """A new copy of surface at the view's scale"""
+        width, height = surface.get_size()
+        size = (max(1, self.length(width)), max(1, self.length(height)))
+        if self.smooth and surface.get_bitsize() in (24, 32):
+            return pygame.transform.smoothscale(surface, size)
+        return pygame.transform.scale(surface, size)
+
+    def surface(self, surface):
+        """surface at the view's scale, scaled on first use and cached"""
+        if self.scale == 1:
+            return surface
+        scaled = self._surfaces.get(surface)
+        if scaled is None:
+            scaled = self._surfaces[surface] = self.scale_surface(surface)
+        return scaled
+
+    def surfaces(self, surfaces):
+        """A list of surfaces at the view's scale, e.g. every atlas frame"""
+        return [self.surface(surface) for surface in surfaces]
+
+    def clear(self):
+        """Drop every cached scaled surface"""
+        self._surfaces.clear()
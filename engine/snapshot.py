@@ -0,0 +1,298 @@
+"""Packed binary snapshots of a World, and a rewind buffer built on them
+
+snapshot(world) packs everything a tick depends on into one bytes
+object with struct: tick, score, game state, the RNG, the loaded chunks
+and collected fruit ids, then a fixed-size record per player, virus and
+fruit (positions, velocities, timers, animation playback). No objects
+are pickled; restore(world, data) writes the values back into the
+world's existing entities, reloading chunks only if a different set is
+loaded.
+
+RewindBuffer keeps the last few seconds of per-tick snapshots. Every
+keyframe_interval ticks a snapshot is stored whole; the ones in between
+are XORed with their keyframe, which leaves only the changed bytes
+non-zero, and compressed. Deltas go in one preallocated bytearray, one
+fixed-size slot per tick, so recording every tick allocates nothing
+that outlives the tick. The slots grow when a delta does not fit, so a
+dense level settles on a larger slot size within its first ticks.
+"""
+
+import struct
+import zlib
+from array import array
+
+from engine.animation import clip_by_id
+from engine.constants import STATE_MENU, STATE_PLAYING, STATE_GAME_OVER, STATE_VICTORY, TICK_RATE
+from engine.entities import Player
+from engine.navigation import FLOOR
+
+GAME_STATES = (STATE_MENU, STATE_PLAYING, STATE_GAME_OVER, STATE_VICTORY)
+PLAYER_STATES = tuple(Player.STATE_CLIPS)
+
+# tick, score, game state, chunk count, collected count, virus count,
+# fruit count, node the chasers are routing to
+_WORLD = struct.Struct('<qqBIIIIi')
+# Mersenne Twister words and position, cached gauss value
+_RNG = struct.Struct('<625I?d')
+_CHUNK = struct.Struct('<ii')
+_FRUIT_ID = struct.Struct('<I')
+# Every entity ends with its animator: clip id, index, timer, mirrored, finished
+_PLAYER = struct.Struct('<ddddhhB??iBHH??')
+_VIRUS = struct.Struct('<dddbh?iiiHBHH??')
+_FRUIT = struct.Struct('<I?ddBHH??')
+
+_NO_NODE = -2
+_FLOOR_NODE = -1
+
+
+def _node_code(world, node):
+    # Level-wide platform ids, so nodes in unloaded chunks keep theirs
+    # and platforms recreated by a chunk reload get the same ones
+    if node is None:
+        return _NO_NODE
+    if node is FLOOR:
+        return _FLOOR_NODE
+    return world.platform_ids.get(node, _NO_NODE)
+
+
+def _node(world, code):
+    if code == _NO_NODE:
+        return None
+    if code == _FLOOR_NODE:
+        return FLOOR
+    return world.platform_by_id(code)
+
+
+def _anim_state(anim):
+    return anim.clip.id, anim.index, anim.timer, anim.mirrored, anim.finished
+
+
+def _set_anim(anim, clip_id, index, timer, mirrored, finished):
+    anim.restore(clip_by_id(clip_id), index, timer, mirrored, finished)
+
+
+def snapshot(world):
+    """Pack the complete simulation state of world into bytes"""
+    world.sync_entities()
+    player = world.player
+    _version, mt, gauss = world.rng.getstate()
+    fruits = world.fruits
+    viruses = world.viruses
+    parts = [
+        _WORLD.pack(world.tick, world.score, GAME_STATES.index(world.state), len(world.chunks),
+                    len(world.collected_fruits), len(viruses), len(fruits),
+                    _node_code(world, world.player_node)),
+        _RNG.pack(*mt, gauss is not None, gauss or 0.0),
+    ]
+    parts += [_CHUNK.pack(*key) for key in world.chunks]
+    parts += [_FRUIT_ID.pack(fruit_id) for fruit_id in sorted(world.collected_fruits)]
+    parts.append(_PLAYER.pack(
+        player.x, player.y, player.vel_x, player.vel_y, player.hp, player.hit_timer,
+        PLAYER_STATES.index(player.state), player.facing_right, player.on_ground,
+        _node_code(world, player.platform), *_anim_state(player.anim)))
+    for virus in viruses:
+        # A link is saved as its source node and its place in that node's links
+        link = virus.link
+        source = _NO_NODE if link is None else _node_code(world, link.source)
+        link_index = -1 if source == _NO_NODE else world.nav.link_ids[link]
+        parts.append(_VIRUS.pack(
+            virus.x, virus.y, virus.vel_y, virus.direction, virus.hit_timer, virus.hit,
+            _node_code(world, virus.node), source, link_index, virus.link_ticks,
+            *_anim_state(virus.anim)))
+    for fruit in fruits:
+        parts.append(_FRUIT.pack(
+            fruit.fruit_id if fruit.fruit_id is not None else 0xFFFFFFFF, fruit.collected,
+            fruit.float_phase, fruit.float_offset, *_anim_state(fruit.anim)))
+    return b''.join(parts)
+
+
+def _load_chunks(world, keys, skip_fruits):
+    # Reload exactly keys, in order, so the entity lists line up with the
+    # snapshot; fruits listed in the snapshot are loaded even if collected
+    for key in list(world.chunks):
+        world.unload_chunk(key)
+    collected = world.collected_fruits
+    world.collected_fruits = skip_fruits
+    for key in keys:
+        world.load_chunk(key)
+    world.collected_fruits = collected
+    world.stream_center = None
+
+
+def restore(world, data):
+    """Put world back into the state packed by snapshot()"""
+    tick, score, state, chunk_count, collected_count, virus_count, fruit_count, target = \
+        _WORLD.unpack_from(data, 0)
+    offset = _WORLD.size
+    rng_state = _RNG.unpack_from(data, offset)
+    offset += _RNG.size
+    keys = list(_CHUNK.iter_unpack(data[offset:offset + chunk_count * _CHUNK.size]))
+    offset += chunk_count * _CHUNK.size
+    collected = {fruit_id for fruit_id, in
+                 _FRUIT_ID.iter_unpack(data[offset:offset + collected_count * _FRUIT_ID.size])}
+    offset += collected_count * _FRUIT_ID.size
+    player_at = offset
+    virus_at = player_at + _PLAYER.size
+    fruit_at = virus_at + virus_count * _VIRUS.size
+
+    if list(world.chunks) != keys:
+        listed = {values[0] for values in _FRUIT.iter_unpack(data[fruit_at:fruit_at + fruit_count * _FRUIT.size])}
+        _load_chunks(world, keys, collected - listed)
+    if len(world.viruses) != virus_count or len(world.fruits) != fruit_count:
+        raise ValueError("Snapshot does not match the loaded level")
+
+    world.tick = tick
+    world.score = score
+    world.state = GAME_STATES[state]
+    world.collected_fruits = collected
+    world.events.clear()
+    world.rng.setstate((3, rng_state[:625], rng_state[626] if rng_state[625] else None))
+
+    player = world.player
+    (player.x, player.y, player.vel_x, player.vel_y, player.hp, player.hit_timer, state,
+     player.facing_right, player.on_ground, platform, *anim) = _PLAYER.unpack_from(data, player_at)
+    player.state = PLAYER_STATES[state]
+    player.platform = _node(world, platform)
+    _set_anim(player.anim, *anim)
+    player.prev_pos = player.pos
+    player.get_rect()
+    world.view.follow(*player.pos)
+
+    links = []
+    for virus, values in zip(world.viruses, _VIRUS.iter_unpack(data[virus_at:fruit_at])):
+        (virus.x, virus.y, virus.vel_y, virus.direction, virus.hit_timer, virus.hit,
+         node, source, link_index, virus.link_ticks, *anim) = values
+        virus.node = _node(world, node)
+        virus.link = None
+        if link_index >= 0:
+            links.append((virus, source, link_index))
+        _set_anim(virus.anim, *anim)
+        virus.prev_pos = virus.pos
+
+    for fruit, values in zip(world.fruits, _FRUIT.iter_unpack(data[fruit_at:fruit_at + fruit_count * _FRUIT.size])):
+        _fruit_id, fruit.collected, fruit.float_phase, fruit.float_offset, *anim = values
+        _set_anim(fruit.anim, *anim)
+        fruit.prev_pos = fruit.pos
+
+    world.virus_grid.clear()
+    for virus in world.viruses:
+        world.virus_grid.insert(virus, virus.get_rect())
+    world.fruit_grid.clear()
+    for fruit in world.fruits:
+        if not fruit.collected:
+            world.fruit_grid.insert(fruit, fruit.get_rect())
+    world.build_swarms()
+
+    if world.chasers:
+        # Re-plans for the player's node, then routes as saved
+        world.update_navigation()
+        for virus, source, link_index in links:
+            virus.link = world.nav.links[_node(world, source)][link_index]
+        world.player_node = _node(world, target)
+        world.chase_routes = None if world.player_node is None else world.nav.routes_to(world.player_node)
+
+
+class RewindBuffer:
+    """The last seconds of per-tick snapshots, delta-encoded against keyframes
+
+    push() after every tick; rewind() steps the world back and forgets the
+    newer ticks. A snapshot whose size differs from the keyframe's (chunks
+    streamed in or out), or whose delta is no smaller than it, starts a
+    new keyframe instead.
+    """
+
+    def __init__(self, seconds=5, tick_rate=TICK_RATE, keyframe_interval=60, slot_size=1024):
+        self.capacity = int(seconds * tick_rate)
+        self.keyframe_interval = keyframe_interval
+        self.slot_size = slot_size
+        self.deltas = bytearray(self.capacity * slot_size)
+        # Per tick slot: delta length (0 for a keyframe) and keyframe slot
+        self.lengths = array('I', [0]) * self.capacity
+        self.key_of = array('I', [0]) * self.capacity
+        # One keyframe slot per tick, so however often new keyframes start,
+        # none is overwritten while a stored tick still refers to it
+        self.keyframes = [None] * self.capacity
+        self.key_slot = 0
+        self.since_key = 0
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        """Forget every stored tick"""
+        self.count = 0
+        self.since_key = 0
+        self.keyframes = [None] * len(self.keyframes)
+
+    def push(self, world):
+        """Store the world's current state as the newest tick"""
+        data = snapshot(world)
+        slot = self.head
+        if self.count == self.capacity:
+            # The oldest tick is about to go; let its keyframe go with it
+            # unless the next tick still needs it
+            old_key = self.key_of[slot]
+            if self.key_of[(slot + 1) % self.capacity] != old_key:
+                self.keyframes[old_key] = None
+        key = self.keyframes[self.key_slot]
+        delta = None
+        if key is not None and self.since_key < self.keyframe_interval and len(key) == len(data):
+            delta = zlib.compress((int.from_bytes(data, 'little') ^ int.from_bytes(key, 'little'))
+                                  .to_bytes(len(data), 'little'), 1)
+            if len(delta) >= len(data):
+                delta = None
+            elif len(delta) > self.slot_size:
+                self.grow_slots(max(len(delta), 2 * self.slot_size))
+
+        if delta is None:
+            self.key_slot = (self.key_slot + 1) % len(self.keyframes)
+            self.keyframes[self.key_slot] = data
+            self.lengths[slot] = 0
+            self.since_key = 1
+        else:
+            start = slot * self.slot_size
+            self.deltas[start:start + len(delta)] = delta
+            self.lengths[slot] = len(delta)
+            self.since_key += 1
+        self.key_of[slot] = self.key_slot
+        self.head = (slot + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def grow_slots(self, slot_size):
+        """Make every delta slot slot_size bytes, keeping the stored deltas"""
+        deltas = bytearray(self.capacity * slot_size)
+        for slot, length in enumerate(self.lengths):
+            start = slot * self.slot_size
+            deltas[slot * slot_size:slot * slot_size + length] = self.deltas[start:start + length]
+        self.deltas = deltas
+        self.slot_size = slot_size
+
+    def get(self, age):
+        """Snapshot bytes from age ticks before the newest (0 = newest)"""
+        if not 0 <= age < self.count:
+            raise IndexError(age)
+        slot = (self.head - 1 - age) % self.capacity
+        key = self.keyframes[self.key_of[slot]]
+        length = self.lengths[slot]
+        if not length:
+            return key
+        start = slot * self.slot_size
+        xor = zlib.decompress(self.deltas[start:start + length])
+        return (int.from_bytes(xor, 'little') ^ int.from_bytes(key, 'little')).to_bytes(len(key), 'little')
+
+    def rewind(self, world, ticks=1):
+        """Restore world to ticks ticks ago (as far as stored); returns the
+        number of ticks actually rewound"""
+        ticks = min(ticks, self.count - 1)
+        if ticks <= 0:
+            return 0
+        restore(world, self.get(ticks))
+        self.head = (self.head - ticks) % self.capacity
+        self.count -= ticks
+        # Keep deltas against the restored tick's keyframe, or start anew
+        slot = (self.head - 1) % self.capacity
+        self.key_slot = self.key_of[slot]
+        self.since_key = 0 if self.lengths[slot] == 0 else self.keyframe_interval
+        return ticks
@@ -0,0 +1,105 @@
+"""Uniform-grid spatial hash used as the collision broadphase"""
+
+
+class SpatialHash:
+    """Buckets objects by the grid cells their rect covers.
+
+    Queries only look at the cells around the query rect, so their cost
+    depends on how crowded that area is instead of on the level size.
+    Results come back in insertion order, which keeps "first match wins"
+    loops behaving exactly like a scan over the original list.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self._spans = {}
+        self._order = {}
+        self._next_order = 0
+
+    def __len__(self):
+        return len(self._spans)
+
+    def __contains__(self, item):
+        return item in self._spans
+
+    def _span(self, rect):
+        """Get the (x0, y0, x1, y1) cell range covered by a rect"""
+        size = self.cell_size
+        x0 = int(rect.left // size)
+        y0 = int(rect.top // size)
+        x1 = int((rect.right - 1) // size)
+        y1 = int((rect.bottom - 1) // size)
+        return (x0, y0, max(x0, x1), max(y0, y1))
+
+    def _add_to_cells(self, item, span):
+        x0, y0, x1, y1 = span
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    bucket = cells[(cx, cy)] = {}
+                bucket[item] = None
+
+    def _remove_from_cells(self, item, span):
+        x0, y0, x1, y1 = span
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells[(cx, cy)]
+                del bucket[item]
+                if not bucket:
+                    del cells[(cx, cy)]
+
+    def insert(self, item, rect):
+        """Add an item covering the given rect"""
+        if item in self._spans:
+            self.move(item, rect)
+            return
+        span = self._span(rect)
+        self._spans[item] = span
+        self._order[item] = self._next_order
+        self._next_order += 1
+        self._add_to_cells(item, span)
+
+    def remove(self, item):
+        """Remove an item; unknown items are ignored"""
+        span = self._spans.pop(item, None)
+        if span is None:
+            return
+        del self._order[item]
+        self._remove_from_cells(item, span)
+
+    def move(self, item, rect):
+        """Update an item's rect, touching the buckets only if its cells changed"""
+        span = self._span(rect)
+        old_span = self._spans.get(item)
+        if old_span == span:
+            return
+        if old_span is None:
+            self.insert(item, rect)
+            return
+        self._remove_from_cells(item, old_span)
+        self._add_to_cells(item, span)
+        self._spans[item] = span
+
+    def clear(self):
+        """Remove every item"""
+        self.cells.clear()
+        self._spans.clear()
+        self._order.clear()
+
+    def query(self, rect):
+        """Get the items sharing a cell with rect, in insertion order"""
+        x0, y0, x1, y1 = self._span(rect)
+        cells = self.cells
+        found = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        if len(found) < 2:
+            return list(found)
+        return sorted(found, key=self._order.__getitem__)
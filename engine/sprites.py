@@ -0,0 +1,27 @@
+"""Sprite metadata read straight from image files, without a display"""
+
+import os
+import struct
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'images')
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+_size_cache = {}
+
+
+def image_path(name):
+    """Get the file path of an image referenced by its Pygame Zero name"""
+    return os.path.join(IMAGES_DIR, name + '.png')
+
+
+def image_size(name):
+    """Get (width, height) of a PNG sprite from its IHDR header"""
+    size = _size_cache.get(name)
+    if size is None:
+        with open(image_path(name), 'rb') as f:
+            header = f.read(24)
+        if header[:8] != PNG_SIGNATURE or header[12:16] != b'IHDR':
+            raise ValueError(f"{name!r} is not a PNG image")
+        size = _size_cache[name] = struct.unpack('>II', header[16:24])
+    return size
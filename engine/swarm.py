@@ -0,0 +1,196 @@
+"""Optional NumPy backend that steps all viruses and fruits as arrays
+
+World switches to this backend with World(use_numpy=True) when NumPy is
+installed. Every per-tick field lives in one array per attribute, so a tick
+is a handful of vectorized operations no matter how many entities there
+are. The Virus and Fruit objects are kept for everything else (drawing,
+level data) and only refreshed by write_back().
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from engine.animation import clip
+from engine.entities import Fruit
+
+HAS_NUMPY = np is not None
+
+
+class _ClipTable:
+    """A looping clip as arrays, for vectorized frame lookups"""
+
+    def __init__(self, clip_obj):
+        if len(set(clip_obj.durations)) != 1:
+            raise ValueError(f"Clip {clip_obj.name!r} needs a single frame duration for batching")
+        self.clip = clip_obj
+        self.frames = np.array(clip_obj.frames, dtype=np.int32)
+        self.mirrored = np.array(clip_obj.mirrored, dtype=np.int32)
+        self.count = len(clip_obj.frames)
+        self.ticks = clip_obj.durations[0]
+
+
+def _overlaps(left, top, width, height, rect):
+    """Vectorized Rect.colliderect of many boxes against one rect"""
+    return ((left < rect.right) & (left + width > rect.left) &
+            (top < rect.bottom) & (top + height > rect.top) &
+            (width > 0) & (height > 0))
+
+
+class VirusSwarm:
+    """Patrolling viruses as parallel arrays.
+
+    Only the idle clip is simulated; the hit flash is not batched.
+    """
+
+    def __init__(self, viruses):
+        self.viruses = viruses
+        self.table = _ClipTable(clip('virus_idle'))
+        self.x = np.array([v.x for v in viruses], dtype=np.float64)
+        self.y = np.array([v.y for v in viruses], dtype=np.float64)
+        self.prev_x = self.x.copy()
+        self.width = np.array([v.width for v in viruses], dtype=np.int64)
+        self.height = np.array([v.height for v in viruses], dtype=np.int64)
+        self.left_bound = np.array([v.left_bound for v in viruses], dtype=np.float64)
+        self.right_bound = np.array([v.right_bound for v in viruses], dtype=np.float64)
+        self.speed = np.array([v.speed for v in viruses], dtype=np.float64)
+        self.direction = np.array([v.direction for v in viruses], dtype=np.float64)
+        self.anim_index = np.array([v.anim.index for v in viruses], dtype=np.int32)
+        self.anim_timer = np.array([v.anim.timer for v in viruses], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.viruses)
+
+    def step(self):
+        """Move, bounce and animate every virus"""
+        np.copyto(self.prev_x, self.x)
+        self.x += self.speed * self.direction
+        bounce = (self.x <= self.left_bound) | (self.x >= self.right_bound)
+        self.direction[bounce] *= -1
+
+        self.anim_timer += 1
+        fire = self.anim_timer >= self.table.ticks
+        self.anim_timer[fire] = 0
+        self.anim_index[fire] = (self.anim_index[fire] + 1) % self.table.count
+
+    def frames(self):
+        """Atlas frame id of every virus"""
+        return np.where(self.direction < 0,
+                        self.table.mirrored[self.anim_index],
+                        self.table.frames[self.anim_index])
+
+    def center(self, i):
+        """Sprite center of virus i, like Virus.pos"""
+        return (float(self.x[i]) + int(self.width[i]) // 2, float(self.y[i]) + int(self.height[i]) // 2)
+
+    def hits(self, rect):
+        """Indices of viruses whose rect overlaps rect"""
+        return np.flatnonzero(_overlaps(np.trunc(self.x), np.trunc(self.y),
+                                        self.width, self.height, rect))
+
+    def objects_in(self, rect):
+        """Virus objects overlapping rect, refreshed from the arrays"""
+        inside = np.flatnonzero(_overlaps(self.x, self.y, self.width, self.height, rect))
+        self.write_back(inside)
+        return [self.viruses[i] for i in inside.tolist()]
+
+    def write_back(self, indices=None):
+        """Copy array state back into the Virus objects (all, or just indices)"""
+        if indices is None:
+            indices = np.arange(len(self.viruses))
+        viruses = [self.viruses[i] for i in indices.tolist()]
+        for virus, x, prev_x, direction, index, timer, frame in zip(
+                viruses, self.x[indices].tolist(), self.prev_x[indices].tolist(),
+                self.direction[indices].tolist(), self.anim_index[indices].tolist(),
+                self.anim_timer[indices].tolist(), self.frames()[indices].tolist()):
+            virus.x = x
+            virus.direction = int(direction)
+            virus.prev_pos = (prev_x + virus.width // 2, virus.y + virus.height // 2)
+            anim = virus.anim
+            anim.index = index
+            anim.timer = timer
+            anim.mirrored = direction < 0
+            anim.frame = frame
+
+
+class FruitSwarm:
+    """Bobbing, spinning fruits as parallel arrays"""
+
+    HITBOX_PADDING = 4
+
+    def __init__(self, fruits):
+        self.fruits = fruits
+        self.table = _ClipTable(clip('fruit_spin'))
+        self.x = np.array([f.x for f in fruits], dtype=np.float64)
+        self.y = np.array([f.y for f in fruits], dtype=np.float64)
+        self.width = np.array([f.width for f in fruits], dtype=np.int64)
+        self.height = np.array([f.height for f in fruits], dtype=np.int64)
+        self.float_phase = np.array([f.float_phase for f in fruits], dtype=np.float64)
+        self.float_offset = np.array([f.float_offset for f in fruits], dtype=np.float64)
+        self.prev_offset = self.float_offset.copy()
+        self.collected = np.array([f.collected for f in fruits], dtype=bool)
+        self.anim_index = np.array([f.anim.index for f in fruits], dtype=np.int32)
+        self.anim_timer = np.array([f.anim.timer for f in fruits], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.fruits)
+
+    def step(self):
+        """Bob and animate every fruit that is still in play"""
+        active = ~self.collected
+        np.copyto(self.prev_offset, self.float_offset)
+        self.float_phase[active] += Fruit.float_speed
+        np.multiply(np.sin(self.float_phase), Fruit.float_distance,
+                    out=self.float_offset, where=active)
+
+        self.anim_timer[active] += 1
+        fire = active & (self.anim_timer >= self.table.ticks)
+        self.anim_timer[fire] = 0
+        self.anim_index[fire] = (self.anim_index[fire] + 1) % self.table.count
+
+    def frames(self):
+        """Atlas frame id of every fruit"""
+        return self.table.frames[self.anim_index]
+
+    def center(self, i):
+        """Sprite center of fruit i, like Fruit.pos"""
+        return (float(self.x[i]) + int(self.width[i]) // 2, float(self.y[i] + self.float_offset[i]))
+
+    def hits(self, rect):
+        """Indices of uncollected fruits whose hitbox overlaps rect"""
+        pad = self.HITBOX_PADDING
+        hit = _overlaps(np.trunc(self.x + pad), np.trunc(self.y + pad + self.float_offset),
+                        self.width - 2 * pad, self.height - 2 * pad, rect)
+        return np.flatnonzero(hit & ~self.collected)
+
+    def collect(self, i):
+        """Mark fruit i collected"""
+        self.collected[i] = True
+        self.fruits[i].collected = True
+
+    def objects_in(self, rect):
+        """Uncollected Fruit objects overlapping rect, refreshed from the arrays"""
+        hit = _overlaps(self.x, self.y + self.float_offset, self.width, self.height, rect)
+        inside = np.flatnonzero(hit & ~self.collected)
+        self.write_back(inside)
+        return [self.fruits[i] for i in inside.tolist()]
+
+    def write_back(self, indices=None):
+        """Copy array state back into the Fruit objects (all, or just indices)"""
+        if indices is None:
+            indices = np.arange(len(self.fruits))
+        fruits = [self.fruits[i] for i in indices.tolist()]
+        for fruit, phase, offset, prev_offset, collected, index, timer, frame in zip(
+                fruits, self.float_phase[indices].tolist(), self.float_offset[indices].tolist(),
+                self.prev_offset[indices].tolist(), self.collected[indices].tolist(),
+                self.anim_index[indices].tolist(), self.anim_timer[indices].tolist(),
+                self.frames()[indices].tolist()):
+            fruit.float_phase = phase
+            fruit.float_offset = offset
+            fruit.prev_pos = (fruit.x + fruit.width // 2, fruit.y + prev_offset)
+            fruit.collected = collected
+            anim = fruit.anim
+            anim.index = index
+            anim.timer = timer
+            anim.frame = frame
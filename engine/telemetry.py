@@ -0,0 +1,200 @@
+"""Gameplay event log written to disk by a background thread
+
+TelemetryLog.log() packs one fixed-size record (time, tick, kind, x, y,
+value) into a preallocated ring buffer with struct.pack_into, so logging
+from the game thread never allocates per event or touches the disk. If
+the writer falls behind and the ring is full, new events are dropped
+and counted instead of blocking. A daemon thread wakes every
+flush_interval seconds, copies out the records written since its last
+pass and appends them to the log file, rotating it like a
+RotatingFileHandler: the file becomes path.1, path.1 becomes path.2 and
+so on, keeping backups old files.
+
+File layout (little endian): header "NVTL", version u16, record size
+u16, then records of
+
+    milliseconds since the log opened u32, world tick u32, kind u8,
+    3 pad bytes, x f32, y f32, value i64
+
+where value is the level seed for "level", hp left for "hit", the fruit
+id for "collect", the score for "death" and "victory", and the frame
+count for "frames" (x and y then hold the mean and worst frame time in
+ms). Summarize a log with:
+
+    python -m engine.telemetry telemetry.nvt
+"""
+
+import os
+import struct
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+
+MAGIC = b'NVTL'
+FORMAT_VERSION = 1
+
+KINDS = ('level', 'jump', 'land', 'hit', 'collect', 'death', 'victory', 'frames')
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+_HEADER = struct.Struct('<4sHH')
+_RECORD = struct.Struct('<IIB3xffq')
+
+Event = namedtuple('Event', 'ms tick kind x y value')
+
+
+class TelemetryLog:
+    """Ring buffer of events plus the thread that appends them to path"""
+
+    def __init__(self, path, capacity=4096, flush_interval=1.0, max_bytes=1 << 20, backups=3):
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.buffer = bytearray(capacity * _RECORD.size)
+        # Records ever written and ever flushed; only the game thread moves
+        # head and only the writer thread moves tail
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        self.started = time.perf_counter()
+        self.frame_count = 0
+        self.frame_total = 0.0
+        self.frame_worst = 0.0
+        self._file = None
+        self._wake = threading.Event()
+        self._stop = False
+        self._thread = None
+
+    def start(self):
+        """Begin flushing in the background"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='telemetry-writer', daemon=True)
+            self._thread.start()
+
+    def log(self, tick, kind, x=0.0, y=0.0, value=0):
+        """Record one event; never blocks"""
+        head = self.head
+        if head - self.tail >= self.capacity:
+            self.dropped += 1
+            return
+        ms = int((time.perf_counter() - self.started) * 1000)
+        _RECORD.pack_into(self.buffer, head % self.capacity * _RECORD.size,
+                          ms, tick, KIND_CODES[kind], x, y, value)
+        self.head = head + 1
+
+    def frame(self, dt):
+        """Count one rendered frame toward the level's frame-time summary"""
+        self.frame_count += 1
+        self.frame_total += dt
+        if dt > self.frame_worst:
+            self.frame_worst = dt
+
+    def frame_summary(self, tick):
+        """Log the mean and worst frame time since the last summary"""
+        if self.frame_count:
+            self.log(tick, 'frames', self.frame_total / self.frame_count * 1000,
+                     self.frame_worst * 1000, self.frame_count)
+        self.frame_count = 0
+        self.frame_total = 0.0
+        self.frame_worst = 0.0
+
+    def _run(self):
+        while not self._stop:
+            self._wake.wait(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Append the pending records to the file (on the writer thread)"""
+        head = self.head
+        if head == self.tail:
+            return
+        record_size = _RECORD.size
+        start = self.tail % self.capacity * record_size
+        end = head % self.capacity * record_size
+        view = memoryview(self.buffer)
+        if start < end:
+            chunks = (view[start:end],)
+        else:
+            chunks = (view[start:], view[:end])
+        data = b''.join(chunks)
+        self.tail = head
+        try:
+            self._write(data)
+        except OSError as e:
+            print(f"Telemetry write failed: {e}", file=sys.stderr)
+
+    def _write(self, data):
+        if self._file is None:
+            self._open()
+        if self._file.tell() + len(data) > self.max_bytes and self._file.tell() > _HEADER.size:
+            self._file.close()
+            self._rotate()
+            self._open()
+        self._file.write(data)
+        self._file.flush()
+
+    def _open(self):
+        self._file = open(self.path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, _RECORD.size))
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def close(self):
+        """Stop the writer and flush what is left"""
+        self._stop = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_events(path):
+    """Yield the Events stored in one log file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, record_size = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION or record_size != _RECORD.size:
+        raise ValueError(f"{path} is not a telemetry log this version can read")
+    end = len(data) - (len(data) - _HEADER.size) % record_size
+    for ms, tick, kind, x, y, value in _RECORD.iter_unpack(data[_HEADER.size:end]):
+        yield Event(ms, tick, KINDS[kind], x, y, value)
+
+
+def summarize(events):
+    """Print event counts, where players died and the frame-time summaries"""
+    counts = Counter()
+    collected = Counter()
+    for event in events:
+        counts[event.kind] += 1
+        if event.kind == 'collect':
+            collected[event.value] += 1
+        elif event.kind == 'death':
+            print(f"death at tick {event.tick}, ({event.x:.0f}, {event.y:.0f}), score {event.value}")
+        elif event.kind == 'frames':
+            print(f"level ended at tick {event.tick}: {event.value} frames, "
+                  f"mean {event.x:.2f} ms, worst {event.y:.2f} ms")
+    print("events: " + ", ".join(f"{kind} {counts[kind]}" for kind in KINDS if counts[kind]))
+    if collected:
+        print("fruits collected (id x times): " +
+              ", ".join(f"{fruit_id} x{n}" for fruit_id, n in sorted(collected.items())))
+
+
+if __name__ == '__main__':
+    for log_path in sys.argv[1:]:
+        print(log_path)
+        summarize(read_events(log_path))
@@ -0,0 +1,63 @@
+"""Rendered text surfaces, cached so each string is rasterized only once"""
+
+from collections import OrderedDict
+
+import pygame
+
+DEFAULT_CACHE_SIZE = 128
+
+
+class TextCache:
+    """LRU cache of text surfaces keyed by (text, font size, color).
+
+    Uses pygame's default font, like screen.draw.text, so cached text
+    looks the same as text drawn directly. With a scale, font sizes are
+    multiplied by it, so text is rasterized at the window's resolution.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, scale=1):
+        self.max_size = max_size
+        self.scale = scale
+        self._surfaces = OrderedDict()
+        self._fonts = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def font(self, fontsize):
+        """Get the default font at a (logical) size, loading it on first use"""
+        fontsize = max(1, round(fontsize * self.scale))
+        font = self._fonts.get(fontsize)
+        if font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = self._fonts[fontsize] = pygame.font.Font(None, fontsize)
+        return font
+
+    def add_fonts(self, fonts):
+        """Use already loaded default fonts, given as {pixel size: Font}"""
+        self._fonts.update(fonts)
+
+    def get(self, text, fontsize, color):
+        """Get the surface for a string, rendering it on a cache miss"""
+        key = (text, fontsize, color)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.font(fontsize).render(text, True, pygame.Color(color))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        """Drop every cached surface"""
+        self._surfaces.clear()
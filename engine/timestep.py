@@ -0,0 +1,49 @@
+"""Fixed-timestep driver that decouples simulation ticks from rendered frames"""
+
+
+class FixedTimestep:
+    """Accumulates real frame time and spends it in fixed-size ticks.
+
+    Each frame runs as many ticks as the elapsed time pays for, capped at
+    max_ticks_per_frame so one slow frame cannot trigger an ever-growing
+    catch-up. Time beyond the cap is dropped and counted in skipped_ticks.
+    After advance(), alpha says how far the remaining time reaches into the
+    next tick, for interpolating what gets drawn.
+    """
+
+    def __init__(self, tick_rate=60, max_ticks_per_frame=5):
+        self.tick_rate = tick_rate
+        self.tick_time = 1.0 / tick_rate
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.skipped_ticks = 0
+
+    def reset(self):
+        """Forget accumulated time, e.g. when a level starts"""
+        self.accumulator = 0.0
+        self.alpha = 0.0
+
+    def advance(self, frame_time, step):
+        """Call step() once per whole tick in frame_time; returns the tick count"""
+        self.accumulator += frame_time
+        tick_time = self.tick_time
+        ticks = 0
+        while self.accumulator >= tick_time:
+            if ticks == self.max_ticks_per_frame:
+                dropped = int(self.accumulator // tick_time)
+                self.skipped_ticks += dropped
+                self.accumulator -= dropped * tick_time
+                break
+            step()
+            self.accumulator -= tick_time
+            ticks += 1
+        self.alpha = self.accumulator / tick_time
+        return ticks
+
+
+def lerp_pos(previous, current, alpha):
+    """Interpolate between two (x, y) positions"""
+    px, py = previous
+    cx, cy = current
+    return (px + (cx - px) * alpha, py + (cy - py) * alpha)
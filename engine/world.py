@@ -0,0 +1,537 @@
+"""Headless simulation of one level, independent of Pygame Zero"""
+
+import hashlib
+import math
+import random
+import struct
+from collections import namedtuple
+
+from engine.atlas import frame_masks
+from engine.camera import Camera
+from engine.collision import masks_overlap
+from engine.constants import WIDTH, HEIGHT, GROUND_HEIGHT, CULL_MARGIN, FAR_UPDATE_INTERVAL
+from engine.constants import STATE_PLAYING, STATE_GAME_OVER, STATE_VICTORY
+from engine.entities import Player, Virus, Fruit, Platform
+from engine.level import LevelFile, chunk_of, level_path
+from engine.navigation import FLOOR, NavGraph
+from engine.spatial import SpatialHash
+from engine.swarm import HAS_NUMPY, VirusSwarm, FruitSwarm
+
+
+class InputState(namedtuple('InputState', 'left right jump')):
+    """Buttons held during one simulation tick"""
+    __slots__ = ()
+
+    def to_bits(self):
+        """Pack the buttons into a small int, one bit each"""
+        return self.left | self.right << 1 | self.jump << 2
+
+    @classmethod
+    def from_bits(cls, bits):
+        """Unpack buttons packed by to_bits()"""
+        return cls(bool(bits & 1), bool(bits & 2), bool(bits & 4))
+
+
+NO_INPUT = InputState(False, False, False)
+
+
+class World:
+    """Owns every entity of a level plus the score and game state.
+
+    The world never reads the keyboard, plays sounds or draws; each call
+    to step() takes an InputState and leaves what happened in self.events
+    as (kind, x, y) tuples ("jump", "land", "hit", "collect") for the
+    front end. x, y is the sprite center, or the player's feet for "land".
+
+    With use_numpy=True (and NumPy installed) viruses and fruits are
+    stepped as arrays by engine.swarm; call sync_entities() before reading
+    their objects, or get the ones to draw from visible_entities().
+
+    self.view is a screen-sized camera that follows the player tick by
+    tick. With the object backend, viruses and fruits outside it (plus
+    CULL_MARGIN) only get a cheap update every FAR_UPDATE_INTERVAL ticks,
+    staggered across entities; the array backend steps them all anyway.
+    Chasing viruses are always stepped as objects, on screen only, along
+    routes from a NavGraph of every platform in the level, built when the
+    level loads.
+
+    With pixel_collision=True, a virus or fruit whose rect overlaps the
+    player's only counts as touching it if their current animation frames
+    overlap pixel for pixel, tested with masks built once per atlas frame.
+    Pass the masks of an already loaded atlas (SpriteAtlas.masks()), or
+    they are loaded from the atlas image once per process.
+
+    All randomness comes from self.rng, reseeded with seed whenever a level
+    loads, so the same seed and inputs always give the same run.
+    """
+
+    def __init__(self, use_numpy=False, seed=0, pixel_collision=False, masks=None):
+        self.player = None
+        self.platforms = []
+        self.viruses = []
+        self.fruits = []
+        self.score = 0
+        self.total_fruits = 0
+        self.state = STATE_PLAYING
+        self.tick = 0
+        self.events = []
+        # Optional TelemetryLog that every event is also logged to
+        self.telemetry = None
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        # Level bounds; the floor is GROUND_HEIGHT above the bottom
+        self.width = WIDTH
+        self.height = HEIGHT
+        self.view = Camera(WIDTH, HEIGHT, self.width, self.height)
+
+        # Streaming state, set up by load_level()
+        self.level = None
+        self.chunks = {}
+        self.collected_fruits = set()
+        # Bumped whenever platforms are added or removed
+        self.geometry_version = 0
+
+        # Collision broadphase: platforms are static, viruses and fruits move
+        self.platform_grid = SpatialHash()
+        self.virus_grid = SpatialHash()
+        self.fruit_grid = SpatialHash()
+
+        self.use_numpy = use_numpy and HAS_NUMPY
+        self.pixel_collision = pixel_collision
+        self.masks = None
+        if pixel_collision:
+            self.masks = masks if masks is not None else frame_masks()
+        self.virus_swarm = None
+        self.fruit_swarm = None
+
+        # With chasers, every platform of the level by chunk, created once
+        # per level so reloaded chunks bring back the same objects the graph
+        # knows. Loaded platforms (all of them, with chasers) get an id from
+        # their chunk's number and their index in it, for snapshots
+        self.level_platforms = {}
+        self.chunk_keys = []
+        self.chunk_numbers = {}
+        self.platform_ids = {}
+        # Chasing viruses, their navigation graph and their routes to the
+        # node the player last stood on
+        self.chasers = []
+        self.nav = None
+        self.player_node = None
+        self.chase_routes = None
+
+    def load_default_level(self):
+        """Start the stock level"""
+        self.load_level(LevelFile(level_path('level1')))
+
+    def load_level(self, level):
+        """Start a packed LevelFile; its chunks stream in around the player"""
+        if level is not self.level:
+            self.load_geometry(level)
+        self.level = level
+        self.rng.seed(self.seed)
+        self.set_bounds(level.width, level.height)
+        self.player = Player(*level.spawn)
+        self.platforms = []
+        self.viruses = []
+        self.fruits = []
+        self.chasers = []
+        self.player_node = None
+        self.chase_routes = None
+        self.chunks = {}
+        self.collected_fruits = set()
+        self.stream_center = None
+        # Enough chunks on each side to cover a screen in any direction
+        self.stream_radius = math.ceil(max(WIDTH, HEIGHT) / level.chunk_size)
+        self.reset_progress()
+        self.stream_chunks()
+        self.log("level", *self.player.pos, value=self.seed)
+
+    def load_geometry(self, level):
+        """If any of a level's viruses chase, create every platform of it
+        and the navigation graph over all of them
+
+        Done once per level rather than as chunks stream, since the graph
+        is costly to build and its links may cross chunk boundaries. A
+        level without chasers keeps creating its platforms as chunks load.
+        """
+        self.level_platforms = {}
+        self.chunk_keys = list(level.index)
+        self.chunk_numbers = {key: number for number, key in enumerate(self.chunk_keys)}
+        self.platform_ids = {}
+        self.nav = None
+        if level.chasers == 0:
+            return
+        walker = None
+        for key in level.index:
+            record = level.read_chunk(key)
+            self.level_platforms[key] = [Platform(*values) for values in record["platforms"]]
+            if walker is None:
+                walker = next((Virus(*values) for values in record["viruses"] if values[4:5] == [True]), None)
+        if walker is None:
+            # Packed before the header counted chasers, and has none
+            self.level_platforms = {}
+            return
+        for key, platforms in self.level_platforms.items():
+            self.add_platform_ids(key, platforms)
+        platforms = [platform for platforms in self.level_platforms.values() for platform in platforms]
+        self.nav = NavGraph(platforms, level.width, level.height - GROUND_HEIGHT,
+                            walker.width, walker.height, walker.speed)
+
+    def add_platform_ids(self, key, platforms):
+        """Give the platforms of one chunk their level-wide ids"""
+        base = self.chunk_numbers[key] << 16
+        for index, platform in enumerate(platforms):
+            self.platform_ids[platform] = base | index
+
+    def platform_by_id(self, platform_id):
+        """The loaded (or, with chasers, any) platform with a level-wide id"""
+        key = self.chunk_keys[platform_id >> 16]
+        platforms = self.level_platforms.get(key) or self.chunks[key][0]
+        return platforms[platform_id & 0xFFFF]
+
+    def set_bounds(self, width, height):
+        """Resize the level area the player and camera are kept inside"""
+        self.width = width
+        self.height = height
+        self.view = Camera(WIDTH, HEIGHT, width, height)
+
+    def stream_chunks(self):
+        """Load the chunks near the player and drop the far ones
+
+        Only does work when the player enters a new chunk. Chunks are kept
+        until they are one chunk beyond the load radius, so walking back
+        and forth over a boundary does not reload them. An unloaded chunk
+        comes back in its initial state, except for fruits already eaten.
+        """
+        level = self.level
+        center = chunk_of(self.player.x, self.player.y, level.chunk_size)
+        if center == self.stream_center:
+            return
+        self.stream_center = center
+
+        wanted = level.chunks_around(center, self.stream_radius)
+        keep = set(level.chunks_around(center, self.stream_radius + 1))
+        stale = [key for key in self.chunks if key not in keep]
+        missing = [key for key in wanted if key not in self.chunks]
+        if not stale and not missing:
+            return
+
+        self.sync_entities()
+        for key in stale:
+            self.unload_chunk(key)
+        for key in missing:
+            self.load_chunk(key)
+        self.build_swarms()
+
+    def load_chunk(self, key):
+        """Create the entities of one level chunk"""
+        record = self.level.read_chunk(key)
+        if key in self.level_platforms:
+            platforms = list(self.level_platforms[key])
+        else:
+            platforms = [Platform(*values) for values in record["platforms"]]
+            self.add_platform_ids(key, platforms)
+        viruses = [Virus(*values) for values in record["viruses"]]
+        fruits = [Fruit(x, y, fruit_id=fruit_id, rng=self.rng)
+                  for fruit_id, x, y in record["fruits"]
+                  if fruit_id not in self.collected_fruits]
+        self.chunks[key] = (platforms, viruses, fruits)
+
+        self.platforms.extend(platforms)
+        self.viruses.extend(viruses)
+        self.fruits.extend(fruits)
+        self.chasers.extend(virus for virus in viruses if virus.chase)
+        for platform in platforms:
+            self.platform_grid.insert(platform, platform.rect)
+        for virus in viruses:
+            self.virus_grid.insert(virus, virus.get_rect())
+        for fruit in fruits:
+            self.fruit_grid.insert(fruit, fruit.get_rect())
+        if platforms:
+            self.geometry_version += 1
+
+    def unload_chunk(self, key):
+        """Discard the entities of one level chunk"""
+        platforms, viruses, fruits = self.chunks.pop(key)
+        for platform in platforms:
+            self.platform_grid.remove(platform)
+            if key not in self.level_platforms:
+                del self.platform_ids[platform]
+        for virus in viruses:
+            self.virus_grid.remove(virus)
+        for fruit in fruits:
+            self.fruit_grid.remove(fruit)
+
+        if platforms:
+            dropped = set(platforms)
+            self.platforms = [p for p in self.platforms if p not in dropped]
+            self.geometry_version += 1
+        if viruses:
+            dropped = set(viruses)
+            self.viruses = [v for v in self.viruses if v not in dropped]
+            self.chasers = [v for v in self.chasers if v not in dropped]
+        if fruits:
+            dropped = set(fruits)
+            self.fruits = [f for f in self.fruits if f not in dropped]
+
+    def reset_progress(self):
+        """Reset score and state for the currently loaded entities"""
+        self.score = 0
+        if self.level is not None:
+            self.total_fruits = self.level.total_fruits
+        else:
+            self.total_fruits = len(self.fruits)
+        self.state = STATE_PLAYING
+        self.tick = 0
+        self.events.clear()
+        self.build_collision_grids()
+        self.build_swarms()
+        self.geometry_version += 1
+
+    def build_swarms(self):
+        """Rebuild the NumPy arrays from the entity lists, if that backend is on"""
+        if self.use_numpy:
+            self.virus_swarm = VirusSwarm([virus for virus in self.viruses if not virus.chase])
+            self.fruit_swarm = FruitSwarm(self.fruits)
+
+    def build_collision_grids(self):
+        """Index platforms, viruses and fruits for collision queries"""
+        self.platform_grid.clear()
+        self.virus_grid.clear()
+        self.fruit_grid.clear()
+
+        for platform in self.platforms:
+            self.platform_grid.insert(platform, platform.rect)
+        for virus in self.viruses:
+            self.virus_grid.insert(virus, virus.get_rect())
+        for fruit in self.fruits:
+            if not fruit.collected:
+                self.fruit_grid.insert(fruit, fruit.get_rect())
+
+    def store_previous_positions(self):
+        """Remember sprite positions before a tick, for render interpolation
+
+        Viruses and fruits do this themselves in step_viruses() and
+        step_fruits(), and only when they are on screen.
+        """
+        self.player.prev_pos = self.player.pos
+
+    def step(self, inputs=NO_INPUT):
+        """Advance the simulation by one tick"""
+        self.events.clear()
+        if self.state != STATE_PLAYING:
+            return
+
+        if self.level is not None:
+            self.stream_chunks()
+        self.store_previous_positions()
+
+        player = self.player
+        was_on_ground = player.on_ground
+        player.update(self.platform_grid, self.width, self.height - GROUND_HEIGHT)
+        if player.on_ground and not was_on_ground:
+            self.emit("land", player.pos[0], player.y + player.height)
+        self.view.follow(*player.pos)
+
+        if inputs.left:
+            player.move_left()
+        elif inputs.right:
+            player.move_right()
+        else:
+            player.stop()
+
+        if inputs.jump and player.jump():
+            self.emit("jump", *player.pos)
+
+        player_rect = player.get_rect()
+
+        if self.virus_swarm is not None:
+            self.step_virus_swarm(player, player_rect)
+            self.step_fruit_swarm(player, player_rect)
+        else:
+            self.step_viruses(player, player_rect)
+            self.step_fruits(player, player_rect)
+
+        if player.hp <= 0:
+            self.state = STATE_GAME_OVER
+            self.log("death", *player.pos, value=self.score)
+
+        if self.score >= self.total_fruits:
+            self.state = STATE_VICTORY
+            self.log("victory", *player.pos, value=self.score)
+
+        self.tick += 1
+
+    def emit(self, kind, x, y, value=0):
+        """Report an event to the front end and the telemetry log"""
+        self.events.append((kind, x, y))
+        self.log(kind, x, y, value)
+
+    def log(self, kind, x=0.0, y=0.0, value=0):
+        """Send an event to the telemetry log only, if there is one"""
+        if self.telemetry is not None:
+            self.telemetry.log(self.tick, kind, x, y, -1 if value is None else value)
+
+    def step_viruses(self, player, player_rect):
+        """Update viruses one object at a time and check them against the player"""
+        active = self.view.culling_rect(CULL_MARGIN)
+        far_phase = self.tick % FAR_UPDATE_INTERVAL
+
+        for i, virus in enumerate(self.viruses):
+            if virus.chase:
+                continue
+            if active.colliderect(virus.rect):
+                virus.prev_pos = virus.pos
+                virus.update()
+            elif i % FAR_UPDATE_INTERVAL == far_phase:
+                virus.update_far(FAR_UPDATE_INTERVAL)
+                virus.prev_pos = virus.pos
+            else:
+                continue
+            self.virus_grid.move(virus, virus.get_rect())
+
+        if self.chasers:
+            self.step_chasers(active)
+        self.check_virus_hits(player, player_rect)
+
+    def step_chasers(self, active):
+        """Move the chasing viruses inside active toward the player"""
+        self.update_navigation()
+        routes = self.chase_routes
+        target_x = self.player.pos[0]
+        floor_y = self.height - GROUND_HEIGHT
+        for virus in self.chasers:
+            if active.colliderect(virus.rect):
+                virus.prev_pos = virus.pos
+                virus.update_chase(self.platform_grid, routes, target_x, self.width, floor_y)
+                self.virus_grid.move(virus, virus.get_rect())
+
+    def update_navigation(self):
+        """Re-plan the chasers' routes if the player stands on another node"""
+        if self.nav is None:
+            # Entities placed without a level file; its platforms never change
+            walker = self.chasers[0]
+            self.nav = NavGraph(self.platforms, self.width, self.height - GROUND_HEIGHT,
+                                walker.width, walker.height, walker.speed)
+            self.player_node = None
+
+        player = self.player
+        if player.on_ground:
+            node = player.platform or FLOOR
+        elif self.player_node is None:
+            node = self.nav.node_below(player.x, player.y)
+        else:
+            return
+        if node is not self.player_node:
+            self.player_node = node
+            self.chase_routes = self.nav.routes_to(node)
+
+    def touches(self, player, frame, center):
+        """Narrow phase for a sprite whose rect overlaps the player's: with
+        pixel_collision, whether their frame masks overlap"""
+        if self.masks is None:
+            return True
+        masks = self.masks
+        return masks_overlap(masks[player.frame], player.pos, masks[frame], center)
+
+    def check_virus_hits(self, player, player_rect):
+        """Damage the player if a virus touches it"""
+        for virus in self.virus_grid.query(player_rect):
+            if (player_rect.colliderect(virus.rect) and self.touches(player, virus.frame, virus.pos)
+                    and player.take_damage()):
+                self.emit("hit", *player.pos, value=player.hp)
+
+    def step_fruits(self, player, player_rect):
+        """Update fruits one object at a time and collect the ones touched"""
+        active = self.view.culling_rect(CULL_MARGIN)
+        far_phase = self.tick % FAR_UPDATE_INTERVAL
+
+        for i, fruit in enumerate(self.fruits):
+            if fruit.collected:
+                continue
+            if active.colliderect(fruit.rect):
+                fruit.prev_pos = fruit.pos
+                fruit.update()
+                self.fruit_grid.move(fruit, fruit.get_rect())
+            elif i % FAR_UPDATE_INTERVAL == far_phase:
+                fruit.update_far(FAR_UPDATE_INTERVAL)
+
+        self.collect_fruits(player, player_rect)
+
+    def collect_fruits(self, player, player_rect):
+        """Collect the fruits the player touches"""
+        for fruit in self.fruit_grid.query(player_rect):
+            if player_rect.colliderect(fruit.rect) and self.touches(player, fruit.frame, fruit.pos):
+                fruit.collected = True
+                self.collected_fruits.add(fruit.fruit_id)
+                self.fruit_grid.remove(fruit)
+                self.score += 1
+                self.emit("collect", *fruit.pos, value=fruit.fruit_id)
+
+    def step_virus_swarm(self, player, player_rect):
+        """Update viruses with vectorized array operations"""
+        swarm = self.virus_swarm
+        swarm.step()
+        hits = swarm.hits(player_rect).tolist()
+        if hits and self.masks is not None:
+            frames = swarm.frames()
+            hits = [i for i in hits if self.touches(player, frames[i], swarm.center(i))]
+        touched = bool(hits)
+        if self.chasers:
+            self.step_chasers(self.view.culling_rect(CULL_MARGIN))
+            touched = touched or any(player_rect.colliderect(virus.rect) and self.touches(player, virus.frame, virus.pos)
+                                     for virus in self.chasers)
+        if touched and player.take_damage():
+            self.emit("hit", *player.pos, value=player.hp)
+
+    def step_fruit_swarm(self, player, player_rect):
+        """Update fruits with vectorized array operations"""
+        swarm = self.fruit_swarm
+        swarm.step()
+        hits = swarm.hits(player_rect).tolist()
+        if hits and self.masks is not None:
+            frames = swarm.frames()
+            hits = [i for i in hits if self.touches(player, frames[i], swarm.center(i))]
+        for i in hits:
+            swarm.collect(i)
+            self.score += 1
+            fruit = swarm.fruits[i]
+            self.collected_fruits.add(fruit.fruit_id)
+            self.emit("collect", fruit.x + fruit.width // 2,
+                      fruit.y + float(swarm.float_offset[i]), value=fruit.fruit_id)
+
+    def visible_entities(self, rect):
+        """Get (fruits, viruses) in play whose rects overlap rect
+
+        Uses the collision grids (or the NumPy arrays), so the cost follows
+        what is near rect rather than the number of entities in the level.
+        """
+        if self.virus_swarm is not None:
+            viruses = self.virus_swarm.objects_in(rect)
+            viruses += [virus for virus in self.chasers if virus.rect.colliderect(rect)]
+            return self.fruit_swarm.objects_in(rect), viruses
+        return self.fruit_grid.query(rect), self.virus_grid.query(rect)
+
+    def state_hash(self):
+        """64-bit digest of the simulation state, for checking replays
+
+        Floats are hashed by their exact bits, so any divergence shows up.
+        """
+        self.sync_entities()
+        digest = hashlib.blake2b(digest_size=8)
+        player = self.player
+        digest.update(self.state.encode())
+        digest.update(struct.pack('<qqddddq', self.tick, self.score, player.x, player.y,
+                                  player.vel_x, player.vel_y, player.hp))
+        for virus in self.viruses:
+            digest.update(struct.pack('<ddb', virus.x, virus.y, virus.direction))
+        for fruit in self.fruits:
+            digest.update(struct.pack('<d?', fruit.float_phase, fruit.collected))
+        return int.from_bytes(digest.digest(), 'little')
+
+    def sync_entities(self):
+        """Refresh Virus and Fruit objects from the NumPy backend, if used"""
+        if self.virus_swarm is not None:
+            self.virus_swarm.write_back()
+            self.fruit_swarm.write_back()
@@ -1,407 +1,95 @@
+import atexit
 import math
+import os
 import random
+import time
 import pgzrun
-from pygame import Rect
+import pygame
+from pygame import Rect, Surface, SRCALPHA
+from engine.constants import WIDTH as VIEW_WIDTH, HEIGHT as VIEW_HEIGHT, TICK_RATE, MAX_TICKS_PER_FRAME
+from engine.constants import USE_NUMPY, CULL_MARGIN, PIXEL_COLLISION
+from engine.animation import Animator
+from engine.asset_cache import DecodedCache
+from engine.assets import AssetPreloader, build_manifest
+from engine.audio import AudioManager
+from engine.camera import Camera
+from engine.text import TextCache
+from engine.entities import Player
+from engine.particles import ParticlePool, BURST, SPARK, DUST
+from engine.profiler import Profiler
+from engine.render import RenderList
+from engine.scaling import ScaledView, fit_scale
+from engine.swarm import VirusSwarm, FruitSwarm
+from engine.constants import STATE_MENU, STATE_PLAYING, STATE_GAME_OVER, STATE_VICTORY
+from engine.timestep import FixedTimestep, lerp_pos
+from engine.world import World, InputState
+from engine.replay import Recording, Recorder, Replayer
+from engine.snapshot import RewindBuffer
+from engine.telemetry import TelemetryLog
 
-# Game Constants
-WIDTH = 800
-HEIGHT = 480
 TITLE = "NanoVirus Outbreak"
-GRAVITY = 0.5
-JUMP_STRENGTH = -12
-PLAYER_SPEED = 4
-
-# Game States
-STATE_MENU = "menu"
-STATE_PLAYING = "playing"
-STATE_GAME_OVER = "game_over"
-STATE_VICTORY = "victory"
 
 # Global Variables
 game_state = STATE_MENU
 sound_enabled = True
-score = 0
-total_fruits = 0
+timestep = FixedTimestep(TICK_RATE, MAX_TICKS_PER_FRAME)
+current_input = InputState(False, False, False)
+
+# Set NANOVIRUS_RECORD to save each game's input log, or NANOVIRUS_REPLAY
+# to play one back (see engine/replay.py)
+RECORD_PATH = os.environ.get("NANOVIRUS_RECORD")
+REPLAY_PATH = os.environ.get("NANOVIRUS_REPLAY")
+recorder = None
+replayer = None
+
+# Holding R steps the game back through the last few seconds; off while
+# recording or replaying, since it would break the input log
+rewind_buffer = None
+rewind_held = False
+
+# Set NANOVIRUS_TELEMETRY to a file path to log gameplay events (jumps,
+# hits, fruits, deaths, frame times) there from a background thread; see
+# engine/telemetry.py
+TELEMETRY_PATH = os.environ.get("NANOVIRUS_TELEMETRY")
+telemetry = None
+if TELEMETRY_PATH:
+    telemetry = TelemetryLog(TELEMETRY_PATH)
+    telemetry.start()
+    atexit.register(telemetry.close)
+
+# NANOVIRUS_SCALE draws the game bigger: a factor such as "2" or "1.5",
+# or "auto" to fill the display. Sprites are kept sharp unless
+# NANOVIRUS_SMOOTH=1. The game itself always works in VIEW_WIDTH x
+# VIEW_HEIGHT logical coordinates; WIDTH and HEIGHT are the window's.
+# Anything else falls back to 1 with a warning.
+SCALE_SETTING = os.environ.get("NANOVIRUS_SCALE", "1")
+SMOOTH_SCALE = os.environ.get("NANOVIRUS_SMOOTH") == "1"
+if SCALE_SETTING == "auto":
+    window_scale = fit_scale(pygame.display.get_desktop_sizes()[0], SMOOTH_SCALE)
+else:
+    try:
+        window_scale = float(SCALE_SETTING)
+    except ValueError:
+        window_scale = math.nan
+    if not (window_scale > 0 and math.isfinite(window_scale)):
+        print(f"NANOVIRUS_SCALE={SCALE_SETTING!r} is not a positive number or \"auto\"; using 1")
+        window_scale = 1
+view = ScaledView(window_scale, SMOOTH_SCALE)
+WIDTH, HEIGHT = view.window_size
 
+# Frame profiler: F3 shows the overlay (and starts recording), F4 saves a
+# Chrome trace, F5 saves CSV. While off, the timed functions run unwrapped.
+profiler = Profiler()
 
-class Player:
-    """Player character - micro robot with sprite animation"""
-    
-    def __init__(self, x, y):
-        self.actor = Actor('player/idle/idle_1')
-        self.x = x
-        self.y = y
-        self.width = self.actor.width
-        self.height = self.actor.height
-        self.actor.pos = (self.x + self.width // 2, self.y + self.height // 2)
-        self.vel_x = 0
-        self.vel_y = 0
-        self.on_ground = False
-        self.hp = 3
-        self.max_hp = 3
-        self.hit_timer = 0
-        self.state = "idle"
-        self.facing_right = True
-        self.animation_frame = 0
-        self.animation_timer = 0
-        self.idle_frames = 11
-        self.run_frames = 12
-        self.fall_frames = 1
-        self.jump_frames = 5
-        self.hit_frames = 5
-        
-        # Animation images (right-facing)
-        self.idle_images_right = [f'player/idle/idle_{i}' for i in range(1, 12)]
-        self.run_images_right = [f'player/run/run_{i}' for i in range(1, 13)]
-        self.jump_images_right = [f'player/wall_jump/wall_jump{i}_left' for i in range(5, 0, -1)]
-        self.fall_image_right = 'player/fall/player_fall'
-        self.hit_images_right = [f'player/hit/hit_{i}' for i in range(1, 6)]
-        
-        # Animation images (left-facing)
-        self.idle_images_left = [f'player/idle/idle_{i}_left' for i in range(1, 12)]
-        self.run_images_left = [f'player/run/run_{i}_left' for i in range(1, 13)]
-        self.jump_images_left = [f'player/wall_jump/wall_jump{i}' for i in range(5, 0, -1)]
-        self.fall_image_left = 'player/fall/player_fall_left'
-        self.hit_images_left = [f'player/hit/hit_{i}_left' for i in range(1, 6)]
-        
-    def update(self, platforms):
-        """Update player physics and animation"""
-        if not self.on_ground:
-            self.vel_y += GRAVITY
-            
-        self.x += self.vel_x
-        self.y += self.vel_y
-        
-        self.on_ground = False
-        
-        # Ground collision
-        if self.y >= HEIGHT - 80:
-            self.y = HEIGHT - 80
-            self.vel_y = 0
-            self.on_ground = True
-        
-        # Platform collision
-        player_rect = self.get_rect()
-        
-        for platform in platforms:
-            if (player_rect.bottom > platform.rect.top and 
-                player_rect.top < platform.rect.bottom):
-                
-                # Landing on platform
-                if (self.vel_y >= 0 and
-                    player_rect.bottom <= platform.rect.centery and
-                    player_rect.bottom > platform.rect.top - 10):
-                    
-                    if (player_rect.right > platform.rect.left + 5 and
-                        player_rect.left < platform.rect.right - 5):
-                        
-                        self.y = platform.rect.top - self.height + 1
-                        self.vel_y = 0
-                        self.on_ground = True
-                        break
-                
-                # Hitting bottom of platform
-                elif (self.vel_y < 0 and
-                      player_rect.top >= platform.rect.bottom - 5 and
-                      player_rect.right > platform.rect.left + 10 and
-                      player_rect.left < platform.rect.right - 10):
-                    
-                    self.y = platform.rect.bottom
-                    self.vel_y = 0
-            
-        # Screen boundaries
-        if self.x < 0:
-            self.x = 0
-        if self.x > WIDTH - self.width:
-            self.x = WIDTH - self.width
-            
-        # Update hit timer
-        if self.hit_timer > 0:
-            self.hit_timer -= 1
-            
-        # Update state based on velocity
-        if self.state != "hit":
-            if not self.on_ground:
-                if self.vel_y < -1:
-                    self.state = "jump"
-                elif self.vel_y > 1:
-                    self.state = "fall"
-            else:
-                if abs(self.vel_x) > 0.1:
-                    self.state = "walk"
-                else:
-                    self.state = "idle"
-        
-        self.actor.pos = (self.x + self.width // 2, self.y + self.height // 2)
-        
-        # Update animation
-        self.animation_timer += 1
-        if self.state == "walk":
-            anim_speed = 5
-        elif self.state == "jump":
-            anim_speed = 3
-        elif self.state == "hit":
-            anim_speed = 6
-        else:
-            anim_speed = 4
-        
-        if self.animation_timer >= anim_speed:
-            self.animation_timer = 0
-            if self.state == "walk":
-                self.animation_frame = (self.animation_frame + 1) % self.run_frames
-                if self.facing_right:
-                    self.actor.image = self.run_images_right[self.animation_frame]
-                else:
-                    self.actor.image = self.run_images_left[self.animation_frame]
-            elif self.state == "fall":
-                self.animation_frame = 0
-                if self.facing_right:
-                    self.actor.image = self.fall_image_right
-                else:
-                    self.actor.image = self.fall_image_left
-            elif self.state == "jump":
-                self.animation_frame = (self.animation_frame + 1) % self.jump_frames
-                if self.facing_right:
-                    self.actor.image = self.jump_images_right[self.animation_frame]
-                else:
-                    self.actor.image = self.jump_images_left[self.animation_frame]
-            elif self.state == "hit":
-                if self.animation_frame < self.hit_frames - 1:
-                    self.animation_frame += 1
-                else:
-                    self.state = "idle"
-                    self.animation_frame = 0
-                if self.facing_right:
-                    self.actor.image = self.hit_images_right[self.animation_frame]
-                else:
-                    self.actor.image = self.hit_images_left[self.animation_frame]
-            else:
-                self.animation_frame = (self.animation_frame + 1) % self.idle_frames
-                if self.facing_right:
-                    self.actor.image = self.idle_images_right[self.animation_frame]
-                else:
-                    self.actor.image = self.idle_images_left[self.animation_frame]
-            
-    def move_left(self):
-        """Move player left"""
-        self.vel_x = -PLAYER_SPEED
-        self.facing_right = False
-            
-    def move_right(self):
-        """Move player right"""
-        self.vel_x = PLAYER_SPEED
-        self.facing_right = True
-            
-    def stop(self):
-        """Stop horizontal movement"""
-        self.vel_x = 0
-            
-    def jump(self):
-        """Make player jump"""
-        if self.on_ground:
-            self.vel_y = JUMP_STRENGTH
-            self.on_ground = False
-            self.state = "jump"
-            self.animation_frame = 0
-            if sound_enabled:
-                try:
-                    sounds.jump.play()
-                except:
-                    pass
-                
-    def take_damage(self):
-        """Player takes damage"""
-        if self.hit_timer == 0:
-            self.hp -= 1
-            self.hit_timer = 60
-            self.state = "hit"
-            self.animation_frame = 0
-            if sound_enabled:
-                try:
-                    sounds.hit.play()
-                except:
-                    pass
-                
-    def get_rect(self):
-        """Get player collision rectangle"""
-        return Rect(self.x, self.y, self.width, self.height)
-        
-    def draw(self):
-        """Draw player with hit effect"""
-        if self.hit_timer > 0 and (self.hit_timer // 2) % 2 == 0:
-            self.actor.draw()
-            screen.draw.rect(
-                Rect(self.x-2, self.y-2, self.width+4, self.height+4),
-                (255, 0, 0)
-            )
-        else:
-            self.actor.draw()
+# Rendered strings, so static and rarely changing text is rasterized once
+text_cache = TextCache(scale=view.scale)
 
 
-class Virus:
-    """Enemy virus with animated movement"""
-    
-    def __init__(self, x, y, left_bound, right_bound):
-        self.x = x
-        self.y = y
-        # Carrega os frames de animação
-        self.idle_frames = [f'virus/corona_idle{i}' for i in range(1, 5)]
-        self.hit_frames = [f'virus/corona_hit{i}' for i in range(1, 5)]
-        
-        self.actor = Actor(self.idle_frames[0])
-        self.width = self.actor.width
-        self.height = self.actor.height
-        self.actor.pos = (self.x + self.width//2, self.y + self.height//2)
-        self.left_bound = left_bound
-        self.right_bound = right_bound
-        self.speed = 1.5
-        self.direction = 1
-        self.animation_frame = 0
-        self.animation_timer = 0
-        self.hit_timer = 0
-        self.hit = False
-        
-    def update(self):
-        """Atualiza o movimento e animação do vírus"""
-        self.x += self.speed * self.direction
-        
-        if self.x <= self.left_bound or self.x >= self.right_bound:
-            self.direction *= -1
-            
-        # Atualiza a posição
-        self.actor.pos = (self.x + self.width//2, self.y + self.height//2)
-        
-        # Atualiza a animação
-        self.animation_timer += 1
-        if self.animation_timer >= 8:  # Muda o frame a cada 8 atualizações
-            self.animation_timer = 0
-            self.animation_frame = (self.animation_frame + 1) % 4  # 4 frames de animação
-            
-            # Define qual frame mostrar com base no estado (hit ou idle)
-            if self.hit:
-                self.actor.image = self.hit_frames[self.animation_frame]
-                self.hit_timer += 1
-                if self.hit_timer > 10:  # Mostra animação de hit por 10 frames
-                    self.hit = False
-                    self.hit_timer = 0
-            else:
-                self.actor.image = self.idle_frames[self.animation_frame]
-        
-        # Inverte o sprite baseado na direção
-        self.actor.flip_x = self.direction < 0
-            
-    def get_rect(self):
-        """Get virus collision rectangle"""
-        return Rect(self.x, self.y, self.width, self.height)
-        
-    def draw(self):
-        """Draw virus with animation"""
-        self.actor.draw()
-
-
-class Fruit:
-    """Collectible fruit with floating and rotating animation"""
-    
-    def __init__(self, x, y, fruit_type='banana'):
-        self.x = x
-        self.y = y
-        self.fruit_type = fruit_type
-        self.collected = False
-        
-        self.animation_frame = 0
-        self.animation_timer = 0
-        self.animation_speed = 6
-        
-        self.images = [f'fruits/banana/banana_{i}' for i in range(1, 5)]
-        
-        if self.images:
-            self.actor = Actor(self.images[0])
-            self.width = self.actor.width
-            self.height = self.actor.height
-            self.actor.pos = (x + self.width//2, y + self.height//2)
-        
-        self.float_offset = 0
-        self.float_speed = 0.1
-        self.float_distance = 3
-        self.float_phase = random.uniform(0, 6.28)
-        
-    def update(self):
-        """Update fruit animation"""
-        if self.collected:
-            return
-            
-        self.float_phase += self.float_speed
-        self.float_offset = math.sin(self.float_phase) * self.float_distance
-        
-        self.animation_timer += 1
-        if self.animation_timer >= self.animation_speed:
-            self.animation_timer = 0
-            self.animation_frame = (self.animation_frame + 1) % len(self.images)
-        
-        if hasattr(self, 'actor'):
-            self.actor.y = self.y + self.float_offset
-            self.actor.image = self.images[self.animation_frame]
-        
-    def get_rect(self):
-        """Get fruit collision rectangle"""
-        hitbox_padding = 4
-        return Rect(
-            self.x + hitbox_padding, 
-            self.y + hitbox_padding + self.float_offset,
-            self.width - 2 * hitbox_padding, 
-            self.height - 2 * hitbox_padding
-        )
-        
-    def draw(self):
-        """Draw fruit with animation"""
-        if self.collected:
-            return
-            
-        if hasattr(self, 'actor'):
-            self.actor.draw()
-        else:
-            y_pos = self.y + self.float_offset
-            screen.draw.filled_circle(
-                (self.x + self.width//2, y_pos + self.height//2), 
-                self.width//2, 
-                (255, 255, 0)
-            )
-            screen.draw.filled_rect(
-                Rect(
-                    self.x + self.width//2 - 2, 
-                    y_pos + 2, 
-                    4, 
-                    8
-                ), 
-                (139, 69, 19)
-            )
-
-
-class Platform:
-    """Platform for player to stand on"""
-    
-    def __init__(self, x, y, width, height, color="brown"):
-        self.x = x
-        self.y = y
-        self.width = width
-        self.height = height
-        self.color = color
-        self.rect = Rect(x, y, width, height)
-        
-        try:
-            self.actor = Actor('plataforms/plataform_on')
-            self.actor.pos = (x + width//2, y + height//2)
-            self.has_image = True
-        except:
-            self.has_image = False
-        
-    def draw(self):
-        """Draw platform"""
-        if hasattr(self, 'actor') and self.actor:
-            self.actor.draw()
-        else:
-            screen.draw.filled_rect(self.rect, self.color)
-            screen.draw.rect(self.rect, "black")
+def draw_text(text, fontsize, color, **anchor):
+    """Blit cached text, placed with a Rect anchor such as center=(x, y)"""
+    surface = text_cache.get(text, fontsize, color)
+    anchor = {name: view.point(pos) for name, pos in anchor.items()}
+    screen.blit(surface, surface.get_rect(**anchor))
 
 
 class Button:
@@ -418,152 +106,410 @@ class Button:
         
     def draw(self):
         """Draw button"""
+        rect = view.rect(self.rect)
         color = (80, 80, 100) if self.hovered else (50, 50, 70)
-        screen.draw.filled_rect(self.rect, color)
+        screen.draw.filled_rect(rect, color)
         border_color = "#00ff88" if self.hovered else "#646478"
-        screen.draw.rect(self.rect, border_color)
-        screen.draw.text(self.text, center=(self.rect.centerx, self.rect.centery), 
-                        color="white", fontsize=24)
+        screen.draw.rect(rect, border_color)
+        draw_text(self.text, 24, "white", center=self.rect.center)
         
     def is_clicked(self, mouse_pos):
         """Check if button is clicked"""
         return self.rect.collidepoint(mouse_pos)
 
 
+class Hud:
+    """HP and energy overlay, redrawn only when the numbers change"""
+    
+    def __init__(self):
+        self.surface = Surface(view.point((VIEW_WIDTH, 64)), SRCALPHA)
+        self.values = None
+        
+    def update(self, player, score, total_fruits):
+        """Re-render the overlay if any displayed value changed"""
+        values = (player.hp, player.max_hp, score, total_fruits)
+        if values == self.values:
+            return
+        self.values = values
+        
+        surface = self.surface
+        surface.fill((0, 0, 0, 0))
+        hp_text = text_cache.get(f"HP: {player.hp}/{player.max_hp}", 30, "white")
+        surface.blit(hp_text, hp_text.get_rect(topleft=view.point((10, 10))))
+        energy_text = text_cache.get(f"Energy: {score}/{total_fruits}", 30, "white")
+        surface.blit(energy_text, energy_text.get_rect(topright=view.point((VIEW_WIDTH - 10, 10))))
+        
+        for i in range(player.max_hp):
+            color = "red" if i < player.hp else "gray"
+            pygame.draw.circle(surface, color, view.point((30 + i * 40, 50)), view.length(12))
+            
+    def draw(self):
+        """Queue the overlay; it is only redrawn when its numbers change"""
+        render_list.add(self.surface, (0, 0), Z_HUD, self.values)
+
+
+class ProfilerOverlay:
+    """Frame-time graph and per-scope averages from the profiler"""
+    
+    GRAPH_HEIGHT = 60
+    GRAPH_MS = 33.3
+    TEXT_REFRESH_FRAMES = 30
+    ROWS = 8
+    
+    def __init__(self):
+        self.rect = view.rect((VIEW_WIDTH - 250, 70, 240, 100 + self.ROWS * 16))
+        self.text = Surface(self.rect.size, SRCALPHA)
+        self.frames_until_refresh = 0
+        # Last line of the panel, e.g. where a profile was saved
+        self.notice = ""
+        
+    def refresh_text(self):
+        """Re-render the averages table"""
+        font = text_cache.font(16)
+        self.text.fill((0, 0, 0, 0))
+        frame_times = profiler.frame_times
+        if frame_times:
+            average = sum(frame_times) / len(frame_times) * 1000
+            worst = max(frame_times) * 1000
+            header = f"frame {average:5.2f} ms  max {worst:5.2f} ms"
+        else:
+            header = "frame --"
+        self.text.blit(font.render(header, True, (255, 255, 255)), view.point((6, self.GRAPH_HEIGHT + 12)))
+        
+        rows = profiler.scope_averages()[:self.ROWS]
+        for i, (name, ms, calls) in enumerate(rows):
+            line = f"{name[:16]:16} {ms:6.3f} ms x{calls:.0f}"
+            self.text.blit(font.render(line, True, (200, 200, 200)),
+                           view.point((6, self.GRAPH_HEIGHT + 30 + i * 16)))
+        if self.notice:
+            self.text.blit(font.render(self.notice, True, (0, 255, 136)),
+                           view.point((6, self.GRAPH_HEIGHT + 30 + self.ROWS * 16)))
+            
+    def show_notice(self, text):
+        """Put text on the panel's last line from the next frame on"""
+        self.notice = text
+        self.frames_until_refresh = 0
+            
+    def draw(self):
+        """Draw the panel; the graph is live, the table refreshes twice a second"""
+        if self.frames_until_refresh <= 0:
+            self.refresh_text()
+            self.frames_until_refresh = self.TEXT_REFRESH_FRAMES
+        self.frames_until_refresh -= 1
+        
+        rect = self.rect
+        surface = screen.surface
+        surface.fill((0, 0, 0), rect)
+        margin = view.length(6)
+        graph_height = view.length(self.GRAPH_HEIGHT)
+        bottom = rect.top + margin + graph_height
+        budget = bottom - int(1000 / TICK_RATE / self.GRAPH_MS * graph_height)
+        pygame.draw.line(surface, (80, 80, 80), (rect.left + margin, budget), (rect.right - margin, budget))
+        
+        frame_times = list(profiler.frame_times)[-(rect.width - 2 * margin):]
+        for i, frame_time in enumerate(frame_times):
+            ms = frame_time * 1000
+            height = min(ms / self.GRAPH_MS, 1.0) * graph_height
+            if ms < 1000 / TICK_RATE:
+                color = (0, 255, 136)
+            elif ms < self.GRAPH_MS:
+                color = (255, 220, 0)
+            else:
+                color = (255, 60, 60)
+            x = rect.left + margin + i
+            pygame.draw.line(surface, color, (x, bottom), (x, bottom - height))
+        
+        screen.blit(self.text, rect.topleft)
+
+
 # Game Objects
-player = None
-viruses = []
-fruits = []
+world = None
 buttons = []
-platforms = []
+hud = Hud()
+profiler_overlay = ProfilerOverlay()
+
+# Images, sounds, fonts and levels are decoded by a background thread
+# while the menu shows; the game starts once it is done. Decoded images
+# and sounds are kept in .cache/ so later launches skip the decoding.
+preloader = AssetPreloader(build_manifest(font_scale=view.scale, masks=PIXEL_COLLISION), DecodedCache())
+assets = preloader.assets
+assets_ready = False
+
+# Sound effects on a fixed channel pool, plus the looping music track
+audio = AudioManager(assets.sounds)
+
+# Every sprite frame, cut from one atlas image by the preloader, and the
+# same frames scaled once to the window's scale
+sprite_atlas = None
+frames = None
+
+# Hit sparks, pickup bursts and landing dust, within a fixed particle budget
+particles = ParticlePool()
+
+# World event: (particle kind, count, speed, lifetime in ticks, spread angle)
+EVENT_EFFECTS = {
+    "collect": (BURST, 16, 3.0, 30, math.tau),
+    "hit": (SPARK, 12, 4.5, 20, math.tau),
+    "land": (DUST, 6, 1.5, 18, math.pi),
+}
+
+# Follows the interpolated player; world sprites are drawn relative to it
+camera = None
+
+# Background and platforms pre-rendered, rebuilt when world geometry changes.
+# On levels bigger than the screen only the background is in static_layer
+# and platforms are baked into world-space tiles, built as they scroll in.
+static_layer = None
+static_layer_version = None
+PLATFORM_TILE_SIZE = 512
+platform_tiles = {}
+
+# Game sprites go through one z-sorted render list. While the camera
+# stays put only the rectangles that changed are redrawn, restored from
+# background_layer, and pygame.display.flip() (which pgzero calls after
+# every draw()) presents just those rectangles.
+Z_FRUIT = 1
+Z_VIRUS = 2
+Z_PLAYER = 3
+Z_PARTICLES = 4
+Z_HUD = 5
+render_list = RenderList(view.window_size)
+pygame.display.flip = render_list.present
+background_layer = None
+background_pos = None
+camera_pos = None
+hit_outline = None
 
 
 def init_menu():
     """Initialize menu"""
     global buttons
     buttons = [
-        Button(WIDTH // 2 - 80, 280, 160, 50, "Start"),
-        Button(WIDTH // 2 - 80, 350, 160, 50, "Sound"),
-        Button(WIDTH // 2 - 80, 420, 160, 50, "Exit")
+        Button(VIEW_WIDTH // 2 - 80, 280, 160, 50, "Start"),
+        Button(VIEW_WIDTH // 2 - 80, 350, 160, 50, "Sound"),
+        Button(VIEW_WIDTH // 2 - 80, 420, 160, 50, "Exit")
     ]
 
 
-def init_game():
-    """Initialize game level"""
-    global player, viruses, fruits, score, total_fruits, platforms
+def init_game(level=None):
+    """Initialize game level (a packed LevelFile, or the stock level)"""
+    global world, sprite_atlas, frames, camera, recorder, replayer, rewind_buffer
     
-    player = Player(50, HEIGHT - 300)
+    if sprite_atlas is None:
+        if assets.atlas is None:
+            reasons = [error for kind, _name, error in preloader.failed if kind == 'atlas']
+            raise SystemExit(f"Cannot start: the sprite atlas did not load ({'; '.join(reasons) or 'not loaded yet'})")
+        sprite_atlas = assets.atlas
+        frames = view.surfaces(sprite_atlas.frames)
+    if level is None:
+        level = assets.levels.get('level1')
     
-    platforms = [
-        Platform(100, HEIGHT - 150, 100, 20, "brown"),
-        Platform(300, HEIGHT - 200, 100, 20, "peru"),
-        Platform(500, HEIGHT - 250, 100, 20, "chocolate"),
-        Platform(200, HEIGHT - 300, 100, 20, "darkolivegreen"),
-        Platform(400, HEIGHT - 350, 100, 20, "brown"),
-        Platform(600, HEIGHT - 400, 100, 20, "peru"),
-        Platform(150, HEIGHT - 450, 150, 20, "sienna"),
-        Platform(400, HEIGHT - 500, 150, 20, "chocolate"),
-    ]
+    if REPLAY_PATH:
+        recording = Recording.load(REPLAY_PATH)
+        replayer = Replayer(recording)
+        world = World(use_numpy=recording.use_numpy, seed=recording.seed,
+                      pixel_collision=recording.pixel_collision,
+                      masks=sprite_atlas.masks() if recording.pixel_collision else None)
+    else:
+        world = World(use_numpy=USE_NUMPY, seed=random.randrange(1 << 32),
+                      pixel_collision=PIXEL_COLLISION, masks=sprite_atlas.masks() if PIXEL_COLLISION else None)
+    world.telemetry = telemetry
+    if level is not None:
+        world.load_level(level)
+    else:
+        world.load_default_level()
+    recorder = Recorder(world) if RECORD_PATH else None
+    if recorder is None and replayer is None:
+        rewind_buffer = RewindBuffer()
+        rewind_buffer.push(world)
+    camera = Camera(VIEW_WIDTH, VIEW_HEIGHT, world.width, world.height)
+    camera.follow(*world.player.pos)
     
-    # Criando vírus em cima das plataformas
-    # Ajustando a posição Y para que fiquem acima das plataformas
-    virus_height = 55  # Aumentado para posicionar os vírus mais acima
-    viruses = [
-        # Vírus na primeira plataforma (y = HEIGHT - 150 - altura do vírus - ajuste fino)
-        Virus(150, HEIGHT - 150 - virus_height, 100, 200),  # Plataforma 1
-        # Vírus na segunda plataforma
-        Virus(350, HEIGHT - 200 - virus_height, 300, 400),  # Plataforma 2
-        # Vírus na terceira plataforma
-        Virus(550, HEIGHT - 250 - virus_height, 500, 600),  # Plataforma 3
-        # Vírus na quarta plataforma
-        Virus(250, HEIGHT - 300 - virus_height, 200, 300),  # Plataforma 4
-        # Vírus na quinta plataforma
-        Virus(450, HEIGHT - 350 - virus_height, 400, 500)   # Plataforma 5
-    ]
+    timestep.reset()
+    particles.clear()
+    build_static_layer()
+
+
+def build_static_layer():
+    """Composite the background and all platforms into one cached surface"""
+    global static_layer, static_layer_version, background_pos
+    layer = Surface(view.window_size).convert()
+    bg = assets.images.get('other/fundinho')
+    if bg is not None:
+        bg = view.surface(bg)
+        layer.blit(bg, bg.get_rect(center=(WIDTH // 2, HEIGHT // 2)))
+    else:
+        layer.fill("#1a1a2e")
     
-    fruits = [
-        Fruit(140, HEIGHT - 80),
-        Fruit(340, HEIGHT - 130),
-        Fruit(540, HEIGHT - 180),
-        Fruit(240, HEIGHT - 230),
-        Fruit(440, HEIGHT - 280),
-        Fruit(640, HEIGHT - 330),
-        Fruit(225, HEIGHT - 380),
-        Fruit(475, HEIGHT - 430)
-    ]
+    if not camera.scrolls:
+        for platform in world.platforms:
+            image = frames[platform.frame]
+            layer.blit(image, image.get_rect(center=view.point(platform.pos)))
     
-    score = 0
-    total_fruits = len(fruits)
-
-
-def update():
+    platform_tiles.clear()
+    background_pos = None
+    static_layer = layer
+    static_layer_version = world.geometry_version
+
+
+def platform_tile(tx, ty):
+    """Get the cached surface with the platforms of one world-space tile"""
+    tile = platform_tiles.get((tx, ty))
+    if tile is None:
+        size = PLATFORM_TILE_SIZE
+        area = Rect(tx * size, ty * size, size, size)
+        tile = Surface(view.point((size, size)), SRCALPHA).convert_alpha()
+        # Platform sprites can overhang their collision rect a little
+        for platform in world.platform_grid.query(area.inflate(2 * CULL_MARGIN, 2 * CULL_MARGIN)):
+            image = frames[platform.frame]
+            x, y = platform.pos
+            tile.blit(image, image.get_rect(center=view.point((x - area.x, y - area.y))))
+        platform_tiles[(tx, ty)] = tile
+    return tile
+
+
+def draw_platform_tiles(target):
+    """Blit the platform tiles that overlap the camera view"""
+    size = PLATFORM_TILE_SIZE
+    visible = camera.view
+    for ty in range(visible.top // size, (visible.bottom - 1) // size + 1):
+        for tx in range(visible.left // size, (visible.right - 1) // size + 1):
+            target.blit(platform_tile(tx, ty), view.point((tx * size - camera.x, ty * size - camera.y)))
+
+
+def get_background_layer():
+    """The background as seen from the current camera position"""
+    global background_layer, background_pos
+    if not camera.scrolls:
+        return static_layer
+    if background_layer is None:
+        background_layer = Surface(view.window_size).convert()
+    if background_pos != (camera.x, camera.y):
+        background_layer.blit(static_layer, (0, 0))
+        draw_platform_tiles(background_layer)
+        background_pos = (camera.x, camera.y)
+    return background_layer
+
+
+def draw_entity(entity, alpha, z=Z_VIRUS):
+    """Queue an entity's atlas frame centered on its interpolated position"""
+    image = frames[entity.frame]
+    x, y = camera.to_screen(*lerp_pos(entity.prev_pos, entity.pos, alpha))
+    left, top = view.point((x, y))
+    render_list.add(image, (left - image.get_width() / 2, top - image.get_height() / 2), z)
+    return x, y
+
+
+def draw_player(player, alpha):
+    """Draw player with hit effect"""
+    global hit_outline
+    x, y = draw_entity(player, alpha, Z_PLAYER)
+    if player.hit_timer > 0 and (player.hit_timer // 2) % 2 == 0:
+        if hit_outline is None:
+            hit_outline = Surface(view.point((player.width + 4, player.height + 4)), SRCALPHA)
+            pygame.draw.rect(hit_outline, (255, 0, 0), hit_outline.get_rect(), view.length(1))
+        render_list.add(hit_outline, view.point((x - player.width // 2 - 2, y - player.height // 2 - 2)), Z_PLAYER)
+
+
+def play_sound(name):
+    """Queue a sound effect; the audio manager plays it at the end of the frame"""
+    audio.play(name)
+
+
+def step_world():
+    """Run one fixed simulation tick"""
+    global game_state
+    
+    if game_state != STATE_PLAYING:
+        return
+    
+    if rewind_held and rewind_buffer is not None:
+        rewind_buffer.rewind(world)
+        particles.step()
+        return
+    
+    if replayer is not None:
+        if replayer.finished:
+            return
+        inputs = replayer.next_input()
+    else:
+        inputs = current_input
+    
+    world.step(inputs)
+    if rewind_buffer is not None:
+        rewind_buffer.push(world)
+    if replayer is not None:
+        replayer.check(world)
+    if recorder is not None:
+        recorder.record(world, inputs)
+    
+    particles.step()
+    for kind, x, y in world.events:
+        play_sound(kind)
+        effect = EVENT_EFFECTS.get(kind)
+        if effect is not None:
+            particle_kind, count, speed, life, spread = effect
+            particles.emit(particle_kind, x, y, count, speed, life, spread)
+        
+    if world.state != STATE_PLAYING:
+        game_state = world.state
+        if telemetry is not None:
+            telemetry.frame_summary(world.tick)
+        if recorder is not None:
+            recorder.save(RECORD_PATH)
+
+
+def update(dt):
     """Main update function"""
-    global game_state, sound_enabled
+    global current_input, rewind_held, assets_ready
+    
+    profiler.start_frame()
+    started = profiler.begin()
     
     if game_state == STATE_MENU:
         mouse_pos = (0, 0)
         for button in buttons:
             button.update(mouse_pos)
+        if not assets_ready:
+            if preloader.done:
+                assets_ready = True
+                text_cache.add_fonts(assets.fonts)
+                buttons[0].text = "Start"
+            else:
+                buttons[0].text = f"Loading {int(preloader.progress * 100)}%"
             
     elif game_state == STATE_PLAYING:
-        player.update(platforms)
+        current_input = InputState(
+            left=keyboard.left,
+            right=keyboard.right,
+            jump=keyboard.space or keyboard.up,
+        )
+        rewind_held = keyboard.r
+        timestep.advance(dt, step_world)
+        if telemetry is not None:
+            telemetry.frame(dt)
         
-        if keyboard.left:
-            player.move_left()
-        elif keyboard.right:
-            player.move_right()
-        else:
-            player.stop()
-            
-        if keyboard.space or keyboard.up:
-            player.jump()
-            
-        for virus in viruses:
-            virus.update()
-            if player.get_rect().colliderect(virus.get_rect()):
-                player.take_damage()
-                
-        for fruit in fruits:
-            if not fruit.collected:
-                fruit.update()
-                if player.get_rect().colliderect(fruit.get_rect()):
-                    fruit.collected = True
-                    global score
-                    score += 1
-                    if sound_enabled:
-                        try:
-                            sounds.collect.play()
-                        except:
-                            pass
-                        
-        if player.hp <= 0:
-            game_state = STATE_GAME_OVER
-            
-        if score >= total_fruits:
-            game_state = STATE_VICTORY
-
-
-def on_music_end():
-    """Called when music ends - restart it if sound is enabled"""
-    if sound_enabled:
-        try:
-            music.play('back')
-        except:
-            pass
+    audio.update(dt)
+    profiler.end("update", started)
 
 
 def draw():
     """Main draw function"""
-    screen.clear()
-    
-    if game_state == STATE_MENU:
-        draw_menu()
-    elif game_state == STATE_PLAYING:
+    if game_state == STATE_PLAYING:
         draw_game()
-    elif game_state == STATE_GAME_OVER:
-        draw_game_over()
-    elif game_state == STATE_VICTORY:
-        draw_victory()
+    else:
+        # Every other screen is drawn and presented whole
+        render_list.invalidate()
+        if game_state == STATE_MENU:
+            draw_menu()
+        elif game_state == STATE_GAME_OVER:
+            draw_game_over()
+        elif game_state == STATE_VICTORY:
+            draw_victory()
+        
+    if profiler.enabled:
+        profiler_overlay.draw()
+        render_list.invalidate()
 
 
 def draw_menu():
@@ -571,111 +517,98 @@ def draw_menu():
     screen.fill("#1a1a2e")
     
     title = "NanoVirus Outbreak"
-    screen.draw.text(title, center=(WIDTH // 2 + 3, 83), color="black", fontsize=60)
-    screen.draw.text(title, center=(WIDTH // 2, 80), color="#00ff88", fontsize=60)
+    draw_text(title, 60, "black", center=(VIEW_WIDTH // 2 + 3, 83))
+    draw_text(title, 60, "#00ff88", center=(VIEW_WIDTH // 2, 80))
     
-    screen.draw.text("Escape viruses and collect bananas!", 
-                    center=(WIDTH // 2, 160), color="#ffffff", fontsize=28)
+    draw_text("Escape viruses and collect bananas!", 28, "#ffffff", center=(VIEW_WIDTH // 2, 160))
     
-    screen.draw.line((WIDTH // 2 - 200, 190), (WIDTH // 2 + 200, 190), "#00ff88")
-    screen.draw.line((WIDTH // 2 - 200, 192), (WIDTH // 2 + 200, 192), "#00ff88")
+    for y in (190, 192):
+        pygame.draw.line(screen.surface, "#00ff88", view.point((VIEW_WIDTH // 2 - 200, y)),
+                         view.point((VIEW_WIDTH // 2 + 200, y)), view.length(1))
     
-    screen.draw.text("Use ARROWS to move", center=(WIDTH // 2, 220), 
-                    color="#aaaaaa", fontsize=20)
-    screen.draw.text("SPACE to jump", center=(WIDTH // 2, 245), 
-                    color="#aaaaaa", fontsize=20)
+    draw_text("Use ARROWS to move", 20, "#aaaaaa", center=(VIEW_WIDTH // 2, 220))
+    draw_text("SPACE to jump", 20, "#aaaaaa", center=(VIEW_WIDTH // 2, 245))
     
     for button in buttons:
         button.draw()
         
     sound_status = "ON" if sound_enabled else "OFF"
-    screen.draw.text(f"Sound: {sound_status}", bottomleft=(15, HEIGHT - 15), 
-                    color="#00ff88", fontsize=22)
+    draw_text(f"Sound: {sound_status}", 22, "#00ff88", bottomleft=(15, VIEW_HEIGHT - 15))
+    
+    if not assets_ready:
+        screen.draw.filled_rect(view.rect((0, VIEW_HEIGHT - 4, int(VIEW_WIDTH * preloader.progress), 4)), "#00ff88")
 
 
 def draw_game():
     """Draw game screen"""
-    screen.clear()
+    global camera_pos
+    player = world.player
+    alpha = timestep.alpha
+    camera.follow(*lerp_pos(player.prev_pos, player.pos, alpha))
     
-    # Draw background
-    try:
-        bg = Actor('other/fundinho')
-        bg.pos = (WIDTH // 2, HEIGHT // 2)
-        bg.draw()
-    except:
-        screen.fill("#1a1a2e")
-    
-    for platform in platforms:
-        platform.draw()
+    # Background and platforms only change when level chunks stream in or
+    # out, so they are blitted from cached surfaces. The whole screen is
+    # only redrawn when they change or the camera moves.
+    if static_layer is None or static_layer_version != world.geometry_version:
+        build_static_layer()
+        render_list.invalidate()
+    if camera_pos != (camera.x, camera.y):
+        camera_pos = (camera.x, camera.y)
+        render_list.invalidate()
+    if render_list.full:
+        screen.blit(static_layer, (0, 0))
+        if camera.scrolls:
+            draw_platform_tiles(screen.surface)
+        background = None
+    else:
+        background = get_background_layer()
     
+    # Only sprites near the view are looked up and drawn
+    fruits, viruses = world.visible_entities(camera.culling_rect(CULL_MARGIN))
     for fruit in fruits:
-        fruit.draw()
+        draw_entity(fruit, alpha, Z_FRUIT)
         
     for virus in viruses:
-        virus.draw()
+        draw_entity(virus, alpha, Z_VIRUS)
         
-    player.draw()
-    
-    screen.draw.text(f"HP: {player.hp}/{player.max_hp}", topleft=(10, 10), 
-                    color="white", fontsize=30)
-    screen.draw.text(f"Energy: {score}/{total_fruits}", topright=(WIDTH - 10, 10), 
-                    color="white", fontsize=30)
+    draw_player(player, alpha)
+    particles.render(render_list, camera.x, camera.y, Z_PARTICLES, view.scale)
     
-    for i in range(player.max_hp):
-        color = "red" if i < player.hp else "gray"
-        screen.draw.filled_circle((30 + i * 40, 50), 12, color)
+    hud.update(player, world.score, world.total_fruits)
+    hud.draw()
+    render_list.draw(screen.surface, background)
 
 
 def draw_game_over():
     """Draw game over screen"""
     screen.fill("black")
-    screen.draw.text("GAME OVER", center=(WIDTH // 2, HEIGHT // 2 - 50), 
-                    color="red", fontsize=60)
-    screen.draw.text("The infection has spread!", center=(WIDTH // 2, HEIGHT // 2 + 20), 
-                    color="white", fontsize=30)
-    screen.draw.text("Press SPACE to return to menu", 
-                    center=(WIDTH // 2, HEIGHT // 2 + 80), color="white", fontsize=25)
+    draw_text("GAME OVER", 60, "red", center=(VIEW_WIDTH // 2, VIEW_HEIGHT // 2 - 50))
+    draw_text("The infection has spread!", 30, "white", center=(VIEW_WIDTH // 2, VIEW_HEIGHT // 2 + 20))
+    draw_text("Press SPACE to return to menu", 25, "white", center=(VIEW_WIDTH // 2, VIEW_HEIGHT // 2 + 80))
 
 
 def draw_victory():
     """Draw victory screen"""
     screen.fill("darkblue")
-    screen.draw.text("VICTORY!", center=(WIDTH // 2, HEIGHT // 2 - 50), 
-                    color="yellow", fontsize=60)
-    screen.draw.text("All viruses eliminated!", center=(WIDTH // 2, HEIGHT // 2 + 20), 
-                    color="white", fontsize=30)
-    screen.draw.text(f"Energy collected: {score}/{total_fruits}", 
-                    center=(WIDTH // 2, HEIGHT // 2 + 60), color="cyan", fontsize=25)
-    screen.draw.text("Press SPACE to return to menu", 
-                    center=(WIDTH // 2, HEIGHT // 2 + 100), color="white", fontsize=25)
+    draw_text("VICTORY!", 60, "yellow", center=(VIEW_WIDTH // 2, VIEW_HEIGHT // 2 - 50))
+    draw_text("All viruses eliminated!", 30, "white", center=(VIEW_WIDTH // 2, VIEW_HEIGHT // 2 + 20))
+    draw_text(f"Energy collected: {world.score}/{world.total_fruits}", 25, "cyan",
+              center=(VIEW_WIDTH // 2, VIEW_HEIGHT // 2 + 60))
+    draw_text("Press SPACE to return to menu", 25, "white", center=(VIEW_WIDTH // 2, VIEW_HEIGHT // 2 + 100))
 
 
 def on_mouse_down(pos):
     """Handle mouse clicks"""
     global game_state, sound_enabled
     
+    pos = view.to_logical(pos)
     if game_state == STATE_MENU:
-        if buttons[0].is_clicked(pos):
+        if buttons[0].is_clicked(pos) and assets_ready:
             game_state = STATE_PLAYING
             init_game()
-            # Start music when game starts
-            if sound_enabled:
-                try:
-                    music.play('back')
-                except:
-                    pass
         elif buttons[1].is_clicked(pos):
             sound_enabled = not sound_enabled
-            if sound_enabled:
-                try:
-                    music.play('back')
-                except:
-                    pass
-            else:
-                try:
-                    music.stop()
-                except:
-                    pass
+            audio.set_enabled(sound_enabled)
         elif buttons[2].is_clicked(pos):
             exit()
 
@@ -684,17 +617,47 @@ def on_key_down(key):
     """Handle key presses"""
     global game_state
     
+    if key == keys.F3:
+        profiler.toggle()
+    elif key == keys.F4:
+        profiler_overlay.show_notice(f"saved {save_profile('json')}")
+    elif key == keys.F5:
+        profiler_overlay.show_notice(f"saved {save_profile('csv')}")
+    
     if game_state in [STATE_GAME_OVER, STATE_VICTORY]:
         if key == keys.SPACE:
             game_state = STATE_MENU
             init_menu()
 
 
-# Start background music at beginning
-try:
-    music.play('back')
-except:
-    pass
+def save_profile(kind):
+    """Write the profiler buffer as a Chrome trace ("json") or CSV; returns
+    the file's path"""
+    path = time.strftime(f"profile-%Y%m%d-%H%M%S.{kind}")
+    if kind == "json":
+        profiler.write_chrome_trace(path)
+    else:
+        profiler.write_csv(path)
+    return path
+
+
+def init_profiler():
+    """Register the functions timed while the profiler is on"""
+    profiler.instrument(Player, 'update', "Player.update")
+    for owner, attr in ((Player, 'move_and_collide'), (World, 'check_virus_hits'),
+                        (World, 'collect_fruits'), (VirusSwarm, 'hits'), (FruitSwarm, 'hits')):
+        profiler.instrument(owner, attr, "collision")
+    profiler.instrument(Animator, 'advance', "animation")
+    profiler.instrument(globals(), 'draw_game')
+    profiler.instrument(globals(), 'draw_entity')
+
+
+# Start background music at beginning; it loops until sound is turned off
+audio.play_music('back')
 
 init_menu()
-pgzrun.go()
\ No newline at end of file
+init_profiler()
+preloader.start()
+
+if __name__ == "__main__":
+    pgzrun.go()
\ No newline at end of file
@@ -0,0 +1,6 @@
+"""Run pygame headless: no window and no sound device are needed"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -0,0 +1,47 @@
+"""Animators step through shared clips: looping, playing once and mirroring"""
+
+from engine.animation import Animator, clip, clip_by_id
+
+
+def frames_over(animator, ticks):
+    shown = []
+    for _ in range(ticks):
+        animator.advance()
+        shown.append(animator.frame)
+    return shown
+
+
+def test_loop_clip_wraps_after_each_frame_duration():
+    idle = clip('virus_idle')
+    animator = Animator(idle)
+    shown = frames_over(animator, 8 * len(idle.frames) * 2)
+    expected = [frame for frame in idle.frames[1:] + idle.frames[:1] for _ in range(8)]
+    assert shown == [idle.frames[0]] * 7 + expected + expected[:-7]
+    assert not animator.finished
+
+
+def test_once_clip_stops_on_its_last_frame():
+    hit = clip('player_hit')
+    animator = Animator(hit)
+    frames_over(animator, 6 * len(hit.frames) + 20)
+    assert animator.finished
+    assert animator.frame == hit.frames[-1]
+    assert not animator.advance()
+
+
+def test_mirroring_and_clip_switches():
+    run = clip('player_run')
+    animator = Animator(run)
+    frames_over(animator, 12)
+    animator.set_mirrored(True)
+    assert animator.frame == run.mirrored[animator.index]
+
+    animator.play(run)
+    assert animator.index == 2
+    animator.play(clip('player_idle'))
+    assert (animator.index, animator.timer) == (0, 0)
+    assert clip_by_id(animator.clip.id) is animator.clip
+
+
+def test_clips_are_shared():
+    assert Animator(clip('fruit_spin')).clip is Animator(clip('fruit_spin')).clip
@@ -0,0 +1,60 @@
+"""Decoded assets come back from the disk cache unchanged, and stay fresh"""
+
+import os
+import shutil
+
+import pygame
+
+from engine.asset_cache import DecodedCache
+from engine.assets import SOUNDS_DIR, SOUND_EXTENSIONS, find_file, list_names
+from engine.sprites import image_path
+
+
+def pixels(surface):
+    return pygame.image.tobytes(surface, 'RGBA')
+
+
+def test_image_round_trip_and_invalidation(tmp_path):
+    source = str(tmp_path / 'sprite.png')
+    shutil.copy(image_path('fruits/banana/banana_1'), source)
+    cache = DecodedCache(str(tmp_path / 'cache'))
+    decoded = cache.image(source)
+    cached = cache.image(source)
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert pixels(cached) == pixels(decoded)
+    assert pixels(cached) == pixels(pygame.image.load(source))
+
+    # An edited source misses and replaces its stale entry
+    edited = decoded.copy()
+    edited.fill((0, 0, 255, 255), (0, 0, 3, 3))
+    pygame.image.save(edited, source)
+    assert pixels(cache.image(source)) == pixels(pygame.image.load(source))
+    assert cache.misses == 2
+    assert len(os.listdir(cache.directory)) == 1
+
+
+def test_corrupt_entry_falls_back_to_the_source(tmp_path):
+    source = image_path('fruits/banana/banana_1')
+    cache = DecodedCache(str(tmp_path / 'cache'))
+    expected = pixels(cache.image(source))
+    for name in os.listdir(cache.directory):
+        with open(os.path.join(cache.directory, name), 'r+b') as f:
+            f.truncate(20)
+    assert pixels(cache.image(source)) == expected
+    assert cache.hits == 0
+
+    cache.clear()
+    assert os.listdir(cache.directory) == []
+
+
+def test_sound_round_trip(tmp_path):
+    pygame.mixer.init(44100, -16, 2)
+    try:
+        source = find_file(SOUNDS_DIR, list_names(SOUNDS_DIR, SOUND_EXTENSIONS)[0], SOUND_EXTENSIONS)
+        cache = DecodedCache(str(tmp_path / 'cache'))
+        decoded = cache.sound(source)
+        cached = cache.sound(source)
+        assert (cache.misses, cache.hits) == (1, 1)
+        assert cached.get_raw() == decoded.get_raw()
+    finally:
+        pygame.mixer.quit()
@@ -0,0 +1,32 @@
+"""The preloader loads the manifest in the background and survives failures"""
+
+from engine.assets import AssetPreloader, build_manifest
+
+
+def test_manifest_is_loaded():
+    manifest = [entry for entry in build_manifest(font_scale=2, masks=True) if entry[0] != 'sound']
+    assert ('font', 60) in build_manifest() and ('font', 120) in manifest
+    preloader = AssetPreloader(manifest)
+    assets = preloader.wait()
+
+    assert preloader.done and preloader.progress == 1.0
+    assert preloader.failed == []
+    assert assets.atlas is not None and assets.atlas._masks is not None
+    assert 120 in assets.fonts
+    assert assets.levels['level1'].read_chunk(next(iter(assets.levels['level1'].index)))
+
+
+def test_failed_entries_are_recorded_and_skipped():
+    preloader = AssetPreloader([('image', 'no/such/image'), ('level', 'no_such_level'),
+                                ('bogus', 'kind'), ('font', 20)])
+    assets = preloader.wait()
+
+    assert preloader.done and preloader.loaded == 4
+    assert [(kind, name) for kind, name, _error in preloader.failed] == [
+        ('image', 'no/such/image'), ('level', 'no_such_level'), ('bogus', 'kind')]
+    assert preloader.failed[0][2].startswith("FileNotFoundError")
+    assert 20 in assets.fonts
+
+
+def test_empty_manifest_is_done():
+    assert AssetPreloader([]).progress == 1.0
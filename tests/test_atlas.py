@@ -0,0 +1,43 @@
+"""The sprite atlas holds every source frame, and mirrored twins of them"""
+
+import pygame
+import pytest
+
+from engine.atlas import MIRROR_SUFFIX, SpriteAtlas, atlas_index, find_sources, pack
+from engine.sprites import image_path, image_size
+
+
+def test_packed_frames_do_not_overlap():
+    names = find_sources()
+    (width, height), frames = pack(names)
+    assert [frame[0] for frame in frames] == names
+    rects = [pygame.Rect(x, y, w, h) for _name, x, y, w, h in frames]
+    for i, rect in enumerate(rects):
+        assert pygame.Rect(0, 0, width, height).contains(rect)
+        assert rect.collidelist(rects[i + 1:]) == -1
+    for name, _x, _y, w, h in frames:
+        assert (w, h) == image_size(name)
+
+
+def test_mirrored_names_and_ids():
+    index = atlas_index()
+    name = index.names[0]
+    frame_id = index.id(name)
+    mirrored = index.id(name + MIRROR_SUFFIX)
+    assert mirrored == frame_id + index.count
+    assert index.mirror(frame_id) == mirrored and index.mirror(mirrored) == frame_id
+    assert index.frame_size(mirrored) == index.frame_size(frame_id)
+    with pytest.raises(KeyError):
+        index.id("no/such/sprite")
+
+
+def test_frames_match_their_source_images():
+    atlas = SpriteAtlas.load()
+    index = atlas.index
+    for name in index.names[::7]:
+        source = pygame.image.load(image_path(name))
+        frame = atlas.frames[index.id(name)]
+        flipped = atlas.frames[index.id(name + MIRROR_SUFFIX)]
+        assert pygame.image.tobytes(frame, 'RGBA') == pygame.image.tobytes(source, 'RGBA')
+        assert (pygame.image.tobytes(flipped, 'RGBA') ==
+                pygame.image.tobytes(pygame.transform.flip(source, True, False), 'RGBA'))
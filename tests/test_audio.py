@@ -0,0 +1,70 @@
+"""Effects are coalesced per frame, cooled down and limited to the pool"""
+
+import pygame
+import pytest
+
+from engine.audio import AudioManager
+
+
+@pytest.fixture
+def mixer():
+    pygame.mixer.init(44100, -16, 2)
+    yield
+    pygame.mixer.quit()
+
+
+def sound(seconds=2.0):
+    return pygame.mixer.Sound(buffer=bytes(int(44100 * seconds) * 4))
+
+
+def busy(audio):
+    return sorted(name for name, channel in zip(audio.playing, audio.channels) if channel.get_busy())
+
+
+def test_repeats_in_one_frame_play_once(mixer):
+    audio = AudioManager({'jump': sound()})
+    for _ in range(3):
+        audio.play('jump')
+    audio.update(1 / 60)
+    assert busy(audio) == ['jump']
+    assert audio.coalesced == 2
+
+    # Still cooling down on the next frame
+    audio.play('jump')
+    audio.update(1 / 60)
+    assert busy(audio) == ['jump'] and audio.dropped == 1
+
+
+def test_full_pool_gives_way_to_higher_priority(mixer):
+    audio = AudioManager({'collect': sound(), 'jump': sound(), 'hit': sound()}, channel_count=2)
+    for name in ('collect', 'collect', 'jump'):
+        audio.play(name)
+        audio.update(1.0)
+    # The pool is full of collects, and the jump outranks them
+    assert busy(audio) == ['collect', 'jump']
+
+    audio.play('hit')
+    audio.update(1.0)
+    assert busy(audio) == ['hit', 'jump']
+    audio.play('collect')
+    audio.update(1.0)
+    assert busy(audio) == ['hit', 'jump']
+
+
+def test_muted_and_missing_sounds_are_ignored(mixer):
+    audio = AudioManager({})
+    audio.play('nothing')
+    audio.update(1 / 60)
+    audio.set_enabled(False)
+    audio.play('jump')
+    assert audio.pending == {}
+
+
+def test_nothing_happens_without_a_mixer():
+    pygame.mixer.quit()
+    assert not AudioManager.available()
+    audio = AudioManager({'jump': None})
+    audio.play('jump')
+    audio.update(1 / 60)
+    audio.play_music('back')
+    assert audio.channels is None and audio.music_name == 'back'
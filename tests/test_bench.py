@@ -0,0 +1,29 @@
+"""The benchmark plays each scenario and writes comparable percentiles"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+import bench_game  # noqa: E402
+
+
+def test_percentile():
+    values = sorted(range(1, 101))
+    assert bench_game.percentile(values, 50) == 50
+    assert bench_game.percentile(values, 99) == 99
+    assert bench_game.percentile([7], 95) == 7
+
+
+def test_short_run_writes_every_section(tmp_path):
+    out = str(tmp_path / 'bench.json')
+    bench_game.main(['--frames', '20', '--scales', '1', '10', '--out', out])
+    with open(out) as f:
+        results = json.load(f)
+    stock, stress = results['scenarios']['stock'], results['scenarios']['stress_x10']
+    assert stress['entities']['viruses'] > stock['entities']['viruses']
+    for scenario in (stock, stress):
+        assert scenario['frames'] == 20
+        assert {'draw_game', 'frame'} <= set(scenario['sections'])
+        for summary in scenario['sections'].values():
+            assert summary['p50'] <= summary['p95'] <= summary['p99']
@@ -0,0 +1,38 @@
+"""The camera follows the player inside the level; far entities update less"""
+
+from engine.camera import Camera
+from engine.constants import FAR_UPDATE_INTERVAL
+from engine.level import LevelFile, write_level
+from engine.world import World, InputState
+
+
+def test_follow_is_clamped_to_the_level():
+    camera = Camera(800, 480, 3000, 480)
+    assert camera.scrolls
+    camera.follow(1500, 240)
+    assert (camera.x, camera.y) == (1100, 0)
+    assert camera.to_screen(1500, 240) == (400, 240)
+    camera.follow(10, 10)
+    assert (camera.x, camera.y) == (0, 0)
+    camera.follow(2990, 470)
+    assert camera.view.right == 3000 and camera.view.bottom == 480
+    assert camera.culling_rect(100).left == camera.x - 100
+
+    assert not Camera(800, 480, 800, 480).scrolls
+
+
+def test_off_screen_viruses_patrol_in_batches(tmp_path):
+    path = str(tmp_path / 'wide.level')
+    write_level(path, {"name": "wide", "width": 3000, "height": 480, "spawn": [50, 300],
+                       "platforms": [], "fruits": [[2900, 300]],
+                       "viruses": [[300, 380, 200, 600], [1200, 380, 1100, 1500]]})
+    world = World(seed=1)
+    world.load_level(LevelFile(path))
+    near, far = world.viruses
+    for _ in range(4 * FAR_UPDATE_INTERVAL):
+        near_x, far_x = near.x, far.x
+        world.step(InputState(False, False, False))
+        assert near.x != near_x
+        assert far.x in (far_x, far_x + far.speed * FAR_UPDATE_INTERVAL)
+    # Each batch covers the ticks it skipped
+    assert far.x == 1200 + 4 * FAR_UPDATE_INTERVAL * far.speed
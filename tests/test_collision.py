@@ -0,0 +1,49 @@
+"""Swept collision stops fast boxes on thin platforms instead of tunnelling"""
+
+from engine.collision import sweep_axis, time_of_impact
+from engine.entities import Platform, Player
+from engine.spatial import SpatialHash
+
+
+def grid_of(*platforms):
+    grid = SpatialHash()
+    for platform in platforms:
+        grid.insert(platform, platform.rect)
+    return grid
+
+
+def test_time_of_impact():
+    assert time_of_impact(0, 10, 20, 20, 30) == 0.5
+    assert time_of_impact(40, 10, -20, 20, 30) == 0.5
+    assert time_of_impact(0, 10, 5, 20, 30) is None
+    assert time_of_impact(40, 10, 20, 20, 30) is None
+
+
+def test_fast_box_stops_flush_on_a_thin_platform():
+    thin = Platform(0, 300, 200, 2)
+    grid = grid_of(thin)
+    # Far more than the platform's thickness in one tick, in both directions
+    assert sweep_axis((50, 100, 20, 40), 1000, 1, grid) == (260, thin)
+    assert sweep_axis((50, 400, 20, 40), -1000, 1, grid) == (302, thin)
+    assert sweep_axis((300, 100, 20, 40), 1000, 1, grid) == (1100, None)
+
+
+def test_first_obstacle_on_the_path_wins():
+    near, far = Platform(100, 0, 10, 50), Platform(300, 0, 10, 50)
+    grid = grid_of(far, near)
+    assert sweep_axis((0, 10, 20, 20), 500, 0, grid) == (80, near)
+
+
+def test_box_inside_an_obstacle_can_leave_it():
+    grid = grid_of(Platform(0, 0, 100, 100))
+    assert sweep_axis((40, 40, 20, 20), 200, 0, grid) == (240, None)
+
+
+def test_falling_player_lands_on_a_thin_platform():
+    thin = Platform(0, 300, 800, 2)
+    player = Player(100, 0)
+    player.vel_y = 500
+    player.update(grid_of(thin), 800, 1000)
+    assert player.on_ground and player.platform is thin
+    assert player.y + player.height == thin.rect.top
+    assert player.vel_y == 0
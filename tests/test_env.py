@@ -0,0 +1,44 @@
+"""Environments step deterministically, alone or batched across processes"""
+
+import random
+
+from engine.env import JUMP, NOOP, OBS_SIZE, RIGHT, BatchEnv, NanoVirusEnv
+
+
+def test_episode_ends_after_max_ticks():
+    env = NanoVirusEnv(max_ticks=50)
+    observation = env.reset(seed=3)
+    assert len(observation) == OBS_SIZE and observation[4] == 3
+    for tick in range(1, 51):
+        _observation, reward, done, info = env.step(RIGHT if tick % 20 else JUMP)
+        assert done == (tick == 50)
+    assert info['tick'] == 50
+
+
+def test_reward_counts_fruits_and_lost_hp():
+    env = NanoVirusEnv()
+    env.reset(seed=1)
+    world = env.world
+    score, hp = world.score, world.player.hp
+    rewards = 0
+    while world.state == "playing" and world.tick < 3000:
+        rewards += env.step(random.Random(world.tick).choice((NOOP, RIGHT, RIGHT, JUMP)))[1]
+    assert rewards == (world.score - score) - (hp - world.player.hp)
+    assert world.score > score or world.player.hp < hp
+
+
+def run(workers, steps=120):
+    actions = random.Random(5)
+    results = []
+    with BatchEnv(4, workers=workers, max_ticks=40, seed=10) as batch:
+        batch.reset()
+        for _ in range(steps):
+            observations, rewards, dones, infos = batch.step([actions.randrange(4) for _ in range(4)])
+            results.append(([list(row) for row in observations], list(rewards), list(dones), infos))
+    return results
+
+
+def test_workers_match_a_single_process():
+    local = run(workers=0)
+    assert sum(len(infos) for *_rest, infos in local) == 4 * (120 // 40)
+    assert run(workers=2) == local
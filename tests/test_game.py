@@ -0,0 +1,48 @@
+"""The front end caches the static background and platforms between frames"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+import bench_game  # noqa: E402
+from engine.level import LevelFile, write_level  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def game():
+    return bench_game.load_game()
+
+
+def play(game, frames):
+    for frame in range(frames):
+        game.world.player.hp = 3
+        bench_game.press_scripted_keys(frame)
+        game.update(1 / 60)
+        game.draw()
+
+
+def test_static_layer_is_reused_until_geometry_changes(game):
+    game.init_game()
+    game.game_state = game.STATE_PLAYING
+    layer = game.static_layer
+    play(game, 60)
+    assert game.static_layer is layer
+
+    game.world.geometry_version += 1
+    play(game, 1)
+    assert game.static_layer is not layer
+
+
+def test_scrolling_level_caches_platform_tiles(game, tmp_path):
+    path = str(tmp_path / 'wide.level')
+    write_level(path, bench_game.stress_source(1) | {"width": 3000})
+    game.init_game(LevelFile(path))
+    game.game_state = game.STATE_PLAYING
+    assert game.camera.scrolls
+    play(game, 2)
+    tiles = dict(game.platform_tiles)
+    assert tiles
+    play(game, 30)
+    assert all(game.platform_tiles[key] is tile for key, tile in tiles.items())
@@ -0,0 +1,52 @@
+"""A packed .level file reads back the source level, chunk by chunk"""
+
+import json
+import os
+
+import pytest
+
+from engine.level import LEVELS_DIR, LevelFile, chunk_of, write_level
+
+
+def test_packed_level_round_trip(tmp_path):
+    with open(os.path.join(LEVELS_DIR, 'level1.json')) as f:
+        source = json.load(f)
+    path = str(tmp_path / 'level1.level')
+    write_level(path, source, chunk_size=256)
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    for level in (LevelFile(path), LevelFile(path, data)):
+        with level:
+            assert (level.name, level.width, level.height) == (source["name"], source["width"], source["height"])
+            assert level.spawn == tuple(source["spawn"])
+            assert level.total_fruits == len(source["fruits"])
+            assert level.chasers == sum(1 for virus in source["viruses"] if virus[4:5] == [True])
+
+            platforms, viruses, fruits = [], [], {}
+            for key in level.index:
+                record = level.read_chunk(key)
+                for x, y, width, height, *_color in record["platforms"]:
+                    assert chunk_of(x + width / 2, y + height / 2, 256) == key
+                platforms += record["platforms"]
+                viruses += record["viruses"]
+                fruits.update((fruit_id, [x, y]) for fruit_id, x, y in record["fruits"])
+            assert sorted(platforms) == sorted(source["platforms"])
+            assert sorted(viruses) == sorted(source["viruses"])
+            assert [fruits[fruit_id] for fruit_id in range(len(fruits))] == source["fruits"]
+            assert level.read_chunk((99, 99)) is None
+
+
+def test_chunks_around_lists_only_nearby_non_empty_chunks(tmp_path):
+    path = str(tmp_path / 'row.level')
+    write_level(path, {"width": 5000, "height": 480, "spawn": [0, 0],
+                       "platforms": [[x, 300, 100, 20] for x in range(0, 5000, 1000)]}, chunk_size=500)
+    level = LevelFile(path)
+    assert sorted(level.chunks_around((4, 0), 2)) == [(2, 0), (4, 0), (6, 0)]
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    path = tmp_path / 'future.level'
+    path.write_text(json.dumps({"format": 99}) + "\n")
+    with pytest.raises(ValueError):
+        LevelFile(str(path))
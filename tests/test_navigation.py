@@ -0,0 +1,63 @@
+"""NavGraph finds the platforms a walker can reach, and chasers get there"""
+
+import json
+import os
+
+from engine.constants import GROUND_HEIGHT
+from engine.entities import Platform, Virus
+from engine.level import LEVELS_DIR, LevelFile, write_level
+from engine.navigation import FLOOR, NavGraph, check_level
+from engine.world import World, InputState
+
+HEIGHT = 480
+
+
+def graph_of(platforms, width=800):
+    walker = Virus(0, 0, 0, 100, True)
+    return NavGraph(platforms, width, HEIGHT - GROUND_HEIGHT, walker.width, walker.height, walker.speed)
+
+
+def test_reachability():
+    floor_y = HEIGHT - GROUND_HEIGHT
+    low = Platform(300, floor_y - 20, 100, 20)
+    step = Platform(500, floor_y - 60, 100, 20)
+    too_high = Platform(100, 0, 100, 20)
+    graph = graph_of([low, step, too_high])
+
+    reachable = graph.reachable_from(FLOOR)
+    assert low in reachable and step in reachable
+    assert too_high not in reachable
+    assert FLOOR in graph.reachable_from(step)
+
+    routes = graph.routes_to(step)
+    assert routes[FLOOR].target in (low, step)
+    # Nothing leads up to it, though it can drop down
+    assert routes[too_high].target is FLOOR
+    assert graph.routes_to(too_high) == {}
+    assert graph.node_below(520, 0) is step
+    assert graph.node_below(700, 0) is FLOOR
+
+
+def test_stock_level_is_fully_reachable(capsys):
+    with open(os.path.join(LEVELS_DIR, 'level1.json')) as f:
+        assert check_level(json.load(f)) == 0
+    assert "unreachable" not in capsys.readouterr().out
+
+
+def test_chaser_climbs_to_the_player(tmp_path):
+    floor_y = HEIGHT - GROUND_HEIGHT
+    path = str(tmp_path / 'climb.level')
+    write_level(path, {"name": "climb", "width": 800, "height": HEIGHT, "spawn": [560, 100],
+                       "platforms": [[300, floor_y - 20, 100, 20], [500, floor_y - 60, 150, 20]],
+                       "viruses": [[40, floor_y, 0, 100, True]], "fruits": [[700, 50]]})
+    world = World(seed=1)
+    world.load_level(LevelFile(path))
+    goal = world.level_platforms[(1, 0)][0]
+    chaser = world.chasers[0]
+    for _ in range(600):
+        world.player.hp = 3
+        world.step(InputState(False, False, False))
+        if chaser.node is goal:
+            break
+    assert world.player.platform is goal
+    assert chaser.node is goal
@@ -0,0 +1,44 @@
+"""The particle pool stays within its budget and recycles expired slots"""
+
+import pygame
+
+from engine.particles import BURST, DUST, SPARK, ParticlePool
+from engine.render import RenderList
+
+
+def test_budget_is_never_exceeded():
+    pool = ParticlePool(max_particles=10, seed=1)
+    pool.emit(BURST, 100, 100, 6, speed=3, life=20)
+    pool.emit(SPARK, 100, 100, 6, speed=3, life=20)
+    assert len(pool) == 10 and pool.dropped == 2
+
+
+def test_particles_move_fall_and_expire():
+    pool = ParticlePool(seed=1)
+    pool.emit(SPARK, 100, 100, 20, speed=3, life=30)
+    pool.emit(DUST, 300, 100, 5, speed=1, life=5)
+    for _ in range(5):
+        pool.step()
+    # Dust is gone; its slots were filled from the end of the live ones
+    assert len(pool) == 20
+    assert all(pool.kind[i] == SPARK for i in range(len(pool)))
+    for _ in range(30):
+        pool.step()
+    assert len(pool) == 0
+
+    pool.emit(SPARK, 0, 0, 1, speed=0, life=30, spread=0)
+    for _ in range(10):
+        pool.step()
+    assert pool.y[0] > 0 and pool.x[0] == 0
+
+
+def test_render_queues_one_dot_per_particle():
+    pool = ParticlePool(seed=1)
+    pool.emit(BURST, 100, 50, 7, speed=2, life=10)
+    render_list = RenderList((800, 480))
+    pool.render(render_list, offset_x=100, offset_y=50, scale=2)
+    assert len(render_list.items) == 7
+    for _z, _order, surface, rect, _key in render_list.items:
+        assert surface.get_size() == (8, 8)
+        assert rect.topleft == (0, 0)
+    render_list.draw(pygame.Surface((800, 480)))
@@ -0,0 +1,52 @@
+"""With pixel collision, sprites only touch where their opaque pixels meet"""
+
+import pygame
+
+from engine.collision import masks_overlap
+from engine.level import LevelFile, write_level
+from engine.world import World
+
+
+def test_masks_overlap_is_centered_like_sprites():
+    ring = pygame.Mask((10, 10), fill=True)
+    ring.erase(pygame.Mask((6, 6), fill=True), (2, 2))
+    dot = pygame.Mask((2, 2), fill=True)
+    assert not masks_overlap(ring, (50, 50), dot, (50, 50))
+    assert masks_overlap(ring, (50, 50), dot, (46, 50))
+    assert not masks_overlap(ring, (50, 50), dot, (40, 50))
+
+
+def one_virus_world(tmp_path, pixel_collision):
+    path = str(tmp_path / 'one.level')
+    write_level(path, {"name": "one", "width": 800, "height": 480, "spawn": [50, 300],
+                       "platforms": [], "viruses": [[400, 200, 400, 400]], "fruits": [[700, 300]]})
+    world = World(seed=1, pixel_collision=pixel_collision)
+    world.load_level(LevelFile(path))
+    return world
+
+
+def corner_miss(world):
+    # A player position whose rect overlaps the virus's but whose pixels do not
+    player, virus = world.player, world.viruses[0]
+    for dx in range(-player.width, virus.width):
+        for dy in (-player.height + 2, virus.height - 2):
+            player.x, player.y = virus.x + dx, virus.y + dy
+            if player.get_rect().colliderect(virus.rect) and not world.touches(player, virus.frame, virus.pos):
+                return player.x, player.y
+    return None
+
+
+def hit_at(world, pos):
+    world.player.x, world.player.y = pos
+    world.player.get_rect()
+    world.check_virus_hits(world.player, world.player.rect)
+    return [event for event in world.events if event[0] == "hit"] != []
+
+
+def test_rect_overlap_alone_is_no_hit(tmp_path):
+    pixel = one_virus_world(tmp_path, True)
+    corner = corner_miss(pixel)
+    assert corner is not None
+    assert not hit_at(pixel, corner)
+    assert hit_at(one_virus_world(tmp_path, False), corner)
+    assert hit_at(one_virus_world(tmp_path, True), pixel.viruses[0].rect.topleft)
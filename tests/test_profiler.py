@@ -0,0 +1,61 @@
+"""The profiler times instrumented calls only while enabled, and exports them"""
+
+import csv
+import json
+
+from engine.profiler import Profiler
+
+
+class Target:
+    def work(self, value):
+        return value * 2
+
+
+def test_wrappers_exist_only_while_enabled():
+    original = Target.work
+    profiler = Profiler()
+    profiler.instrument(Target, 'work', "work")
+    assert Target.work is original
+    assert Target().work(2) == 4 and not profiler.samples()
+
+    profiler.enable()
+    try:
+        assert Target.work is not original
+        assert Target().work(3) == 6
+    finally:
+        profiler.disable()
+    assert Target.work is original
+    assert [name for name, _start, _duration in profiler.samples()] == ["work"]
+
+
+def test_ring_buffer_keeps_the_newest_samples():
+    profiler = Profiler(capacity=4)
+    for i in range(10):
+        profiler.record(profiler.scope_id(f"s{i}"), float(i), i + 0.5)
+    assert [name for name, _start, _duration in profiler.samples()] == ["s6", "s7", "s8", "s9"]
+
+    profiler.clear()
+    assert profiler.samples() == []
+
+
+def test_manual_scopes_and_exports(tmp_path):
+    profiler = Profiler()
+    assert profiler.begin() is None
+    profiler.enable()
+    for _ in range(3):
+        profiler.start_frame()
+        profiler.end("update", profiler.begin())
+    profiler.disable()
+    rows = profiler.scope_averages()
+    assert [(name, calls) for name, _ms, calls in rows] == [("update", 1.5)]
+    assert len(profiler.frame_times) == 2
+
+    profiler.write_chrome_trace(str(tmp_path / 'trace.json'))
+    with open(tmp_path / 'trace.json') as f:
+        events = json.load(f)["traceEvents"]
+    assert sorted(event["name"] for event in events) == ["frame", "frame", "update", "update", "update"]
+    assert min(event["ts"] for event in events) == 0
+
+    profiler.write_csv(str(tmp_path / 'trace.csv'))
+    with open(tmp_path / 'trace.csv', newline='') as f:
+        assert len(list(csv.reader(f))) == 1 + len(events)
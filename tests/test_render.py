@@ -0,0 +1,55 @@
+"""The render list draws in z order and redraws only what changed"""
+
+import pygame
+from pygame import Rect
+
+from engine.render import RenderList, merge_rects
+
+
+def dot(color, size=10):
+    surface = pygame.Surface((size, size))
+    surface.fill(color)
+    return surface
+
+
+def test_merge_rects():
+    merged = merge_rects([(0, 0, 10, 10), (5, 5, 10, 10), (100, 100, 5, 5), (12, 12, 20, 20)])
+    assert sorted(map(tuple, merged)) == [(0, 0, 32, 32), (100, 100, 5, 5)]
+
+
+def test_items_are_drawn_in_z_order():
+    target = pygame.Surface((50, 50))
+    render_list = RenderList((50, 50))
+    render_list.add(dot((255, 0, 0)), (0, 0), z=2)
+    render_list.add(dot((0, 255, 0)), (0, 0), z=1)
+    render_list.add(dot((0, 0, 255)), (0, 0), z=2)
+    render_list.draw(target)
+    assert target.get_at((5, 5))[:3] == (0, 0, 255)
+    assert render_list.items == []
+
+
+def test_only_changed_rects_are_redrawn():
+    background = pygame.Surface((200, 100))
+    background.fill((10, 10, 10))
+    red, green = dot((255, 0, 0)), dot((0, 255, 0))
+    target = background.copy()
+    render_list = RenderList((200, 100))
+
+    def frame(red_pos):
+        render_list.add(green, (150, 50))
+        render_list.add(red, red_pos)
+        render_list.draw(target, background)
+        return render_list.dirty
+
+    assert frame((0, 0)) is None
+    assert frame((0, 0)) == []
+    assert frame((30, 0)) == [Rect(0, 0, 10, 10), Rect(30, 0, 10, 10)]
+
+    # The same picture as drawing everything over the background
+    expected = background.copy()
+    expected.blit(green, (150, 50))
+    expected.blit(red, (30, 0))
+    assert pygame.image.tobytes(target, 'RGB') == pygame.image.tobytes(expected, 'RGB')
+
+    render_list.invalidate()
+    assert frame((30, 0)) is None
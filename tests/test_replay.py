@@ -0,0 +1,45 @@
+"""A saved recording replays to the same state, and a changed one is caught"""
+
+import pytest
+
+from engine.replay import Recorder, Recording, ReplayMismatch, replay
+from engine.world import World, InputState
+
+
+def record_run(path, ticks=600, seed=7):
+    world = World(seed=seed)
+    world.load_default_level()
+    recorder = Recorder(world, hash_interval=30)
+    for tick in range(ticks):
+        inputs = InputState((tick // 80) % 3 == 0, (tick // 80) % 3 == 1, tick % 50 == 0)
+        world.step(inputs)
+        recorder.record(world, inputs)
+    recorder.save(path)
+    return world
+
+
+def test_replay_reaches_the_recorded_state(tmp_path):
+    path = str(tmp_path / 'run.nvr')
+    recorded = record_run(path)
+    recording = Recording.load(path)
+    assert recording.seed == 7 and len(recording) == recorded.tick
+
+    world, checked = replay(recording)
+    assert checked == len(recording.hashes) > 1
+    assert world.tick == recorded.tick
+    assert world.state_hash() == recorded.state_hash()
+
+
+def test_changed_input_or_seed_is_a_mismatch(tmp_path):
+    path = str(tmp_path / 'run.nvr')
+    record_run(path)
+
+    recording = Recording.load(path)
+    recording.inputs[100:160] = bytes([InputState(False, True, False).to_bits()]) * 60
+    with pytest.raises(ReplayMismatch):
+        replay(recording)
+
+    recording = Recording.load(path)
+    recording.seed += 1
+    with pytest.raises(ReplayMismatch):
+        replay(recording)
@@ -0,0 +1,42 @@
+"""ScaledView maps logical coordinates to window pixels and caches sprites"""
+
+import pygame
+import pytest
+
+from engine.scaling import ScaledView, fit_scale
+
+
+def test_fit_scale():
+    assert fit_scale((1920, 1080)) == 2
+    assert fit_scale((1920, 1080), smooth=True) == 2.25
+    assert fit_scale((640, 400)) == 1
+
+
+def test_whole_and_fractional_scales():
+    view = ScaledView(2)
+    assert view.window_size == (1600, 960)
+    assert view.point((10.5, 3)) == (21, 6)
+    assert view.to_logical((799, 401)) == (399, 200)
+
+    view = ScaledView(1.5)
+    assert view.window_size == (1200, 720)
+    # Neighbouring rects still meet after scaling
+    left, right = view.rect((0, 0, 5, 5)), view.rect((5, 0, 5, 5))
+    assert left.right == right.left and left.width + right.width == view.length(10)
+
+    with pytest.raises(ValueError):
+        ScaledView(0)
+
+
+def test_surfaces_are_scaled_once():
+    sprite = pygame.Surface((8, 6), pygame.SRCALPHA)
+    sprite.fill((255, 0, 0, 255), (0, 0, 4, 6))
+    view = ScaledView(3)
+    scaled = view.surface(sprite)
+    assert scaled.get_size() == (24, 18)
+    assert view.surface(sprite) is scaled
+    # Nearest-neighbour keeps hard pixel edges
+    assert scaled.get_at((11, 0)) == (255, 0, 0, 255) and scaled.get_at((12, 0)).a == 0
+    assert ScaledView(1).surface(sprite) is sprite
+    view.clear()
+    assert view.surface(sprite) is not scaled
@@ -0,0 +1,101 @@
+"""Rewinding with RewindBuffer gives back the exact state of every stored tick"""
+
+import random
+
+from engine.level import LevelFile, write_level
+from engine.snapshot import RewindBuffer, restore, snapshot
+from engine.world import World, InputState
+
+
+def dense_level(path, scale=10, seed=0):
+    """A streamed level crowded enough that its deltas outgrow the default slots"""
+    rng = random.Random(seed)
+    width, height = 1600, 480
+    platforms = [[rng.randrange(0, width - 100), rng.randrange(40, height - 100), 100, 20, "brown"]
+                 for _ in range(8 * scale)]
+    viruses = []
+    for _ in range(5 * scale):
+        left = rng.randrange(0, width - 100)
+        viruses.append([left, rng.randrange(0, height - 150), left, left + 100])
+    fruits = [[rng.randrange(0, width - 32), rng.randrange(0, height - 100)] for _ in range(8 * scale)]
+    write_level(path, {"name": "dense", "width": width, "height": height, "spawn": [50, 300],
+                       "platforms": platforms, "viruses": viruses, "fruits": fruits})
+    return LevelFile(path)
+
+
+def test_every_stored_tick_restores_exactly(tmp_path):
+    world = World(seed=1)
+    world.load_level(dense_level(str(tmp_path / 'dense.level')))
+    buffer = RewindBuffer(seconds=2)
+    hashes = []
+    for tick in range(3 * buffer.capacity):
+        world.player.hp = 3
+        world.step(InputState(False, (tick // 90) % 2 == 0, tick % 30 == 0))
+        buffer.push(world)
+        hashes.append(world.state_hash())
+
+    assert len(buffer) == buffer.capacity
+    for age in range(len(buffer)):
+        restore(world, buffer.get(age))
+        assert world.state_hash() == hashes[-1 - age], f"age {age}"
+
+
+def test_dense_level_is_stored_as_deltas(tmp_path):
+    world = World(seed=1)
+    world.load_level(dense_level(str(tmp_path / 'dense.level')))
+    buffer = RewindBuffer(seconds=2, slot_size=256)
+    for tick in range(buffer.capacity):
+        world.player.hp = 3
+        world.step(InputState(False, True, tick % 30 == 0))
+        buffer.push(world)
+
+    assert buffer.slot_size > 256
+    keyframes = sum(1 for length in buffer.lengths if length == 0)
+    assert keyframes <= buffer.capacity // buffer.keyframe_interval + 1
+    assert sum(1 for keyframe in buffer.keyframes if keyframe is not None) == keyframes
+
+
+def test_chaser_standing_in_an_unloaded_chunk(tmp_path):
+    # The chaser's platform streams out while the chaser's own chunk stays
+    path = str(tmp_path / 'stream.level')
+    write_level(path, {"name": "stream", "width": 4000, "height": 480, "spawn": [50, 300],
+                       "platforms": [[0, 300, 1100, 20, "brown"]],
+                       "viruses": [[100, 200, 1030, 1040, True]],
+                       "fruits": [[3900, 380]]})
+    world = World(seed=1)
+    world.load_level(LevelFile(path))
+    buffer = RewindBuffer()
+    hashes = []
+    for _ in range(1200):
+        world.player.hp = 3
+        world.step(InputState(False, True, False))
+        buffer.push(world)
+        hashes.append(world.state_hash())
+
+    assert buffer.rewind(world, 100) == 100
+    assert world.state_hash() == hashes[-101]
+
+
+def test_platform_recreated_by_a_chunk_reload(tmp_path):
+    # Without chasers, platforms are created as chunks load, so the one the
+    # player stood on is a new object once its chunk streams back in
+    path = str(tmp_path / 'lazy.level')
+    write_level(path, {"name": "lazy", "width": 4000, "height": 480, "spawn": [50, 250],
+                       "platforms": [[0, 300, 200, 20, "brown"]],
+                       "viruses": [], "fruits": [[3900, 380]]})
+    world = World(seed=1)
+    world.load_level(LevelFile(path))
+    assert world.nav is None and not world.level_platforms
+    for _ in range(30):
+        world.step(InputState(False, False, False))
+    standing = world.player.platform
+    assert standing is not None
+    data, expected = snapshot(world), world.state_hash()
+    for _ in range(1200):
+        world.step(InputState(False, True, False))
+    assert (0, 0) not in world.chunks
+
+    restore(world, data)
+    assert world.state_hash() == expected
+    assert world.player.platform is not standing
+    assert world.player.platform in world.platforms
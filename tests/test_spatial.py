@@ -0,0 +1,39 @@
+"""SpatialHash queries find what a scan over every item would, in order"""
+
+import random
+
+from pygame import Rect
+
+from engine.spatial import SpatialHash
+
+
+def random_rects(rng, count):
+    return [Rect(rng.randrange(-200, 2000), rng.randrange(-200, 600), rng.randrange(1, 300), rng.randrange(1, 80))
+            for _ in range(count)]
+
+
+def test_query_finds_every_overlapping_item_in_insertion_order():
+    rng = random.Random(2)
+    rects = random_rects(rng, 300)
+    grid = SpatialHash()
+    for index, rect in enumerate(rects):
+        grid.insert(index, rect)
+
+    for query in random_rects(rng, 200):
+        found = grid.query(query)
+        assert found == sorted(found)
+        assert set(found) >= {index for index, rect in enumerate(rects) if rect.colliderect(query)}
+
+
+def test_moved_and_removed_items():
+    grid = SpatialHash(cell_size=64)
+    grid.insert("a", Rect(0, 0, 10, 10))
+    grid.insert("b", Rect(500, 0, 10, 10))
+    grid.move("a", Rect(1000, 0, 10, 10))
+    assert grid.query(Rect(0, 0, 10, 10)) == []
+    assert grid.query(Rect(990, 0, 30, 10)) == ["a"]
+
+    grid.remove("b")
+    grid.remove("b")
+    assert len(grid) == 1 and "b" not in grid
+    assert grid.query(Rect(0, 0, 2000, 100)) == ["a"]
@@ -0,0 +1,49 @@
+"""Telemetry events reach the log file in order, without ever blocking"""
+
+import os
+
+from engine.telemetry import TelemetryLog, read_events
+from engine.world import World, InputState
+
+
+def test_world_events_are_written_in_order(tmp_path):
+    path = str(tmp_path / 'play.nvt')
+    log = TelemetryLog(path, flush_interval=0.01)
+    log.start()
+    world = World(seed=5)
+    world.telemetry = log
+    world.load_default_level()
+    for tick in range(400):
+        world.step(InputState(False, (tick // 60) % 2 == 0, tick % 40 == 0))
+        log.frame(1 / 60)
+    log.frame_summary(world.tick)
+    log.close()
+
+    events = list(read_events(path))
+    assert events[0].kind == 'level' and events[0].value == 5
+    assert [event.tick for event in events] == sorted(event.tick for event in events)
+    assert {'jump', 'land'} <= {event.kind for event in events}
+    assert events[-1].kind == 'frames' and events[-1].value == 400
+    assert log.dropped == 0
+
+
+def test_full_ring_drops_new_events(tmp_path):
+    log = TelemetryLog(str(tmp_path / 'full.nvt'), capacity=8)
+    for tick in range(10):
+        log.log(tick, 'jump', 1.5, 2.5)
+    assert log.dropped == 2
+    log.close()
+    assert [event.tick for event in read_events(log.path)] == list(range(8))
+
+
+def test_log_file_rotates(tmp_path):
+    path = str(tmp_path / 'rot.nvt')
+    log = TelemetryLog(path, capacity=64, max_bytes=400, backups=2)
+    for tick in range(60):
+        log.log(tick, 'collect', value=tick)
+        log.flush()
+    log.close()
+    assert os.path.exists(path + '.1') and os.path.exists(path + '.2')
+    assert not os.path.exists(path + '.3')
+    kept = [event.tick for name in (path + '.2', path + '.1', path) for event in read_events(name)]
+    assert kept == sorted(kept) and kept[-1] == 59
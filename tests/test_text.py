@@ -0,0 +1,32 @@
+"""TextCache renders each string once and evicts the least recently used"""
+
+from engine.text import TextCache
+
+
+def test_repeated_text_is_rendered_once():
+    cache = TextCache()
+    first = cache.get("Score: 10", 30, "white")
+    assert cache.get("Score: 10", 30, "white") is first
+    assert cache.get("Score: 10", 40, "white") is not first
+    assert cache.get("Score: 10", 30, "red") is not first
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_least_recently_used_text_is_evicted():
+    cache = TextCache(max_size=2)
+    a = cache.get("a", 30, "white")
+    cache.get("b", 30, "white")
+    assert cache.get("a", 30, "white") is a
+    cache.get("c", 30, "white")
+    assert len(cache) == 2
+
+    misses = cache.misses
+    assert cache.get("a", 30, "white") is a
+    cache.get("b", 30, "white")
+    assert cache.misses == misses + 1
+
+
+def test_scale_renders_bigger_text():
+    small = TextCache().get("Level", 30, "white")
+    big = TextCache(scale=2).get("Level", 30, "white")
+    assert big.get_height() > 1.5 * small.get_height()
@@ -0,0 +1,36 @@
+"""FixedTimestep runs whole ticks for the elapsed time, capped per frame"""
+
+import pytest
+
+from engine.timestep import FixedTimestep, lerp_pos
+
+
+def test_ticks_follow_elapsed_time_whatever_the_frame_rate():
+    for fps in (30, 60, 144, 250):
+        timestep = FixedTimestep(tick_rate=60)
+        steps = []
+        for _ in range(fps * 2):
+            timestep.advance(1 / fps, lambda: steps.append(None))
+        assert abs(len(steps) - 120) <= 1, fps
+        assert 0 <= timestep.alpha < 1
+
+
+def test_leftover_time_becomes_alpha():
+    timestep = FixedTimestep(tick_rate=10)
+    assert timestep.advance(0.25, lambda: None) == 2
+    assert timestep.alpha == pytest.approx(0.5)
+
+
+def test_slow_frame_is_capped_and_the_rest_skipped():
+    timestep = FixedTimestep(tick_rate=10, max_ticks_per_frame=5)
+    assert timestep.advance(1.05, lambda: None) == 5
+    assert timestep.skipped_ticks == 5
+    assert timestep.alpha == pytest.approx(0.5)
+    assert timestep.advance(0.1, lambda: None) == 1
+
+    timestep.reset()
+    assert (timestep.accumulator, timestep.alpha) == (0.0, 0.0)
+
+
+def test_lerp_pos():
+    assert lerp_pos((0, 10), (10, 30), 0.25) == (2.5, 15)
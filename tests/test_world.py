@@ -0,0 +1,61 @@
+"""World runs the whole game without pgzero, a window or a clock"""
+
+import subprocess
+import sys
+
+from engine.constants import STATE_GAME_OVER, STATE_PLAYING, STATE_VICTORY
+from engine.level import LevelFile, write_level
+from engine.world import World, InputState
+
+RIGHT = InputState(False, True, False)
+
+
+def one_room(tmp_path, viruses=(), fruits=()):
+    path = str(tmp_path / 'room.level')
+    write_level(path, {"name": "room", "width": 800, "height": 480, "spawn": [50, 300],
+                       "platforms": [], "viruses": list(viruses), "fruits": list(fruits)})
+    world = World(seed=2)
+    world.load_level(LevelFile(path))
+    return world
+
+
+def test_engine_does_not_import_pgzero():
+    code = ("import sys; from engine.world import World, InputState\n"
+            "world = World(); world.load_default_level()\n"
+            "for _ in range(100): world.step(InputState(False, True, False))\n"
+            "print('pgzero' in sys.modules, world.tick)")
+    output = subprocess.check_output([sys.executable, '-c', code], text=True)
+    assert output.split()[-2:] == ['False', '100']
+
+
+def test_collecting_every_fruit_wins(tmp_path):
+    world = one_room(tmp_path, fruits=[[200, 400], [400, 400]])
+    while world.state == STATE_PLAYING and world.tick < 600:
+        world.step(RIGHT)
+    assert world.state == STATE_VICTORY
+    assert world.score == world.total_fruits == 2
+    tick = world.tick
+    world.step(RIGHT)
+    assert world.tick == tick and world.events == []
+
+
+def test_running_into_viruses_loses(tmp_path):
+    world = one_room(tmp_path, viruses=[[300 + 80 * i, 400, 300 + 80 * i, 310 + 80 * i] for i in range(5)],
+                     fruits=[[750, 100]])
+    hits = 0
+    while world.state == STATE_PLAYING and world.tick < 3000:
+        world.step(InputState(world.tick % 240 >= 120, world.tick % 240 < 120, False))
+        hits += sum(1 for event in world.events if event[0] == "hit")
+    assert world.state == STATE_GAME_OVER
+    assert world.player.hp <= 0 and hits == world.player.max_hp
+
+
+def test_same_seed_same_game():
+    def run(seed):
+        world = World(seed=seed)
+        world.load_default_level()
+        for tick in range(300):
+            world.step(InputState(False, tick % 120 < 60, tick % 25 == 0))
+        return world.state_hash()
+    assert run(3) == run(3)
+    assert run(3) != run(4)